@@ -6,7 +6,8 @@ while ! pg_isready -h db -p 5432 -U postgres; do
 done
 
 echo "PostgreSQL is ready!"
-python manage.py migrate
+# also runs the database checks, e.g. stale balances after ledger mode
+python manage.py migrate || exit 1
 python manage.py collectstatic --noinput
 
 exec "$@"
@@ -0,0 +1,103 @@
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Max
+
+# PostgreSQL sequence created by accounts/migrations/0004
+ACCOUNT_NUMBER_SEQUENCE = "accounts_account_number_seq"
+
+
+class AccountNumberAllocator:
+    """
+    Hands out unique account numbers without reading the accounts table.
+
+    - PostgreSQL: nextval() of a sequence. It never blocks concurrent callers
+      and is not rolled back, so numbers can be reserved in blocks of
+      settings.ACCOUNT_NUMBER_BLOCK_SIZE and handed out from memory (no query
+      per account). Numbers of an unused block are skipped (gaps).
+    - Other databases: a counter row increased with one UPDATE ... RETURNING.
+      It is rolled back with the caller's transaction, so it is never cached.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {alias: numbers reserved but not handed out yet}
+        self._blocks = {}
+
+    def allocate(self, using="default"):
+        """
+        Returns one account number.
+        """
+        if connections[using].vendor != "postgresql":
+            return self.reserve(1, using)[0]
+
+        with self._lock:
+            block = self._blocks.get(using)
+            if not block:
+                block = self.reserve(settings.ACCOUNT_NUMBER_BLOCK_SIZE, using)
+                self._blocks[using] = block
+
+            return block.pop(0)
+
+    def reserve(self, count, using="default"):
+        """
+        Returns count unique account numbers with a single round trip.
+        """
+        if count <= 0:
+            return []
+
+        connection = connections[using]
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT nextval(%s) FROM generate_series(1, %s)",
+                    [ACCOUNT_NUMBER_SEQUENCE, count],
+                )
+                return sorted(row[0] for row in cursor.fetchall())
+
+        last = self._increase_counter(count, using)
+        return list(range(last - count + 1, last + 1))
+
+    def reset(self):
+        """
+        Forget the reserved blocks.
+        """
+        with self._lock:
+            self._blocks.clear()
+
+    def _increase_counter(self, count, using):
+        from .models import AccountNumberCounter
+
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        sql = (
+            f"UPDATE {qn(AccountNumberCounter._meta.db_table)} "
+            f"SET {qn('value')} = {qn('value')} + %s "
+            f"WHERE {qn('id')} = %s RETURNING {qn('value')}"
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [count, AccountNumberCounter.SINGLETON_ID])
+            row = cursor.fetchone()
+
+            if row is None:
+                # the counter row is gone (e.g. the table was flushed),
+                # start again after the highest number in use
+                from .models import Account
+
+                last = Account.objects.using(using).aggregate(
+                    last=Max("account_number")
+                )["last"]
+                AccountNumberCounter.objects.using(using).get_or_create(
+                    pk=AccountNumberCounter.SINGLETON_ID,
+                    defaults={"value": last or 0},
+                )
+                cursor.execute(sql, [count, AccountNumberCounter.SINGLETON_ID])
+                row = cursor.fetchone()
+
+        return row[0]
+
+
+account_numbers = AccountNumberAllocator()
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .async_views import AsyncAccountListView
+
+urlpatterns = [
+    path("", AsyncAccountListView.as_view(), name="async-account-list"),
+]
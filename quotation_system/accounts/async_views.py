@@ -0,0 +1,55 @@
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.response import Response
+
+from quotation_system.async_api import AsyncAPIView
+from quotation_system.conditional import make_etag, not_modified, with_etag
+from quotation_system.transactions.ledger import fill_balances, ledger_mode
+from quotation_system.users.authentication import model_user
+
+from .models import Account
+from .serializers import AccountSerializer, account_plan
+from .views import AccountCursorPagination, account_list_state, ledger_page
+
+
+class AsyncAccountListView(AsyncAPIView):
+    """
+    Async AccountListView (same payloads), served under /api/async/.
+    """
+
+    pagination_class = AccountCursorPagination
+
+    async def get(self, request):
+        queryset = Account.objects.filter(user_id=request.user.pk)
+
+        state = await sync_to_async(account_list_state)(queryset)
+        etag = make_etag(request, *state.values())
+        response = not_modified(request, etag)
+        if response is None:
+            response = await self.page(request, queryset)
+
+        return with_etag(response, etag, no_cache=True)
+
+    async def page(self, request, queryset):
+        paginator = self.pagination_class()
+        fields = account_plan.requested(request)
+        accounts = await paginator.apaginate_queryset(
+            account_plan.select(queryset, ledger_page(fields), paginator.ordering),
+            request,
+            view=self,
+        )
+        if ledger_mode() and "balance" in fields:
+            await sync_to_async(fill_balances)(accounts)
+
+        return paginator.get_paginated_response(
+            account_plan.serialize(accounts, fields)
+        )
+
+    async def post(self, request):
+        serializer = AccountSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # the account number allocator uses the sync ORM
+        await sync_to_async(serializer.save)(user=model_user(request.user), balance=0)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+from quotation_system.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0002_alter_account_balance"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="account",
+            index=models.Index(
+                fields=["user", "account_number"], name="account_user_number_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:21
+
+from django.db import migrations, models
+from django.db.models import Max
+
+SEQUENCE = "accounts_account_number_seq"
+
+
+def start_after_current_numbers(apps, schema_editor):
+    """
+    Start the counter (and the PostgreSQL sequence) after the highest
+    account number in use.
+    """
+    Account = apps.get_model("accounts", "Account")
+    AccountNumberCounter = apps.get_model("accounts", "AccountNumberCounter")
+    db = schema_editor.connection.alias
+
+    last = Account.objects.using(db).aggregate(last=Max("account_number"))["last"]
+    AccountNumberCounter.objects.using(db).update_or_create(
+        pk=1, defaults={"value": last or 0}
+    )
+
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE}")
+        schema_editor.execute(
+            "SELECT setval(%s, %s, false)", [SEQUENCE, (last or 0) + 1]
+        )
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {SEQUENCE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_account_user_number_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountNumberCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(start_after_current_numbers, drop_sequence),
+    ]
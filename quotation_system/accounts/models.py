@@ -1,5 +1,19 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, router
+
+from .allocators import account_numbers
+
+
+class AccountManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        # reserve the numbers of every new account with a single query
+        objs = list(objs)
+        missing = [account for account in objs if not account.account_number]
+        numbers = account_numbers.reserve(len(missing), self.db)
+        for account, number in zip(missing, numbers):
+            account.account_number = number
+
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 class Account(models.Model):
@@ -10,15 +24,35 @@ class Account(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    objects = AccountManager()
+
+    class Meta:
+        indexes = [
+            # list view: WHERE user_id = ? ORDER BY account_number
+            models.Index(
+                fields=["user", "account_number"], name="account_user_number_idx"
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         # only when creating a new account
         if not self.account_number:
-            last_account = Account.objects.order_by("-account_number").first()
-            if last_account:
-                self.account_number = last_account.account_number + 1
-            else:
-                self.account_number = 1
+            using = kwargs.get("using") or router.db_for_write(Account, instance=self)
+            self.account_number = account_numbers.allocate(using)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.account_number} - {self.currency} - {self.balance}"
+
+
+class AccountNumberCounter(models.Model):
+    """
+    Last account number handed out, used where there are no sequences (SQLite).
+    """
+
+    SINGLETON_ID = 1
+
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.value)
@@ -1,5 +1,9 @@
 from rest_framework import serializers
 
+from quotation_system.fieldplans import FieldPlan
+from quotation_system.transactions.models import AccountDailyRollup
+from quotation_system.transactions.serializers import DateRangeSerializer
+
 from .models import Account
 
 
@@ -10,3 +14,58 @@ class AccountSerializer(serializers.ModelSerializer):
         model = Account
         fields = "__all__"
         read_only_fields = ["user", "balance"]
+
+
+# list responses, built from values() rows (see fieldplans.py)
+account_plan = FieldPlan(AccountSerializer)
+
+
+class AccountStatementQuerySerializer(DateRangeSerializer):
+    """
+    Query parameters of the account statement: ?from=&to=
+    """
+
+    dates_required = True
+
+
+class AccountDailyRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AccountDailyRollup
+        fields = [
+            "day",
+            "deposits",
+            "withdrawals",
+            "transfers_in",
+            "transfers_out",
+            "transaction_count",
+            "opening_balance",
+            "closing_balance",
+        ]
+
+
+class AccountStatementSerializer(serializers.Serializer):
+    """
+    Period totals of an account, amounts in the account currency.
+    """
+
+    def get_fields(self):
+        # "from" is a python keyword, so the fields are not class attributes
+        return {
+            "account": serializers.IntegerField(source="account.pk"),
+            "account_number": serializers.IntegerField(source="account.account_number"),
+            "currency": serializers.CharField(),
+            "from": serializers.DateField(),
+            "to": serializers.DateField(),
+            "opening_balance": serializers.DecimalField(
+                max_digits=10, decimal_places=2
+            ),
+            "closing_balance": serializers.DecimalField(
+                max_digits=10, decimal_places=2
+            ),
+            "deposits": serializers.DecimalField(max_digits=14, decimal_places=2),
+            "withdrawals": serializers.DecimalField(max_digits=14, decimal_places=2),
+            "transfers_in": serializers.DecimalField(max_digits=14, decimal_places=2),
+            "transfers_out": serializers.DecimalField(max_digits=14, decimal_places=2),
+            "transaction_count": serializers.IntegerField(),
+            "days": AccountDailyRollupSerializer(many=True),
+        }
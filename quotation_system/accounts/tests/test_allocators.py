@@ -0,0 +1,106 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.allocators import account_numbers
+from quotation_system.accounts.models import Account, AccountNumberCounter
+
+
+@pytest.mark.integration
+class TestAccountNumberAllocator(APITestCase):
+    """
+    Test the account number allocator.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+
+    def test_reserve_consecutive_numbers(self):
+        """
+        Test that a reservation returns new unique numbers in one query.
+        """
+        # arrange
+        first = account_numbers.reserve(1)
+
+        # act
+        with self.assertNumQueries(1):
+            numbers = account_numbers.reserve(3)
+
+        # assert
+        self.assertEqual(len(set(numbers)), 3)
+        self.assertGreater(min(numbers), first[0])
+
+    def test_create_does_not_read_accounts(self):
+        """
+        Test that creating an account does not look for the highest number.
+        """
+        # act
+        with self.assertNumQueries(2) as queries:
+            Account.objects.create(user=self.user, currency="USD")
+
+        # assert
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertNotIn("MAX(", sql.upper())
+
+    def test_bulk_create_reserves_once(self):
+        """
+        Test that bulk_create numbers every account with a single reservation.
+        """
+        # arrange
+        accounts = [Account(user=self.user, currency="USD") for _ in range(5)]
+
+        # act
+        with self.assertNumQueries(2):
+            Account.objects.bulk_create(accounts)
+
+        # assert
+        numbers = [account.account_number for account in accounts]
+        self.assertEqual(len(set(numbers)), 5)
+        self.assertEqual(
+            sorted(numbers),
+            sorted(
+                Account.objects.filter(user=self.user).values_list(
+                    "account_number", flat=True
+                )
+            ),
+        )
+
+    def test_missing_counter_starts_after_highest_number(self):
+        """
+        Test that a lost counter row starts again after the numbers in use.
+        """
+        # arrange
+        account = Account.objects.create(user=self.user, currency="USD")
+        AccountNumberCounter.objects.all().delete()
+
+        # act
+        new_account = Account.objects.create(user=self.user, currency="USD")
+
+        # assert
+        self.assertEqual(new_account.account_number, account.account_number + 1)
+
+
+@pytest.mark.unit
+def test_allocate_hands_out_reserved_block(mocker, settings):
+    """
+    Test that on PostgreSQL numbers are taken from a reserved block in memory.
+    """
+    # arrange
+    settings.ACCOUNT_NUMBER_BLOCK_SIZE = 3
+    connections = mocker.patch("quotation_system.accounts.allocators.connections")
+    connections.__getitem__.return_value.vendor = "postgresql"
+    reserve = mocker.patch.object(
+        account_numbers, "reserve", side_effect=[[10, 11, 12], [20, 21, 22]]
+    )
+    account_numbers.reset()
+
+    # act
+    numbers = [account_numbers.allocate() for _ in range(4)]
+    account_numbers.reset()
+
+    # assert
+    assert numbers == [10, 11, 12, 20]
+    assert reserve.call_count == 2
+    reserve.assert_called_with(3, "default")
@@ -0,0 +1,58 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from quotation_system.accounts.models import Account
+
+
+@pytest.mark.integration
+class TestAsyncAccountListView(APITestCase):
+    """
+    Test the async account list view.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.url = reverse("async-account-list")
+        self.headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    async def test_create_and_list_accounts(self):
+        """
+        Test that created accounts are listed without querying their user.
+        """
+        # act
+        created = await self.async_client.post(
+            self.url,
+            {"currency": "USD"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        response = await self.async_client.get(self.url, headers=self.headers)
+
+        # assert
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(created.json()["balance"], "0.00")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        accounts = response.json()["results"]
+        self.assertEqual(len(accounts), 1)
+        self.assertEqual(accounts[0]["user"], self.user.username)
+        self.assertEqual(await Account.objects.filter(user=self.user).acount(), 1)
+
+    async def test_create_account_with_incorrect_data(self):
+        """
+        Test that an invalid payload is rejected.
+        """
+        # act
+        response = await self.async_client.post(
+            self.url, {}, content_type="application/json", headers=self.headers
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("currency", response.json())
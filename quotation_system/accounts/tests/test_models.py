@@ -22,8 +22,10 @@ class TestAccountModel(APITestCase):
     def test_account_number_initialization(self):
         """
         Test that the account number is initialized correctly.
+        Sequences are not rolled back, so the first number depends on the
+        accounts created before (by other tests too).
         """
-        self.assertEqual(self.account.account_number, 1)
+        self.assertGreater(self.account.account_number, 0)
 
     def test_account_number_increment_on_creation(self):
         """
@@ -36,6 +38,8 @@ class TestAccountModel(APITestCase):
         """
         Test that the account number is not incremented on update.
         """
+        account_number = self.account.account_number
+
         self.account.balance = 200
         self.account.save()
-        self.assertEqual(self.account.account_number, 1)
+        self.assertEqual(self.account.account_number, account_number)
@@ -0,0 +1,209 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.transactions.models import AccountDailyRollup, Transaction
+
+
+@pytest.mark.integration
+class TestAccountStatement(APITestCase):
+    """
+    Test the account statement and the daily rollups behind it.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(
+            user=self.user, currency="USD", balance=100
+        )
+        self.other_account = Account.objects.create(
+            user=self.user, currency="USD", balance=100
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.today = timezone.localdate()
+        self.url = reverse("account-statement", kwargs={"pk": self.account.id})
+
+    def post(self, transaction_type, amount, **data):
+        response = self.client.post(
+            reverse("transaction-list-create"),
+            {
+                "transaction_type": transaction_type,
+                "account": self.account.id,
+                "amount": amount,
+                "currency": "USD",
+                **data,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response
+
+    def statement(self, start, end):
+        return self.client.get(
+            self.url, {"from": start.isoformat(), "to": end.isoformat()}
+        )
+
+    def create_history(self):
+        self.post("deposit", "50.00")
+        self.post("withdrawal", "30.00")
+        self.post("transfer", "20.00", related_account=self.other_account.id)
+        self.post(
+            "transfer",
+            "15.00",
+            account=self.other_account.id,
+            related_account=self.account.id,
+        )
+
+    def test_statement_of_the_day(self):
+        """
+        Test that every kind of transaction is added to the day totals.
+        """
+        # arrange
+        self.create_history()
+
+        # act
+        response = self.statement(self.today, self.today)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["account"], self.account.id)
+        self.assertEqual(response.data["opening_balance"], "100.00")
+        self.assertEqual(response.data["deposits"], "50.00")
+        self.assertEqual(response.data["withdrawals"], "30.00")
+        self.assertEqual(response.data["transfers_out"], "20.00")
+        self.assertEqual(response.data["transfers_in"], "15.00")
+        self.assertEqual(response.data["transaction_count"], 4)
+        self.assertEqual(response.data["closing_balance"], "115.00")
+        self.assertEqual(len(response.data["days"]), 1)
+
+    def test_batch_is_added_to_the_rollups(self):
+        """
+        Test that a batch updates the totals like single transactions.
+        """
+        # arrange
+        items = [
+            {
+                "transaction_type": "deposit",
+                "account": self.account.id,
+                "amount": "10.00",
+                "currency": "USD",
+            },
+            {
+                "transaction_type": "transfer",
+                "account": self.other_account.id,
+                "related_account": self.account.id,
+                "amount": "5.00",
+            },
+        ]
+
+        # act
+        self.client.post(
+            reverse("transaction-batch"), {"transactions": items}, format="json"
+        )
+        response = self.statement(self.today, self.today)
+
+        # assert
+        self.assertEqual(response.data["deposits"], "10.00")
+        self.assertEqual(response.data["transfers_in"], "5.00")
+        self.assertEqual(response.data["transaction_count"], 2)
+        self.assertEqual(response.data["closing_balance"], "115.00")
+
+    def test_backfill_matches_incremental_rollups(self):
+        """
+        Test that rebuilding the rollups gives the rows kept by the writes.
+        """
+        # arrange
+        self.create_history()
+        fields = ["account_id", "day", "deposits", "withdrawals", "transfers_in"]
+        fields += ["transfers_out", "transaction_count", "closing_balance"]
+        incremental = list(
+            AccountDailyRollup.objects.order_by("account_id").values(*fields)
+        )
+
+        # act
+        call_command("backfill_daily_rollups", stdout=StringIO())
+
+        # assert
+        rebuilt = list(
+            AccountDailyRollup.objects.order_by("account_id").values(*fields)
+        )
+        self.assertEqual(rebuilt, incremental)
+
+    def test_statement_over_several_days(self):
+        """
+        Test the opening and closing balances of periods with and without activity.
+        """
+        # arrange
+        self.post("deposit", "50.00")
+        yesterday = self.today - timedelta(days=1)
+        Transaction.objects.update(created_at=timezone.now() - timedelta(days=1))
+        self.post("withdrawal", "30.00")
+        call_command("backfill_daily_rollups", stdout=StringIO())
+
+        # act
+        first_day = self.statement(yesterday, yesterday)
+        both_days = self.statement(yesterday, self.today)
+        before = self.statement(yesterday - timedelta(days=5), yesterday - timedelta(1))
+        after = self.statement(self.today + timedelta(1), self.today + timedelta(5))
+
+        # assert
+        self.assertEqual(first_day.data["closing_balance"], "150.00")
+        self.assertEqual(first_day.data["withdrawals"], "0.00")
+
+        self.assertEqual(both_days.data["opening_balance"], "100.00")
+        self.assertEqual(both_days.data["closing_balance"], "120.00")
+        self.assertEqual(len(both_days.data["days"]), 2)
+
+        self.assertEqual(before.data["closing_balance"], "100.00")
+        self.assertEqual(after.data["opening_balance"], "120.00")
+        self.assertEqual(after.data["transaction_count"], 0)
+
+    def test_statement_does_not_read_transactions(self):
+        """
+        Test that the statement is answered from the rollups only.
+        """
+        # arrange
+        self.create_history()
+
+        # act
+        with self.assertNumQueries(2) as queries:
+            self.statement(self.today, self.today)
+
+        # assert
+        for query in queries.captured_queries:
+            self.assertNotIn("transactions_transaction", query["sql"])
+
+    def test_statement_requires_a_period(self):
+        """
+        Test that from and to are required.
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("from", response.data)
+
+    def test_statement_of_another_user_account(self):
+        """
+        Test that the accounts of other users are not found.
+        """
+        # arrange
+        other_user = User.objects.create_user(username="other", password="password")
+        account = Account.objects.create(user=other_user, currency="USD")
+        url = reverse("account-statement", kwargs={"pk": account.id})
+
+        # act
+        response = self.client.get(url, {"from": "2024-01-01", "to": "2024-01-31"})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -4,6 +4,8 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from quotation_system.accounts.models import Account
+
 
 @pytest.mark.integration
 class TestAccountViewsIntegration(APITestCase):
@@ -37,7 +39,10 @@ class TestAccountViewsIntegration(APITestCase):
 
         # assert
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(account["account_number"], 1)
+        self.assertEqual(
+            account["account_number"],
+            Account.objects.get(pk=account["id"]).account_number,
+        )
         self.assertEqual(account["currency"], "USD")
         self.assertEqual(account["balance"], "0.00")
         self.assertEqual(account["user"], self.user.username)
@@ -113,10 +118,11 @@ class TestAccountViewsIntegration(APITestCase):
         response = self.client.get(url, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["currency"], "USD")
-        self.assertEqual(response.data[0]["balance"], "0.00")
-        self.assertEqual(response.data[0]["user"], self.user.username)
+        accounts = response.data["results"]
+        self.assertEqual(len(accounts), 1)
+        self.assertEqual(accounts[0]["currency"], "USD")
+        self.assertEqual(accounts[0]["balance"], "0.00")
+        self.assertEqual(accounts[0]["user"], self.user.username)
 
     def test_list_accounts_with_missing_authentication(self):
         """
@@ -156,7 +162,36 @@ class TestAccountViewsIntegration(APITestCase):
         response = self.client.get(url, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["currency"], "USD")
-        self.assertEqual(response.data[0]["balance"], "0.00")
-        self.assertEqual(response.data[0]["user"], user2.username)
+        accounts = response.data["results"]
+        self.assertEqual(len(accounts), 1)
+        self.assertEqual(accounts[0]["currency"], "USD")
+        self.assertEqual(accounts[0]["balance"], "0.00")
+        self.assertEqual(accounts[0]["user"], user2.username)
+
+    def test_list_accounts_is_paginated(self):
+        """
+        Test that accounts are listed in pages ordered by account number.
+        """
+        # assert
+        url = reverse("account-list")
+
+        self.client.force_authenticate(user=self.user)
+
+        # create accounts
+        for _ in range(3):
+            self.client.post(url, {"currency": "USD"}, format="json")
+
+        # list accounts
+        first = self.client.get(url, {"page_size": 2}, format="json")
+        second = self.client.get(first.data["next"], format="json")
+
+        numbers = [
+            account["account_number"]
+            for account in first.data["results"] + second.data["results"]
+        ]
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first.data["results"]), 2)
+        self.assertEqual(numbers, sorted(numbers))
+        self.assertEqual(len(set(numbers)), 3)
+        self.assertIsNone(second.data["next"])
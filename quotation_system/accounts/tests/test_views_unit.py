@@ -62,4 +62,4 @@ def test_get_queryset_returns_accounts_for_the_user(api_factory, user, view, moc
 
     # Assert
     mock_filter.assert_called_once()
-    mock_filter.assert_called_once_with(user=user)
+    mock_filter.assert_called_once_with(user_id=user.pk)
@@ -1,7 +1,12 @@
 from django.urls import path
 
-from .views import AccountListView
+from .views import AccountListView, AccountStatementView
 
 urlpatterns = [
     path("", AccountListView.as_view(), name="account-list"),
+    path(
+        "<int:pk>/statement/",
+        AccountStatementView.as_view(),
+        name="account-statement",
+    ),
 ]
@@ -1,20 +1,112 @@
+from django.db.models import Count, Max
 from rest_framework import generics, permissions
+from rest_framework.response import Response
+
+from quotation_system.conditional import make_etag, not_modified, with_etag
+from quotation_system.pagination import KeysetCursorPagination
+from quotation_system.replicas import ReplicaReadMixin
+from quotation_system.transactions.ledger import fill_balances, ledger_mode
+from quotation_system.transactions.models import Posting
+from quotation_system.transactions.rollups import account_statement
+from quotation_system.users.authentication import model_user
 
 from .models import Account
-from .serializers import AccountSerializer
+from .serializers import (
+    AccountSerializer,
+    AccountStatementQuerySerializer,
+    AccountStatementSerializer,
+    account_plan,
+)
+
+
+class AccountCursorPagination(KeysetCursorPagination):
+    # account numbers are unique
+    ordering = ("account_number",)
+
+
+def account_list_state(queryset):
+    """
+    What the ETag of an account list is made of (see conditional.py).
+    """
+    state = queryset.aggregate(updated_at=Max("updated_at"), count=Count("id"))
+    if ledger_mode():
+        # balances change with the postings, the account rows stay unchanged
+        state["posting"] = Posting.objects.filter(
+            account__in=queryset.values("pk")
+        ).aggregate(Max("id"))["id__max"]
 
+    return state
 
-class AccountListView(generics.ListCreateAPIView):
+
+def ledger_page(fields):
+    """
+    Names read for a page: with the ledger, the balances are added to the
+    rows by id (see fill_balances()).
+    """
+    if ledger_mode() and "balance" in fields and "id" not in fields:
+        return [*fields, "id"]
+    return fields
+
+
+class AccountListView(ReplicaReadMixin, generics.ListCreateAPIView):
     """
     Create a new account for a user.
-    List all accounts for a user.
+    List all accounts for a user, from the read replica.
     """
 
     serializer_class = AccountSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AccountCursorPagination
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user, balance=0)
+        serializer.save(user=model_user(self.request.user), balance=0)
 
     def get_queryset(self):
-        return Account.objects.filter(user=self.request.user).order_by("account_number")
+        return Account.objects.filter(user_id=self.request.user.pk).order_by(
+            "account_number"
+        )
+
+    def list(self, request, *args, **kwargs):
+        # polls of an unchanged list get a 304 before the page is read
+        etag = make_etag(request, *account_list_state(self.get_queryset()).values())
+        response = not_modified(request, etag)
+        if response is None:
+            response = self.page(request)
+
+        return with_etag(response, etag, no_cache=True)
+
+    def page(self, request):
+        # values() rows and ?fields=, the username is read with a join
+        fields = account_plan.requested(request)
+        queryset = account_plan.select(
+            self.get_queryset(), ledger_page(fields), self.paginator.ordering
+        )
+
+        page = self.paginate_queryset(queryset)
+        if ledger_mode() and "balance" in fields:
+            fill_balances(page)
+        return self.get_paginated_response(account_plan.serialize(page, fields))
+
+
+class AccountStatementView(generics.GenericAPIView):
+    """
+    Totals of an account in a period, read from its daily rollups.
+    GET /api/accounts/<id>/statement/?from=YYYY-MM-DD&to=YYYY-MM-DD
+    """
+
+    serializer_class = AccountStatementSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Account.objects.filter(user_id=self.request.user.pk)
+
+    def get(self, request, *args, **kwargs):
+        account = self.get_object()
+
+        period = AccountStatementQuerySerializer(data=request.query_params)
+        period.is_valid(raise_exception=True)
+
+        statement = account_statement(
+            account, period.validated_data["from"], period.validated_data["to"]
+        )
+        return Response(self.get_serializer(statement).data)
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "quotation_system.settings")
 
 application = get_asgi_application()
+
+# imported once the apps are loaded
+from quotation_system.currencies.cache import preload_on_startup  # noqa: E402
+
+preload_on_startup()
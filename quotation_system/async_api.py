@@ -0,0 +1,93 @@
+import orjson
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+from quotation_system.fastjson import ORJSONRenderer
+from quotation_system.timing import timed
+from quotation_system.users.authentication import AsyncJWTAuthentication
+
+
+class AsyncAPIView(View):
+    """
+    Base of the async (ASGI) API views.
+
+    Every handler is a coroutine, so under ASGI a request stays in the event
+    loop: reads use the async ORM, and work that needs the sync ORM
+    (transaction.atomic(), select_for_update()) goes to a thread in a single
+    sync_to_async() call.
+
+    Requests are authenticated with a JWT and errors get the same JSON bodies
+    as the DRF views. Handlers return DRF Responses, rendered as JSON.
+    The request gets the DRF attribute names (user, data, query_params) read
+    by the paginators and the idempotency helpers.
+    """
+
+    authentication = AsyncJWTAuthentication()
+    renderer = ORJSONRenderer()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # token authentication only, like the DRF views there is no CSRF check
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.query_params = request.GET
+
+        try:
+            request.user = await self.authenticate(request)
+            request.data = self.parse(request)
+            response = await super().dispatch(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        if isinstance(response, Response):
+            with timed("render"):
+                response = self.render(response)
+
+        return response
+
+    async def authenticate(self, request):
+        result = await self.authentication.authenticate_async(request)
+        if result is None:
+            raise exceptions.NotAuthenticated()
+
+        return result[0]
+
+    def parse(self, request):
+        """
+        JSON payload of the request, {} for requests without a body.
+        """
+        if not request.body:
+            return {}
+
+        if request.content_type != self.renderer.media_type:
+            raise exceptions.UnsupportedMediaType(request.content_type)
+
+        try:
+            return orjson.loads(request.body)
+        except ValueError as exc:
+            raise exceptions.ParseError(f"JSON parse error - {exc}")
+
+    def handle_exception(self, exc):
+        response = exception_handler(exc, {"view": self, "request": self.request})
+        if response is None:
+            raise exc
+
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            response["WWW-Authenticate"] = self.authentication.authenticate_header(
+                self.request
+            )
+
+        return response
+
+    def render(self, response):
+        response.accepted_renderer = self.renderer
+        response.accepted_media_type = self.renderer.media_type
+        response.renderer_context = {"view": self, "request": self.request}
+
+        return response.render()
@@ -0,0 +1,101 @@
+"""
+Query budgets of the endpoints: the most SQL queries one request may run and
+the most rows its SELECTs may return, by (URL name, method).
+
+They are enforced against a seeded dataset by tests/test_query_budgets.py, so
+an N+1 query or an extra lookup inside a lock fails the tests instead of
+showing up in production. A change that really needs more has to raise the
+budget here, where it is reviewed.
+"""
+
+from typing import NamedTuple
+
+from rest_framework.settings import api_settings
+
+
+class Budget(NamedTuple):
+    queries: int
+    rows: int
+
+
+# a full page and the row telling there is a next one
+PAGE_ROWS = api_settings.PAGE_SIZE + 1
+
+BUDGETS = {
+    # the user comes from the token claims (users/authentication.py)
+    # ETag (see conditional.py), page
+    ("account-list", "GET"): Budget(queries=2, rows=1 + PAGE_ROWS),
+    # ETag, page, archive blocks overlapping the page
+    ("transaction-list-create", "GET"): Budget(queries=3, rows=1 + PAGE_ROWS),
+    # account (validation), locked account, account UPDATE, INSERT, posting
+    # INSERT, rollup UPDATE, and the SAVEPOINT/RELEASE of the atomic block
+    # inside the test transaction; the rate comes from the cache, not from a
+    # query
+    ("transaction-list-create", "POST"): Budget(queries=8, rows=2),
+    # transaction
+    ("transaction-detail", "GET"): Budget(queries=1, rows=1),
+    # user by username (the password check runs no query)
+    ("login", "POST"): Budget(queries=1, rows=1),
+}
+
+
+def count_rows(connection, sql, params):
+    """
+    Rows returned by a SELECT, counted on a separate cursor so the results
+    of the statement itself are left untouched.
+    """
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM ({sql}) budget_rows", params)
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() collecting the statements of a block and the
+    rows returned by its SELECTs.
+    """
+
+    def __init__(self):
+        # [(sql, rows)], rows is None for statements other than SELECT
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+
+        rows = None
+        if not many and sql.lstrip().upper().startswith("SELECT"):
+            rows = count_rows(context["connection"], sql, params)
+        self.statements.append((sql, rows))
+
+        return result
+
+    @property
+    def queries(self):
+        return len(self.statements)
+
+    @property
+    def rows(self):
+        return sum(rows or 0 for _, rows in self.statements)
+
+
+def over_budget(key, recorder):
+    """
+    Returns a report of the statements of recorder when they exceed the
+    budget of key, or None.
+    """
+    budget = BUDGETS[key]
+    if recorder.queries <= budget.queries and recorder.rows <= budget.rows:
+        return None
+
+    lines = [
+        f"{key[1]} {key[0]}: {recorder.queries} queries (budget {budget.queries}), "
+        f"{recorder.rows} rows (budget {budget.rows})"
+    ]
+    lines += [
+        f"  {index}. [{'-' if rows is None else rows} rows] {sql}"
+        for index, (sql, rows) in enumerate(recorder.statements, 1)
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,56 @@
+"""
+Conditional GET (ETag / If-None-Match) of the read endpoints.
+
+The ETag of a response is computed from a cheap query (or no query at all)
+before the page is read, so a client polling an unchanged resource gets a
+304 Not Modified without the page query and its serialization:
+- accounts: MAX(updated_at) and COUNT(*) of the accounts of the user, every
+  balance write sets updated_at
+- transactions: id of the latest transaction of the user, one row of the
+  (user, created_at, id) index; transactions are never updated. A
+  transaction committing after a later one, inside the commit window of the
+  latter, is only seen once the ETag changes again.
+- transaction detail: the row itself, read before answering so a 304 is
+  only sent for a transaction the user can read. Rows are never updated, the
+  ETag is made of the id, created_at and TRANSACTION_REPRESENTATION_VERSION;
+  responses may be used for TRANSACTIONS_DETAIL_MAX_AGE seconds before they
+  are revalidated.
+
+Responses vary with the Authorization header and are private.
+"""
+
+import hashlib
+
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    quote_etag,
+)
+
+
+def make_etag(request, *parts):
+    """
+    Quoted ETag of parts for the URL (page, ?fields=) and user of request.
+    """
+    value = repr((request.get_full_path(), request.user.pk, *parts))
+    return quote_etag(hashlib.md5(value.encode(), usedforsecurity=False).hexdigest())
+
+
+def not_modified(request, etag):
+    """
+    304 Not Modified response when the If-None-Match header of request has
+    etag, else None.
+    """
+    return get_conditional_response(request, etag=etag)
+
+
+def with_etag(response, etag, **cache_control):
+    """
+    Set the ETag, Vary and Cache-Control headers (private, plus
+    cache_control, see patch_cache_control()) of response.
+    """
+    response["ETag"] = etag
+    patch_vary_headers(response, ["Authorization"])
+    patch_cache_control(response, private=True, **cache_control)
+    return response
@@ -0,0 +1,17 @@
+import pytest
+
+from quotation_system.currencies.cache import rate_cache
+from quotation_system.currencies.matrix import rate_matrix
+
+
+@pytest.fixture(autouse=True)
+def clear_rate_cache():
+    """
+    Rates cached by one test must not leak into (or hide mocks of) the next one.
+    """
+    rate_cache.clear()
+    rate_cache.reset_stats()
+    rate_matrix.invalidate()
+    yield
+    rate_cache.clear()
+    rate_matrix.invalidate()
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CurrenciesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "quotation_system.currencies"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,85 @@
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from quotation_system.caching import MISSING, TTLCache
+
+from .models import CurrencyRate
+
+logger = logging.getLogger(__name__)
+
+# {(from_currency, to_currency): rate or NO_RATE}
+rate_cache = TTLCache(
+    maxsize=settings.CURRENCY_RATE_CACHE_SIZE, ttl=settings.CURRENCY_RATE_CACHE_TTL
+)
+
+# cached for pairs without a stored rate (inverse and triangulated pairs), so
+# they are not looked up again on every conversion
+NO_RATE = object()
+
+
+def get_rate(from_currency, to_currency):
+    """
+    Rate of from_currency -> to_currency, read from the database on a miss.
+    Raises CurrencyRate.DoesNotExist if there is no such rate, its absence is
+    cached like a rate.
+    """
+    key = (from_currency, to_currency)
+
+    rate = rate_cache.get(key)
+    if rate is MISSING:
+        try:
+            rate = CurrencyRate.objects.get(
+                base_currency__code=from_currency, target_currency__code=to_currency
+            ).rate
+        except CurrencyRate.DoesNotExist:
+            rate = NO_RATE
+        rate_cache.set(key, rate)
+
+    if rate is NO_RATE:
+        raise CurrencyRate.DoesNotExist("CurrencyRate matching query does not exist.")
+
+    return rate
+
+
+def preload():
+    """
+    Fill the cache with every rate using a single query.
+    """
+    rates = CurrencyRate.objects.values_list(
+        "base_currency__code", "target_currency__code", "rate"
+    )
+    for from_currency, to_currency, rate in rates:
+        rate_cache.set((from_currency, to_currency), rate)
+
+
+def preload_on_startup():
+    """
+    preload() when settings.CURRENCY_RATE_CACHE_PRELOAD is set, called by the
+    wsgi/asgi entry points. A failure only leaves the cache cold.
+    """
+    if not settings.CURRENCY_RATE_CACHE_PRELOAD:
+        return
+
+    try:
+        preload()
+    except DatabaseError:
+        logger.warning("could not preload the currency rate cache", exc_info=True)
+
+
+def invalidate_rate(from_currency, to_currency):
+    """
+    Drop a rate now and again when the running transaction commits, so a
+    value read by another request before the commit is not kept.
+    Rates changed with queryset.update() are only refreshed by the TTL.
+    """
+    key = (from_currency, to_currency)
+
+    rate_cache.delete(key)
+    transaction.on_commit(lambda: rate_cache.delete(key))
+
+
+def invalidate_all():
+    rate_cache.clear()
+    transaction.on_commit(rate_cache.clear)
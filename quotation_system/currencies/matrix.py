@@ -0,0 +1,184 @@
+import threading
+import time
+from decimal import ROUND_HALF_EVEN, Context, localcontext
+
+from django.conf import settings
+
+from .models import CurrencyRate
+
+# every derived rate is computed with this context, whatever the caller's is
+RATE_CONTEXT = Context(prec=28, rounding=ROUND_HALF_EVEN)
+
+
+class RateMatrix:
+    """
+    Dense matrix of the rates between every pair of currencies.
+
+    Rates keep the meaning of CurrencyRate.rate in convert_amount:
+    converted = amount / rate. A missing pair is derived from
+      - the inverse of the opposite rate: rate(b, a) = 1 / rate(a, b)
+      - triangulation through settings.CURRENCY_PIVOT:
+        rate(a, b) = rate(a, pivot) * rate(pivot, b)
+    Stored rates always win over derived ones.
+
+    The matrix is built on first use and patched when a single rate changes,
+    only the pairs derived from that rate are computed again. Patches are
+    only made by the process that saved the rate, so the matrix is also built
+    again ttl seconds (settings.CURRENCY_RATE_CACHE_TTL) after it was loaded,
+    like the entries of the rate cache.
+    """
+
+    def __init__(self, pivot=None, ttl=None, timer=time.monotonic):
+        self.pivot = pivot
+        self.ttl = ttl
+        self.timer = timer
+        self._lock = threading.Lock()
+        # timer() value after which the matrix is loaded again
+        self._expires_at = 0
+        # {(base, target): rate} as stored in the database
+        self._direct = {}
+        # ({code: position}, rows), swapped as a whole so lookups need no lock
+        self._state = None
+
+    def rate(self, from_currency, to_currency):
+        """
+        Returns the rate of from_currency -> to_currency, or None.
+        """
+        state = self._state
+        if state is None or self.timer() >= self._expires_at:
+            state = self.build()
+
+        return self._lookup(state, from_currency, to_currency)
+
+    def cached_rate(self, from_currency, to_currency):
+        """
+        Returns the rate of from_currency -> to_currency, or None, without
+        loading the matrix: None too while it is not loaded or expired.
+        """
+        state = self._state
+        if state is None or self.timer() >= self._expires_at:
+            return None
+
+        return self._lookup(state, from_currency, to_currency)
+
+    def build(self):
+        """
+        Load every stored rate and compute the whole matrix.
+        """
+        rates = CurrencyRate.objects.values_list(
+            "base_currency__code", "target_currency__code", "rate"
+        )
+
+        with self._lock:
+            self._direct = {(base, target): rate for base, target, rate in rates}
+            self._expires_at = self.timer() + self._ttl()
+            return self._rebuild()
+
+    def update(self, base, target, rate):
+        """
+        A stored rate was created or changed.
+        """
+        with self._lock:
+            if self._state is None:
+                return
+
+            self._direct[(base, target)] = rate
+
+            index, _ = self._state
+            if base not in index or target not in index:
+                self._rebuild()
+                return
+
+            self._recompute(self._affected_pairs(base, target))
+
+    def remove(self, base, target):
+        """
+        A stored rate was deleted.
+        """
+        with self._lock:
+            if self._state is None or self._direct.pop((base, target), None) is None:
+                return
+
+            self._recompute(self._affected_pairs(base, target))
+
+    def invalidate(self):
+        """
+        Drop the matrix, it is built again on the next lookup.
+        """
+        with self._lock:
+            self._state = None
+            self._direct = {}
+
+    def _lookup(self, state, from_currency, to_currency):
+        index, matrix = state
+        try:
+            return matrix[index[from_currency]][index[to_currency]]
+        except KeyError:
+            return None
+
+    def _pivot(self):
+        return self.pivot or settings.CURRENCY_PIVOT
+
+    def _ttl(self):
+        return settings.CURRENCY_RATE_CACHE_TTL if self.ttl is None else self.ttl
+
+    def _rebuild(self):
+        codes = sorted({code for pair in self._direct for code in pair})
+        index = {code: position for position, code in enumerate(codes)}
+
+        with localcontext(RATE_CONTEXT):
+            matrix = [
+                [self._derive(base, target) for target in codes] for base in codes
+            ]
+
+        self._state = (index, matrix)
+        return self._state
+
+    def _affected_pairs(self, base, target):
+        pairs = [(base, target), (target, base)]
+
+        # a leg of the pivot changed: every pair triangulated through it too
+        pivot = self._pivot()
+        if pivot in (base, target):
+            other = target if base == pivot else base
+            for code in self._state[0]:
+                pairs += [(other, code), (code, other)]
+
+        return pairs
+
+    def _recompute(self, pairs):
+        index, matrix = self._state
+
+        with localcontext(RATE_CONTEXT):
+            for base, target in pairs:
+                matrix[index[base]][index[target]] = self._derive(base, target)
+
+    def _derive(self, base, target):
+        if base == target:
+            return RATE_CONTEXT.create_decimal(1)
+
+        direct = self._leg(base, target)
+        if direct is not None:
+            return direct
+
+        pivot = self._pivot()
+        to_pivot = self._leg(base, pivot)
+        from_pivot = self._leg(pivot, target)
+        if to_pivot is None or from_pivot is None:
+            return None
+
+        return to_pivot * from_pivot
+
+    def _leg(self, base, target):
+        rate = self._direct.get((base, target))
+        if rate is not None:
+            return +rate
+
+        inverse = self._direct.get((target, base))
+        if inverse:
+            return 1 / inverse
+
+        return None
+
+
+rate_matrix = RateMatrix()
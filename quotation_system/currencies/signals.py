@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_all, invalidate_rate
+from .matrix import rate_matrix
+from .models import Currency, CurrencyRate
+
+
+@receiver(post_save, sender=CurrencyRate)
+@receiver(post_delete, sender=CurrencyRate)
+def invalidate_currency_rate(sender, instance, **kwargs):
+    invalidate_rate(instance.base_currency.code, instance.target_currency.code)
+
+
+@receiver(post_save, sender=CurrencyRate)
+def update_rate_matrix(sender, instance, **kwargs):
+    base, target = instance.base_currency.code, instance.target_currency.code
+    rate = instance.rate
+
+    # the matrix only holds committed rates
+    transaction.on_commit(lambda: rate_matrix.update(base, target, rate))
+
+
+@receiver(post_delete, sender=CurrencyRate)
+def remove_from_rate_matrix(sender, instance, **kwargs):
+    base, target = instance.base_currency.code, instance.target_currency.code
+
+    transaction.on_commit(lambda: rate_matrix.remove(base, target))
+
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+def invalidate_currency(sender, instance, **kwargs):
+    # a renamed or deleted currency changes the keys of its rates
+    invalidate_all()
+    transaction.on_commit(rate_matrix.invalidate)
@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+
+from ..cache import get_rate, preload, rate_cache
+from ..models import Currency, CurrencyRate
+
+
+@pytest.mark.integration
+class TestCurrencyRateCache(APITestCase):
+    """
+    Test the in-process exchange rate cache.
+    """
+
+    def setUp(self):
+        self.clp = Currency.objects.create(code="CLP", name="Chilean peso")
+        self.usd = Currency.objects.create(code="USD", name="US dollar")
+        self.rate = CurrencyRate.objects.create(
+            base_currency=self.clp, target_currency=self.usd, rate=1000
+        )
+        rate_cache.clear()
+
+    def test_rate_is_read_once(self):
+        """
+        Test that only the first lookup of a rate queries the database.
+        """
+        # act
+        with self.assertNumQueries(1):
+            first = get_rate("CLP", "USD")
+            second = get_rate("CLP", "USD")
+
+        # assert
+        self.assertEqual(first, second)
+        self.assertEqual(rate_cache.stats()["hits"], 1)
+
+    def test_saving_a_rate_invalidates_it(self):
+        """
+        Test that a changed rate is read again.
+        """
+        # arrange
+        get_rate("CLP", "USD")
+
+        # act
+        self.rate.rate = 900
+        self.rate.save()
+
+        # assert
+        self.assertEqual(get_rate("CLP", "USD"), 900)
+
+    def test_deleting_a_rate_invalidates_it(self):
+        """
+        Test that a deleted rate is not served from the cache.
+        """
+        # arrange
+        get_rate("CLP", "USD")
+
+        # act
+        self.rate.delete()
+
+        # assert
+        with self.assertRaises(CurrencyRate.DoesNotExist):
+            get_rate("CLP", "USD")
+
+    def test_missing_rate_is_read_once(self):
+        """
+        Test that a pair without a stored rate is looked up once, until a
+        rate is saved for it.
+        """
+        # act
+        with self.assertNumQueries(1):
+            for _ in range(5):
+                with self.assertRaises(CurrencyRate.DoesNotExist):
+                    get_rate("USD", "CLP")
+
+        CurrencyRate.objects.create(
+            base_currency=self.usd, target_currency=self.clp, rate="0.001"
+        )
+
+        # assert
+        self.assertEqual(get_rate("USD", "CLP"), Decimal("0.001"))
+
+    def test_preload(self):
+        """
+        Test that preload() caches every rate with one query.
+        """
+        # act
+        with self.assertNumQueries(1):
+            preload()
+
+        # assert
+        with self.assertNumQueries(0):
+            self.assertEqual(get_rate("CLP", "USD"), 1000)
+
+    def test_deposit_does_not_query_rates_in_steady_state(self):
+        """
+        Test that a cross currency deposit reads no rate once it is cached.
+        """
+        # arrange
+        user = User.objects.create_user(username="testuser", password="testpassword")
+        account = Account.objects.create(user=user, currency="USD")
+        self.client.force_authenticate(user=user)
+        url = reverse("transaction-list-create")
+        data = {
+            "transaction_type": "deposit",
+            "account": account.id,
+            "amount": 1000,
+            "currency": "CLP",
+        }
+        self.client.post(url, data, format="json")
+
+        # act
+        with self.assertNumQueries(8) as queries:
+            response = self.client.post(url, data, format="json")
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        for query in queries.captured_queries:
+            self.assertNotIn("currencies_currencyrate", query["sql"])
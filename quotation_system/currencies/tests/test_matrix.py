@@ -0,0 +1,163 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APITestCase
+
+from ..matrix import RateMatrix
+from ..models import Currency, CurrencyRate
+from ..utils import convert_amount
+
+
+@pytest.mark.integration
+class TestRateMatrix(APITestCase):
+    """
+    Test the cross rate matrix.
+    """
+
+    def setUp(self):
+        self.currencies = {
+            code: Currency.objects.create(code=code, name=code)
+            for code in ("CLP", "EUR", "USD")
+        }
+        # converted = amount / rate
+        self.clp_usd = self.create_rate("CLP", "USD", "1000")
+        self.create_rate("USD", "EUR", "1.25")
+
+        self.matrix = RateMatrix(pivot="USD")
+        self.matrix.build()
+
+    def create_rate(self, base, target, rate):
+        return CurrencyRate.objects.create(
+            base_currency=self.currencies[base],
+            target_currency=self.currencies[target],
+            rate=Decimal(rate),
+        )
+
+    def test_stored_rate(self):
+        """
+        Test that stored rates are used as they are.
+        """
+        self.assertEqual(self.matrix.rate("CLP", "USD"), Decimal("1000"))
+        self.assertEqual(self.matrix.rate("USD", "USD"), Decimal("1"))
+
+    def test_inverse_rate(self):
+        """
+        Test that a missing pair uses the inverse of the opposite rate.
+        """
+        self.assertEqual(self.matrix.rate("USD", "CLP"), Decimal("0.001"))
+        self.assertEqual(self.matrix.rate("EUR", "USD"), Decimal("0.8"))
+
+    def test_triangulated_rate(self):
+        """
+        Test that a pair without stored rates is derived through the pivot.
+        """
+        # CLP -> USD -> EUR
+        self.assertEqual(self.matrix.rate("CLP", "EUR"), Decimal("1250"))
+        # EUR -> USD -> CLP
+        self.assertEqual(self.matrix.rate("EUR", "CLP"), Decimal("0.0008"))
+
+    def test_unknown_currency(self):
+        """
+        Test that a pair of unknown currencies has no rate.
+        """
+        self.assertIsNone(self.matrix.rate("CLP", "JPY"))
+
+    def test_lookup_does_not_query(self):
+        """
+        Test that a built matrix answers from memory.
+        """
+        with self.assertNumQueries(0):
+            self.matrix.rate("CLP", "EUR")
+
+    def test_derived_conversions_do_not_query(self):
+        """
+        Test that conversions of inverse and triangulated pairs are answered
+        from memory once their missing stored rate is cached.
+        """
+        # arrange
+        convert_amount(Decimal("1"), "EUR", "CLP")
+
+        # act
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                result = convert_amount(Decimal("1"), "EUR", "CLP")
+
+        # assert
+        self.assertEqual(result, Decimal("1250"))
+
+    def test_matrix_expires(self):
+        """
+        Test that the matrix is loaded again once its ttl elapsed, rates
+        changed by other processes included.
+        """
+        # arrange
+        now = [0]
+        matrix = RateMatrix(pivot="USD", ttl=60, timer=lambda: now[0])
+        matrix.rate("CLP", "USD")
+        # a change made without the signals, like another process
+        CurrencyRate.objects.filter(pk=self.clp_usd.pk).update(rate=Decimal("800"))
+
+        # act
+        now[0] = 59
+        cached = matrix.rate("CLP", "USD")
+        now[0] = 60
+        reloaded = matrix.rate("CLP", "USD")
+
+        # assert
+        self.assertEqual(cached, Decimal("1000"))
+        self.assertEqual(reloaded, Decimal("800"))
+
+    def test_update_recomputes_derived_rates(self):
+        """
+        Test that a changed pivot leg updates the rates derived from it.
+        """
+        # act
+        self.matrix.update("CLP", "USD", Decimal("800"))
+
+        # assert
+        self.assertEqual(self.matrix.rate("CLP", "USD"), Decimal("800"))
+        self.assertEqual(self.matrix.rate("USD", "CLP"), Decimal("0.00125"))
+        self.assertEqual(self.matrix.rate("CLP", "EUR"), Decimal("1000"))
+        self.assertEqual(self.matrix.rate("EUR", "CLP"), Decimal("0.001"))
+
+    def test_update_matches_full_build(self):
+        """
+        Test that incremental updates give the same matrix as a full build.
+        """
+        # arrange
+        gbp = Currency.objects.create(code="GBP", name="GBP")
+        self.currencies["GBP"] = gbp
+
+        # act
+        self.matrix.update("GBP", "USD", Decimal("0.79"))
+        self.matrix.update("USD", "EUR", Decimal("1.1"))
+        self.matrix.remove("CLP", "USD")
+        self.matrix.update("USD", "CLP", Decimal("0.0011"))
+
+        expected = RateMatrix(pivot="USD")
+        expected._direct = dict(self.matrix._direct)
+        expected._rebuild()
+
+        # assert
+        self.assertEqual(self.matrix._state, expected._state)
+
+    def test_signals_keep_the_matrix_current(self):
+        """
+        Test that saving and deleting rates patches the shared matrix.
+        """
+        # arrange
+        self.assertEqual(convert_amount(Decimal("1250"), "CLP", "EUR"), 1)
+
+        # act
+        with self.captureOnCommitCallbacks(execute=True):
+            self.clp_usd.rate = Decimal("500")
+            self.clp_usd.save()
+
+        # assert
+        self.assertEqual(convert_amount(Decimal("625"), "CLP", "EUR"), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.clp_usd.delete()
+
+        with self.assertRaises(ValueError):
+            convert_amount(Decimal("1"), "CLP", "EUR")
@@ -1,11 +1,23 @@
+from decimal import Context, Decimal, localcontext
+
 import pytest
 
+from ..cache import rate_cache
 from ..models import CurrencyRate
 from ..utils import convert_amount
 
 
+@pytest.fixture
+def cold_matrix(mocker):
+    # the shared matrix may have been loaded by other tests
+    return mocker.patch(
+        "quotation_system.currencies.utils.rate_matrix.cached_rate",
+        return_value=None,
+    )
+
+
 @pytest.mark.unit
-def test_convert_amount_with_correct_input_data(mocker):
+def test_convert_amount_with_correct_input_data(mocker, cold_matrix):
     # arrange
 
     # define basic params
@@ -54,7 +66,7 @@ def test_convert_amount_same_currency():
 
 
 @pytest.mark.unit
-def test_convert_amount_no_currency_rate(mocker):
+def test_convert_amount_no_currency_rate(mocker, cold_matrix):
     # arrange
 
     # define basic params
@@ -62,12 +74,20 @@ def test_convert_amount_no_currency_rate(mocker):
     from_currency = "USD"
     to_currency = "CLP"
 
+    # missing rates are cached too
+    rate_cache.clear()
+
     # mock db call
     mock_get = mocker.patch(
         "quotation_system.currencies.utils.CurrencyRate.objects.get",
         side_effect=CurrencyRate.DoesNotExist,
     )
 
+    # mock the cross rate matrix, it has no rate for the pair either
+    mock_matrix_rate = mocker.patch(
+        "quotation_system.currencies.utils.rate_matrix.rate", return_value=None
+    )
+
     # act
     # with pytest.raises(CurrencyRate.DoesNotExist) as e:
     with pytest.raises(ValueError) as e:
@@ -82,3 +102,51 @@ def test_convert_amount_no_currency_rate(mocker):
     mock_get.assert_called_once_with(
         base_currency__code=from_currency, target_currency__code=to_currency
     )
+    mock_matrix_rate.assert_called_once_with(from_currency, to_currency)
+
+
+@pytest.mark.unit
+def test_convert_amount_with_cross_rate(mocker, cold_matrix):
+    # arrange
+    amount = 100
+    from_currency = "EUR"
+    to_currency = "CLP"
+
+    # no stored rate for the pair
+    rate_cache.clear()
+    mocker.patch(
+        "quotation_system.currencies.utils.CurrencyRate.objects.get",
+        side_effect=CurrencyRate.DoesNotExist,
+    )
+    mock_matrix_rate = mocker.patch(
+        "quotation_system.currencies.utils.rate_matrix.rate", return_value=0.001
+    )
+
+    # act
+    result = convert_amount(amount, from_currency, to_currency)
+
+    # assert
+    mock_matrix_rate.assert_called_once_with(from_currency, to_currency)
+    assert result == amount / 0.001
+
+
+@pytest.mark.unit
+def test_convert_amount_with_warm_matrix(mocker):
+    # arrange
+    mock_get = mocker.patch(
+        "quotation_system.currencies.utils.CurrencyRate.objects.get"
+    )
+    mocker.patch(
+        "quotation_system.currencies.utils.rate_matrix.cached_rate",
+        return_value=Decimal("3"),
+    )
+
+    # act
+    # a context of the caller with few digits
+    with localcontext(Context(prec=2)):
+        result = convert_amount(Decimal("10"), "EUR", "CLP")
+
+    # assert
+    mock_get.assert_not_called()
+    # divided with the 28 digits of RATE_CONTEXT
+    assert result == Decimal("3.333333333333333333333333333")
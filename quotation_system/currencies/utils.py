@@ -1,20 +1,33 @@
+from decimal import localcontext
+
+from quotation_system.metrics import measured, rate_lookup
+
+from .cache import get_rate
+from .matrix import RATE_CONTEXT, rate_matrix
 from .models import CurrencyRate
 
 
+@measured("convert", rate_lookup)
 def convert_amount(amount, from_currency, to_currency):
     """
     Utility method to conver amount from currenct from_currency to to_currency
     """
     if from_currency == to_currency:
         return amount
-    try:
 
-        # return rate
-        rate = CurrencyRate.objects.get(
-            base_currency__code=from_currency, target_currency__code=to_currency
-        ).rate
+    # a loaded matrix has every stored, inverse and triangulated rate
+    rate = rate_matrix.cached_rate(from_currency, to_currency)
+    if rate is None:
+        try:
+            # return rate (cached, see currencies/cache.py)
+            rate = get_rate(from_currency, to_currency)
 
-        return amount / rate
+        except CurrencyRate.DoesNotExist:
+            # no stored rate for the pair: inverse or triangulated rate
+            rate = rate_matrix.rate(from_currency, to_currency)
+            if rate is None:
+                raise ValueError("Exchange rate not available")
 
-    except CurrencyRate.DoesNotExist:
-        raise ValueError("Exchange rate not available")
+    # same precision and rounding whatever the caller's context
+    with localcontext(RATE_CONTEXT):
+        return amount / rate
@@ -0,0 +1,67 @@
+"""
+JSON renderer and parser of the API on orjson.
+
+The output is the one of DRF's JSONRenderer with the default settings
+(COMPACT_JSON, UNICODE_JSON): compact separators, UTF-8 text, aware UTC
+datetimes ending in "Z", \\u2028 / \\u2029 escaped. Decimals reach the renderer
+as strings made by the serializer DecimalFields (COERCE_DECIMAL_TO_STRING),
+other types orjson does not know (Decimal, lazy strings, timedelta, ...) are
+encoded by DRF's JSONEncoder.
+
+Pretty printing (?indent=, browsable API), the non default settings and
+payloads orjson rejects (integers over 64 bits) fall back to JSONRenderer.
+Floats are written by orjson (1e20 instead of 1e+20), the API has none.
+"""
+
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+# U+2028 and U+2029 in UTF-8, escaped like JSONRenderer does
+LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+default = encoders.JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for character, escaped in LINE_SEPARATORS:
+            if character in ret:
+                ret = ret.replace(character, escaped)
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = get_encoding(parser_context or {})
+
+        try:
+            body = stream.read()
+            # orjson reads UTF-8 bytes, other charsets are decoded first
+            if encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+                body = body.decode(encoding)
+            # like JSONParser with STRICT_JSON, NaN and Infinity are rejected
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
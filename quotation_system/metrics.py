@@ -0,0 +1,329 @@
+"""
+Prometheus metrics of the API, served as text at /metrics (prometheus_client).
+
+Metrics live in the memory of each process. With several gunicorn/uvicorn
+workers, set the PROMETHEUS_MULTIPROC_DIR environment variable to a
+directory shared by the workers, emptied before they start: every process
+then writes its values there and /metrics adds up the values of all the
+processes, so any worker answers for all of them. The process manager must
+call prometheus_client.multiprocess.mark_process_dead(pid) when a worker
+exits (gunicorn child_exit hook), so the gauges of stopped workers are
+dropped.
+
+The metrics:
+- http_request_duration_seconds{view, method}: latency of every request,
+  methods outside HTTP_METHODS are counted as "other"
+- transaction_requests_total{transaction_type, outcome}: transaction creations
+  by outcome (created, rejected, error)
+- insufficient_balance_total{transaction_type}: rejected debits
+- account_lock_wait_seconds: time waiting for account row locks
+- account_lock_contention_total: lock waits over METRICS_HOT_ACCOUNT_SECONDS
+  (hot accounts), not labelled by account so the number of series stays
+  bounded
+- currency_rate_lookup_seconds: time of convert_amount()
+- transaction_retries_total{reason, result}: deadlock / serialization
+  failure retries (transactions/retry.py)
+- currency_rate_cache_total{result}: hits, misses and evictions of the
+  rate cache (currencies/cache.py)
+- db_connections_opened_total{database}: new database connections, with
+  CONN_MAX_AGE = 0 and no pool one per request
+- db_pool_checkouts_total{database}, db_pool_wait_seconds_total{database},
+  db_pool_checkout_errors_total{database}: connection pool checkouts, time
+  spent waiting for a free connection and checkouts that timed out (DB_POOL)
+- db_pool_connections{database, state}: open / idle connections of the pool
+  and requests waiting for one
+
+The retry, rate cache and pool counters are kept by their own modules, each
+process copies their increase into the metrics after every request.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from rest_framework import serializers
+
+from quotation_system.timing import timed
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LOCK_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+LOOKUP_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05)
+
+# request methods labelled as they are, any other one is "other"
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+request_latency = Histogram(
+    "http_request_duration_seconds",
+    "Latency of the requests by view.",
+    ["view", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+transaction_outcomes = Counter(
+    "transaction_requests",
+    "Transaction creations by type and outcome (created, rejected, error).",
+    ["transaction_type", "outcome"],
+)
+insufficient_balance = Counter(
+    "insufficient_balance",
+    "Debits rejected because the balance did not cover them.",
+    ["transaction_type"],
+)
+lock_wait = Histogram(
+    "account_lock_wait_seconds",
+    "Time spent waiting for account row locks (select_for_update).",
+    buckets=LOCK_BUCKETS,
+)
+hot_accounts = Counter(
+    "account_lock_contention",
+    "Account row lock waits longer than METRICS_HOT_ACCOUNT_SECONDS.",
+)
+rate_lookup = Histogram(
+    "currency_rate_lookup_seconds",
+    "Time of the currency conversions (rate lookup included).",
+    buckets=LOOKUP_BUCKETS,
+)
+retries = Counter(
+    "transaction_retries",
+    "Database transactions run again (retries) or given up (exhausted).",
+    ["reason", "result"],
+)
+rate_cache_requests = Counter(
+    "currency_rate_cache",
+    "Currency rate cache hits, misses and evictions.",
+    ["result"],
+)
+connections_opened = Counter(
+    "db_connections_opened",
+    "Database connections opened.",
+    ["database"],
+)
+pool_checkouts = Counter(
+    "db_pool_checkouts",
+    "Connections taken from the connection pool.",
+    ["database"],
+)
+pool_wait = Counter(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a free connection of the pool.",
+    ["database"],
+)
+pool_errors = Counter(
+    "db_pool_checkout_errors",
+    "Pool checkouts that failed, e.g. timed out (DB_POOL_TIMEOUT).",
+    ["database"],
+)
+pool_connections = Gauge(
+    "db_pool_connections",
+    "Connections of the pool by state (open, idle) and requests waiting.",
+    ["database", "state"],
+    # summed over the running processes only
+    multiprocess_mode="livesum",
+)
+
+
+def count_connection(sender, connection, **kwargs):
+    connections_opened.labels(database=connection.alias).inc()
+
+
+connection_created.connect(count_connection)
+
+
+def opened_connections():
+    """
+    Database connections opened by this process.
+    """
+    return sum(
+        sample.value
+        for metric in connections_opened.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_total")
+    )
+
+
+def pool_stats():
+    """
+    {database alias: psycopg_pool statistics} of the databases using a
+    connection pool (DB_POOL).
+    """
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        if connection.settings_dict.get("OPTIONS", {}).get("pool"):
+            stats[alias] = connection.pool.get_stats()
+    return stats
+
+
+class StatsCopier:
+    """
+    Adds the increase of the counters kept by other modules (retries, rate
+    cache, connection pools) since the previous copy to the metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {(counter, label values): value at the previous copy}
+        self._seen = {}
+
+    def copy(self):
+        from quotation_system.currencies.cache import rate_cache
+        from quotation_system.transactions.retry import retry_stats
+
+        cache = rate_cache.stats()
+        pools = pool_stats()
+        values = {
+            **{
+                (retries, (reason, name)): value
+                for (name, reason), value in retry_stats.snapshot().items()
+            },
+            (rate_cache_requests, ("hit",)): cache["hits"],
+            (rate_cache_requests, ("miss",)): cache["misses"],
+            (rate_cache_requests, ("eviction",)): cache["evictions"],
+        }
+        for alias, stats in pools.items():
+            # counters missing from the statistics are still 0
+            values[(pool_checkouts, (alias,))] = stats.get("requests_num", 0)
+            values[(pool_wait, (alias,))] = stats.get("requests_wait_ms", 0) / 1000
+            values[(pool_errors, (alias,))] = stats.get("requests_errors", 0)
+            for state, key in (
+                ("open", "pool_size"),
+                ("idle", "pool_available"),
+                ("waiting", "requests_waiting"),
+            ):
+                pool_connections.labels(alias, state).set(stats.get(key, 0))
+
+        with self._lock:
+            for key, value in values.items():
+                counter, labels = key
+                # a counter reset by its module starts again from 0
+                increase = value - min(self._seen.get(key, 0), value)
+                self._seen[key] = value
+                if increase:
+                    counter.labels(*labels).inc(increase)
+
+
+stats_copier = StatsCopier()
+
+
+@contextmanager
+def measured(phase, histogram):
+    """
+    timed(phase) that is also observed in histogram.
+    Usable as a decorator too.
+    """
+    started = time.perf_counter()
+    try:
+        with timed(phase):
+            yield
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+
+@contextmanager
+def waiting_for_lock():
+    """
+    Around a select_for_update() of accounts: the "lock" phase of the
+    request, the lock wait histogram and the contention of hot accounts.
+    """
+    started = time.perf_counter()
+    with timed("lock"):
+        yield
+
+    seconds = time.perf_counter() - started
+    lock_wait.observe(seconds)
+    if seconds >= settings.METRICS_HOT_ACCOUNT_SECONDS:
+        hot_accounts.inc()
+
+
+@contextmanager
+def transaction_outcome(transaction_type):
+    """
+    Count the outcome of the creation of a transaction.
+    """
+    try:
+        yield
+    except serializers.ValidationError:
+        transaction_outcomes.labels(transaction_type, "rejected").inc()
+        raise
+    except Exception:
+        transaction_outcomes.labels(transaction_type, "error").inc()
+        raise
+
+    transaction_outcomes.labels(transaction_type, "created").inc()
+
+
+class MetricsMiddleware:
+    """
+    Observe the latency of every request by view, and copy the counters
+    kept by other modules into the metrics.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            self.observe(request, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            self.observe(request, started)
+
+    def observe(self, request, started):
+        match = request.resolver_match
+        method = request.method if request.method in HTTP_METHODS else "other"
+        request_latency.labels(
+            match.view_name if match else "unmatched", method
+        ).observe(time.perf_counter() - started)
+        stats_copier.copy()
+
+
+def metrics_view(request):
+    """
+    GET /metrics, Prometheus text format. Scrapers send METRICS_TOKEN as
+    "Authorization: Bearer <token>", without METRICS_TOKEN it is closed.
+    """
+    token = settings.METRICS_TOKEN
+    if not token or not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # the values written by every process
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,72 @@
+from django.db.migrations.operations import AddIndex
+
+from quotation_system.transactions import partitioning
+
+
+class AddIndexConcurrently(AddIndex):
+    """
+    AddIndex built with CREATE INDEX CONCURRENTLY on PostgreSQL, so large
+    tables keep accepting writes while the index is built.
+    Other databases get a regular CREATE INDEX.
+    Migrations using it must set atomic = False.
+
+    PostgreSQL refuses CONCURRENTLY on a partitioned table (see
+    transactions/partitioning.py): the index is then created on the parent
+    only, built concurrently on each partition and attached to it.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        if partitioning.is_partitioned(schema_editor.connection, model._meta.db_table):
+            self.add_partitioned_index(schema_editor, model)
+        else:
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            # dropping the index of a partitioned table drops those of its
+            # partitions, it cannot be done concurrently
+            concurrently = not partitioning.is_partitioned(
+                schema_editor.connection, model._meta.db_table
+            )
+            schema_editor.remove_index(model, self.index, concurrently=concurrently)
+
+    def add_partitioned_index(self, schema_editor, model):
+        """
+        The index of the parent stays invalid until the index of every
+        partition is attached to it.
+        """
+        table = model._meta.db_table
+        parent = self.index.create_sql(model, schema_editor)
+        parent.template = parent.template.replace(" ON ", " ON ONLY ", 1)
+        schema_editor.execute(parent)
+
+        for partition, _ in partitioning.list_partitions(
+            schema_editor.connection, table
+        ):
+            name = f"{self.index.name}_{partition.removeprefix(f'{table}_')}"
+            statement = self.index.create_sql(model, schema_editor, concurrently=True)
+            statement.rename_table_references(table, partition)
+            statement.parts["name"] = schema_editor.quote_name(name)
+            schema_editor.execute(statement)
+            schema_editor.execute(
+                f"ALTER INDEX {schema_editor.quote_name(self.index.name)} "
+                f"ATTACH PARTITION {schema_editor.quote_name(name)}"
+            )
+
+    def describe(self):
+        return f"Concurrently {super().describe().lower()}"
@@ -0,0 +1,213 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Cursor pagination on a unique ordering (keyset / seek method).
+
+    The cursor holds the ordering values of the last (or first) row of a page
+    and the next page is read with WHERE (ordering) > (cursor) ... LIMIT n, so
+    there is no OFFSET scan and no COUNT(*): page N costs the same as page 1.
+    The last ordering field must be unique (usually the primary key).
+
+    Response: {"next": url, "previous": url, "results": [...]}
+    """
+
+    ordering = ("-created_at", "-id")
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views, the page is read with the async ORM.
+        """
+        queryset = self.page_queryset(queryset, request)
+
+        return self.set_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request):
+        """
+        The (unevaluated) query of the requested page.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+
+        position, self.reverse = self.decode_cursor(request)
+        self.has_cursor = position is not None
+
+        # previous pages are read in the opposite order and flipped afterwards
+        self.position = position
+        self.page_ordering = self.get_ordering(self.reverse)
+        queryset = queryset.order_by(*self.page_ordering)
+
+        if position is not None:
+            queryset = queryset.filter(
+                self.after_position(self.page_ordering, position)
+            )
+
+        # one extra row tells if there is a page after this one
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next = self.has_cursor
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.has_cursor
+
+        self.rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+
+        return self.page_size
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return self.ordering
+
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        )
+
+    def after_position(self, ordering, position):
+        """
+        Rows placed after position in ordering:
+        (a > x) OR (a = x AND b > y) OR ...
+        The first field also gets a non-strict bound (a >= x) so the database
+        can start the index scan at the cursor instead of filtering rows.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+
+        first = ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+
+        return Q(**{f"{first.lstrip('-')}__{bound}": position[0]}) & condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        return self.encode_cursor(self.rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        return self.encode_cursor(self.rows[0], reverse=True)
+
+    def row_position(self, row):
+        """
+        Ordering values of a row, rows can be model instances or dicts.
+        """
+        names = [field.lstrip("-") for field in self.ordering]
+
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+
+        return [getattr(row, name) for name in names]
+
+    def encode_cursor(self, row, reverse):
+        position = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in self.row_position(row)
+        ]
+        payload = json.dumps({"p": position, "r": int(reverse)}, separators=(",", ":"))
+        cursor = urlsafe_b64encode(payload.encode()).decode()
+
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """
+        Returns (position, reverse) of the cursor in the request, or (None, False).
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()))
+            raw_position = payload["p"]
+            reverse = bool(payload["r"])
+
+            if len(raw_position) != len(self.ordering):
+                raise ValueError
+
+            # back to python values with the model fields (e.g. datetimes)
+            position = [
+                self.model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, raw_position)
+            ]
+        except (
+            binascii.Error,
+            KeyError,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
@@ -0,0 +1,152 @@
+"""
+Read replica routing with read-your-writes.
+
+Views with ReplicaReadMixin read from settings.REPLICA_DATABASE while they
+answer a safe-method (GET, HEAD, OPTIONS) request, everything else uses the
+primary:
+- writes and select_for_update() querysets are routed with db_for_write(),
+  always the primary, even inside a replica read
+- after an unsafe-method request a user is pinned to the primary for
+  REPLICA_PIN_SECONDS (more than the replica lag), so the transaction they
+  just created is in their next list. Pins are kept in the REPLICA_PIN_CACHE
+  cache, it must be shared by the processes (e.g. redis) when there are
+  several.
+
+Without REPLICA_DATABASE every read goes to the primary.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+# database the reads of the current request are routed to, None is the primary
+read_database = ContextVar("read_database", default=None)
+
+
+def pin_key(user):
+    return f"replica-pin:{user.pk}"
+
+
+def pin_to_primary(user):
+    """
+    Send the reads of user to the primary for REPLICA_PIN_SECONDS.
+    """
+    caches[settings.REPLICA_PIN_CACHE].set(
+        pin_key(user), True, settings.REPLICA_PIN_SECONDS
+    )
+
+
+def is_pinned(user):
+    return caches[settings.REPLICA_PIN_CACHE].get(pin_key(user), False)
+
+
+def database_for(request):
+    """
+    Alias the reads of request may use: the replica for safe methods of users
+    not pinned to the primary, else the primary.
+    """
+    if (
+        settings.REPLICA_DATABASE is None
+        or request.method not in SAFE_METHODS
+        or (request.user.is_authenticated and is_pinned(request.user))
+    ):
+        return DEFAULT_DB_ALIAS
+
+    return settings.REPLICA_DATABASE
+
+
+@contextmanager
+def reading_from(database):
+    """
+    Route the reads of the block to database.
+    """
+    token = read_database.set(database)
+    try:
+        yield
+    finally:
+        read_database.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Reads go to the database of the current request, writes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    APIView reading from the replica on safe-method requests, once the user
+    is authenticated.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.read_token = read_database.set(database_for(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # also reached when initial() raised (e.g. not authenticated)
+        token = getattr(self, "read_token", None)
+        if token is not None:
+            read_database.reset(token)
+            self.read_token = None
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaPinMiddleware:
+    """
+    Pin the user of every unsafe-method request to the primary, before the
+    response reaches the client.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+        if self.writes(request):
+            pin_to_primary(request.user)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.writes(request):
+            await caches[settings.REPLICA_PIN_CACHE].aset(
+                pin_key(request.user), True, settings.REPLICA_PIN_SECONDS
+            )
+        return response
+
+    def writes(self, request):
+        # the API sets request.user once it authenticated the token
+        user = getattr(request, "user", None)
+        return (
+            request.method not in SAFE_METHODS
+            and user is not None
+            and user.is_authenticated
+        )
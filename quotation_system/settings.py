@@ -89,9 +89,65 @@ DATABASES = {
         "PASSWORD": os.environ.get("DB_PASSWORD", ""),
         "HOST": os.environ.get("DB_HOST", ""),
         "PORT": os.environ.get("DB_PORT", ""),
+        # seconds a connection is kept open for the next requests of its
+        # thread, 0 closes it after every request
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        # check a kept connection is still usable before a request reuses it
+        "CONN_HEALTH_CHECKS": os.environ.get("DB_CONN_HEALTH_CHECKS", "True").lower()
+        == "true",
     }
 }
 
+# psycopg 3 connection pool (PostgreSQL only, needs psycopg[pool]): the
+# connections are shared by all the threads of a process instead of kept per
+# thread. Checkouts and waits are exposed at /metrics.
+DB_POOL = os.environ.get("DB_POOL", "False").lower() == "true"
+if DB_POOL and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    pool = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        # seconds a request waits for a free connection before failing
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        # seconds before idle connections over min_size are closed
+        "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+        # seconds before a connection is replaced
+        "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", 3600)),
+    }
+    if os.environ.get("DB_POOL_HEALTH_CHECKS", "True").lower() == "true":
+        from psycopg_pool import ConnectionPool
+
+        # a cheap query on every checkout, broken connections are replaced
+        pool["check"] = ConnectionPool.check_connection
+
+    DATABASES["default"]["OPTIONS"] = {"pool": pool}
+    # the pool keeps the connections, Django must not
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = False
+
+# read replica (optional): safe-method reads of the account and transaction
+# lists and of the transaction detail go to it, see replicas.py
+REPLICA_DATABASE = None
+if os.environ.get("DB_REPLICA_NAME"):
+    REPLICA_DATABASE = "replica"
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES["default"],
+        "NAME": os.environ["DB_REPLICA_NAME"],
+        "USER": os.environ.get("DB_REPLICA_USER", DATABASES["default"]["USER"]),
+        "PASSWORD": os.environ.get(
+            "DB_REPLICA_PASSWORD", DATABASES["default"]["PASSWORD"]
+        ),
+        "HOST": os.environ.get("DB_REPLICA_HOST", DATABASES["default"]["HOST"]),
+        "PORT": os.environ.get("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        # tests read the primary test database through it
+        "TEST": {"MIRROR": "default"},
+    }
+    MIDDLEWARE = [*MIDDLEWARE, "quotation_system.replicas.ReplicaPinMiddleware"]
+DATABASE_ROUTERS = ["quotation_system.replicas.ReplicaRouter"]
+# seconds a user reads from the primary after a write, more than the replica lag
+REPLICA_PIN_SECONDS = float(os.environ.get("REPLICA_PIN_SECONDS", 5))
+# cache of the pins, shared by the processes (e.g. redis) when there are several
+REPLICA_PIN_CACHE = os.environ.get("REPLICA_PIN_CACHE", "default")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -136,11 +192,132 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "quotation_system.users.authentication.ClaimsJWTAuthentication",
+    ),
+    # orjson, same output as rest_framework.renderers.JSONRenderer
+    "DEFAULT_RENDERER_CLASSES": (
+        "quotation_system.fastjson.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "quotation_system.fastjson.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ),
+    "DEFAULT_PAGINATION_CLASS": "quotation_system.pagination.KeysetCursorPagination",
+    "PAGE_SIZE": int(os.environ.get("API_PAGE_SIZE", 50)),
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
+# seconds the JWT authentication keeps the User rows it reads, 0 builds the
+# request user from the token claims instead (users/authentication.py)
+JWT_USER_CACHE_TTL = int(os.environ.get("JWT_USER_CACHE_TTL", 0))
+JWT_USER_CACHE_SIZE = int(os.environ.get("JWT_USER_CACHE_SIZE", 10000))
+
+# Transactions
+# seconds clients may use GET /api/transactions/<id>/ before revalidating it
+# with its ETag (see conditional.py)
+TRANSACTIONS_DETAIL_MAX_AGE = int(os.environ.get("TRANSACTIONS_DETAIL_MAX_AGE", 300))
+# max number of items accepted by POST /api/transactions/batch/
+TRANSACTIONS_BATCH_MAX_SIZE = int(os.environ.get("TRANSACTIONS_BATCH_MAX_SIZE", 1000))
+
+# how perform_create updates balances:
+# "locked": select_for_update() the account, update it in python and save it
+# "conditional": deposits and withdrawals use a single UPDATE ... RETURNING
+#   (transfers always use the locked path)
+# "ledger": balances come from the postings only, the accounts are locked but
+#   no account or rollup row is updated (see transactions/ledger.py)
+TRANSACTIONS_BALANCE_UPDATE_MODE = os.environ.get(
+    "TRANSACTIONS_BALANCE_UPDATE_MODE", "locked"
+)
+# seconds `manage.py checkpoint_balances` leaves the newest postings out of
+# the checkpoints, more than the longest database transaction (it also folds
+# the rollup deltas of the ledger mode into the daily rollups)
+LEDGER_CHECKPOINT_DELAY = float(os.environ.get("LEDGER_CHECKPOINT_DELAY", 60))
+
+# deadlock / serialization failure retries of balance updates
+TRANSACTIONS_RETRY_MAX_ATTEMPTS = int(
+    os.environ.get("TRANSACTIONS_RETRY_MAX_ATTEMPTS", 3)
+)
+# seconds, the backoff doubles on each attempt up to the max delay
+TRANSACTIONS_RETRY_BASE_DELAY = float(
+    os.environ.get("TRANSACTIONS_RETRY_BASE_DELAY", 0.01)
+)
+TRANSACTIONS_RETRY_MAX_DELAY = float(
+    os.environ.get("TRANSACTIONS_RETRY_MAX_DELAY", 0.2)
+)
+
+# rows fetched per round trip by GET /api/transactions/export/
+TRANSACTIONS_EXPORT_CHUNK_SIZE = int(
+    os.environ.get("TRANSACTIONS_EXPORT_CHUNK_SIZE", 2000)
+)
+
+# cold storage of old transactions, see transactions/archive.py and
+# `manage.py archive_transactions`
+TRANSACTIONS_ARCHIVE_DIR = os.environ.get(
+    "TRANSACTIONS_ARCHIVE_DIR", BASE_DIR / "archive"
+)
+# default age (days) of the transactions moved to the archive
+TRANSACTIONS_ARCHIVE_AFTER_DAYS = int(
+    os.environ.get("TRANSACTIONS_ARCHIVE_AFTER_DAYS", 90)
+)
+# transactions per compressed block, the unit read back from the archive
+TRANSACTIONS_ARCHIVE_BLOCK_SIZE = int(
+    os.environ.get("TRANSACTIONS_ARCHIVE_BLOCK_SIZE", 1000)
+)
+
+# monthly partitions of the transactions table (PostgreSQL, optional), see
+# transactions/partitioning.py and `manage.py transaction_partitions`
+# months after the current one that must already have a partition
+TRANSACTIONS_PARTITION_AHEAD_MONTHS = int(
+    os.environ.get("TRANSACTIONS_PARTITION_AHEAD_MONTHS", 3)
+)
+# partitions older than this many months are detached, unset keeps them all
+TRANSACTIONS_PARTITION_RETAIN_MONTHS = (
+    int(os.environ["TRANSACTIONS_PARTITION_RETAIN_MONTHS"])
+    if os.environ.get("TRANSACTIONS_PARTITION_RETAIN_MONTHS")
+    else None
+)
+
+# how long the response of a request sent with an Idempotency-Key is kept
+IDEMPOTENCY_KEY_TTL = timedelta(
+    hours=int(os.environ.get("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+)
+
+# Accounts
+# account numbers reserved per query on PostgreSQL (see accounts/allocators.py)
+ACCOUNT_NUMBER_BLOCK_SIZE = int(os.environ.get("ACCOUNT_NUMBER_BLOCK_SIZE", 1))
+
+# Currencies
+# in-process cache of exchange rates used by convert_amount (currencies/cache.py)
+CURRENCY_RATE_CACHE_SIZE = int(os.environ.get("CURRENCY_RATE_CACHE_SIZE", 1024))
+# seconds, bounds how long other processes keep a changed rate (cached rates
+# and the cross rate matrix)
+CURRENCY_RATE_CACHE_TTL = float(os.environ.get("CURRENCY_RATE_CACHE_TTL", 300))
+# load every rate when the wsgi/asgi application starts
+CURRENCY_RATE_CACHE_PRELOAD = (
+    os.environ.get("CURRENCY_RATE_CACHE_PRELOAD", "False").lower() == "true"
+)
+# currency used to triangulate pairs without a stored rate (currencies/matrix.py)
+CURRENCY_PIVOT = os.environ.get("CURRENCY_PIVOT", "USD")
+
+# Instrumentation
+# prometheus metrics at /metrics, see metrics.py; with several worker
+# processes set the PROMETHEUS_MULTIPROC_DIR environment variable (read by
+# prometheus_client itself) to a directory they share
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True").lower() == "true"
+# account lock waits at least this long (seconds) are counted as contention
+METRICS_HOT_ACCOUNT_SECONDS = float(os.environ.get("METRICS_HOT_ACCOUNT_SECONDS", 0.05))
+# bearer token required to read /metrics, unset keeps it closed
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+if METRICS_ENABLED:
+    MIDDLEWARE = ["quotation_system.metrics.MetricsMiddleware", *MIDDLEWARE]
+
+# time the phases of every request (auth, validate, lock, convert, render, db)
+# and send them in a Server-Timing header and a log line, see timing.py
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "False").lower() == "true"
+if SERVER_TIMING:
+    MIDDLEWARE = ["quotation_system.timing.ServerTimingMiddleware", *MIDDLEWARE]
@@ -53,7 +53,7 @@ def test_auth_flow(live_server):
     # 3. See account created
     accounts_response = requests.get(account_url, headers=headers)
 
-    accounts = accounts_response.json()
+    accounts = accounts_response.json()["results"]
     assert len(accounts) == 1
     assert accounts[0]["id"] == account["id"]
 
@@ -77,7 +77,7 @@ def test_auth_flow(live_server):
 
     # 4. get account to check if balance was updated
     accounts_response = requests.get(account_url, headers=headers)
-    account = accounts_response.json()[0]
+    account = accounts_response.json()["results"][0]
 
     # assert balance was updated
     assert account["balance"] == f"{trx_amount}.00"
@@ -0,0 +1,62 @@
+import pytest
+
+from quotation_system.caching import MISSING, TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+def test_get_counts_hits_and_misses():
+    # arrange
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+
+    # act
+    values = [cache.get("a"), cache.get("b")]
+
+    # assert
+    assert values == [1, MISSING]
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+@pytest.mark.unit
+def test_entries_expire_after_ttl():
+    # arrange
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=60, timer=timer)
+    cache.set("a", 1)
+
+    # act
+    timer.now = 59
+    before = cache.get("a")
+    timer.now = 60
+    after = cache.get("a")
+
+    # assert
+    assert before == 1
+    assert after is MISSING
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.unit
+def test_least_recently_used_entry_is_evicted():
+    # arrange
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    # act
+    cache.set("c", 3)
+
+    # assert
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
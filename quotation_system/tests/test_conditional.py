@@ -0,0 +1,154 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.currencies.models import Currency, CurrencyRate
+from quotation_system.users.tokens import AccessToken
+
+
+@pytest.mark.integration
+class TestConditionalGet(APITestCase):
+    """
+    Test the ETags and conditional GETs of the account and transaction reads.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(user=self.user, currency="USD")
+        CurrencyRate.objects.create(
+            base_currency=Currency.objects.create(code="CLP", name="Chilean peso"),
+            target_currency=Currency.objects.create(code="USD", name="US dollar"),
+            rate=1000,
+        )
+
+        self.headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.client.credentials(HTTP_AUTHORIZATION=self.headers["authorization"])
+
+    def deposit(self):
+        response = self.client.post(
+            reverse("transaction-list-create"),
+            {
+                "transaction_type": "deposit",
+                "account": self.account.id,
+                "amount": 1000,
+                "currency": "CLP",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["id"]
+
+    def test_account_list(self):
+        """
+        Test that an unchanged account list answers 304 with the ETag query
+        only, and a balance change gives a new ETag.
+        """
+        # arrange
+        url = reverse("account-list")
+        first = self.client.get(url)
+
+        # act
+        with self.assertNumQueries(1):
+            unchanged = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.deposit()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        # assert
+        self.assertEqual(first["Cache-Control"], "private, no-cache")
+        self.assertIn("Authorization", first["Vary"])
+        self.assertEqual(unchanged.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(unchanged.content, b"")
+        self.assertEqual(unchanged["ETag"], first["ETag"])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+    def test_transaction_list(self):
+        """
+        Test that the transaction list ETag changes with new transactions and
+        with the query string.
+        """
+        # arrange
+        url = reverse("transaction-list-create")
+        self.deposit()
+        first = self.client.get(url)
+
+        # act
+        unchanged = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        sparse = self.client.get(
+            url, {"fields": "id"}, HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.deposit()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        # assert
+        self.assertEqual(unchanged.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(sparse.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(changed.data["results"]), 2)
+
+    def test_transaction_detail(self):
+        """
+        Test that transactions are revalidated with one query, the lookup of
+        the row.
+        """
+        # arrange
+        url = reverse("transaction-detail", kwargs={"pk": self.deposit()})
+        first = self.client.get(url)
+
+        # act
+        with self.assertNumQueries(1):
+            unchanged = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        # assert
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first["Cache-Control"], "private, max-age=300")
+        self.assertEqual(unchanged.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_transaction_detail_of_others(self):
+        """
+        Test that a matching ETag is no 304 for a transaction of another user
+        or one that does not exist.
+        """
+        # arrange
+        pk = self.deposit()
+        url = reverse("transaction-detail", kwargs={"pk": pk})
+        etag = self.client.get(url)["ETag"]
+        other = User.objects.create_user(username="other", password="password")
+        missing = reverse("transaction-detail", kwargs={"pk": pk + 1})
+
+        # act
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(other)}"
+        )
+        foreign = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.client.credentials(HTTP_AUTHORIZATION=self.headers["authorization"])
+        absent = self.client.get(missing, HTTP_IF_NONE_MATCH="*")
+
+        # assert
+        self.assertEqual(foreign.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(absent.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_views(self):
+        """
+        Test that the async reads answer 304 too.
+        """
+        for url in (
+            reverse("async-account-list"),
+            reverse("async-transaction-list-create"),
+        ):
+            # arrange
+            first = await self.async_client.get(url, headers=self.headers)
+
+            # act
+            unchanged = await self.async_client.get(
+                url, headers={**self.headers, "if-none-match": first["ETag"]}
+            )
+
+            # assert
+            self.assertEqual(first.status_code, status.HTTP_200_OK)
+            self.assertEqual(unchanged.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test import TransactionTestCase
+
+# a process started with DB_POOL, its threads querying at the same time
+POOLED_PROCESS = """
+import json
+import threading
+
+import django
+
+django.setup()
+
+from django.db import connection
+
+from quotation_system.metrics import pool_stats
+
+backends = set()
+
+
+def query():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid() FROM pg_sleep(0.05)")
+        backends.add(cursor.fetchone()[0])
+    # back to the pool
+    connection.close()
+
+
+threads = [threading.Thread(target=query) for _ in range(8)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+
+print(json.dumps({"backends": len(backends), **pool_stats()["default"]}))
+"""
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="DB_POOL needs PostgreSQL"
+)
+class TestConnectionPool(TransactionTestCase):
+    """
+    Test the psycopg 3 connection pool enabled with DB_POOL, in a process of
+    its own since the pool is configured when the settings are loaded.
+    """
+
+    def test_threads_share_the_pool(self):
+        """
+        Test that the threads of a process share at most DB_POOL_MAX_SIZE
+        connections and that the checkouts reach pool_stats().
+        """
+        # arrange
+        database = connection.settings_dict
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "quotation_system.settings",
+            "DB_ENGINE": "django.db.backends.postgresql",
+            "DB_NAME": database["NAME"],
+            "DB_USER": database["USER"],
+            "DB_PASSWORD": database["PASSWORD"],
+            "DB_HOST": database["HOST"],
+            "DB_PORT": str(database["PORT"]),
+            "DB_POOL": "True",
+            "DB_POOL_MIN_SIZE": "1",
+            "DB_POOL_MAX_SIZE": "2",
+        }
+
+        # act
+        stats = json.loads(
+            subprocess.run(
+                [sys.executable, "-c", POOLED_PROCESS],
+                env=env,
+                cwd=settings.BASE_DIR,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        )
+
+        # assert
+        self.assertEqual(stats["pool_max"], 2)
+        self.assertLessEqual(stats["backends"], 2)
+        self.assertGreaterEqual(stats["requests_num"], 8)
@@ -0,0 +1,92 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from quotation_system.fastjson import ORJSONParser, ORJSONRenderer
+
+PAYLOAD = {
+    "results": [
+        ReturnDict(
+            {
+                "id": 1,
+                "amount": "10.50",
+                "created_at": datetime(2026, 1, 2, 3, 4, 5, 678901, timezone.utc),
+                "related_account": None,
+                "description": 'café \u2028 \u2029 "quoted"',
+            },
+            serializer=None,
+        )
+    ],
+    "naive": datetime(2026, 1, 2, 3, 4, 5),
+    "offset": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=-3))),
+    "day": date(2026, 1, 2),
+    "time": time(3, 4, 5, 6),
+    "decimal": Decimal("10.50"),
+    "duration": timedelta(minutes=5),
+    "uuid": uuid.UUID(int=1),
+    "lazy": gettext_lazy("User not found"),
+    "error": [ErrorDetail("Required", code="required")],
+    "keys": {1: True, 2: False},
+    "tuple": (1, "a"),
+    "big": 2**70,
+}
+
+
+@pytest.mark.unit
+def test_renders_like_json_renderer():
+    # act
+    rendered = ORJSONRenderer().render(PAYLOAD, "application/json")
+
+    # assert
+    assert rendered == JSONRenderer().render(PAYLOAD, "application/json")
+
+
+@pytest.mark.unit
+def test_indent_falls_back_to_json_renderer():
+    # act
+    rendered = ORJSONRenderer().render({"a": [1]}, "application/json; indent=2")
+
+    # assert
+    assert rendered == b'{\n  "a": [\n    1\n  ]\n}'
+
+
+@pytest.mark.unit
+def test_parser():
+    # act
+    data = ORJSONParser().parse(
+        io.BytesIO('{"amount": "1.5", "description": "café"}'.encode("latin-1")),
+        parser_context={"encoding": "latin-1"},
+    )
+
+    # assert
+    assert data == {"amount": "1.5", "description": "café"}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("body", [b"{", b'{"amount": NaN}', b"\xff"])
+def test_parser_errors(body):
+    # act / assert
+    with pytest.raises(ParseError, match="JSON parse error"):
+        ORJSONParser().parse(io.BytesIO(body), parser_context={})
+
+
+@pytest.mark.unit
+def test_benchmark_renderers():
+    # arrange
+    stdout = io.StringIO()
+
+    # act
+    call_command("benchmark_renderers", sizes=[10], repeat=1, stdout=stdout)
+
+    # assert
+    row = stdout.getvalue().splitlines()[1].split()
+    assert row[0] == "10"
+    assert row[-1] == "yes"
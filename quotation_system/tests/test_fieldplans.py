@@ -0,0 +1,140 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.accounts.serializers import AccountSerializer
+from quotation_system.transactions.models import Transaction
+from quotation_system.transactions.serializers import TransactionSerializer
+from quotation_system.users.tokens import AccessToken
+
+
+def page(results):
+    """
+    Rendered single page response of results.
+    """
+    return JSONRenderer().render({"next": None, "previous": None, "results": results})
+
+
+@pytest.mark.integration
+class TestFieldPlans(APITestCase):
+    """
+    Test that the list endpoints built from values() rows answer like the
+    serializers, and narrow their SELECT with ?fields=.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        sender = Account.objects.create(user=self.user, currency="USD", balance=50)
+        receiver = Account.objects.create(user=self.user, currency="CLP")
+        Transaction.objects.create(
+            user=self.user,
+            account=sender,
+            transaction_type="deposit",
+            amount="100.5",
+            currency="USD",
+            previous_balance=0,
+            new_balance="100.5",
+        )
+        self.transfer = Transaction.objects.create(
+            user=self.user,
+            account=sender,
+            related_account=receiver,
+            transaction_type="transfer",
+            amount="50.50",
+            currency="USD",
+            previous_balance="100.50",
+            new_balance=50,
+            description='rent "May"',
+        )
+
+        self.headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.client.credentials(HTTP_AUTHORIZATION=self.headers["authorization"])
+
+    def test_transaction_list_matches_the_serializer(self):
+        """
+        Test that the default transaction list is byte-identical to the
+        serializer output.
+        """
+        # arrange
+        transactions = Transaction.objects.order_by("-created_at", "-id")
+        expected = page(TransactionSerializer(transactions, many=True).data)
+
+        # act
+        response = self.client.get(reverse("transaction-list-create"))
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, expected)
+
+    def test_account_list_matches_the_serializer(self):
+        """
+        Test that the default account list is byte-identical to the
+        serializer output, with the username and without a query per account
+        (the ETag, then the page).
+        """
+        # arrange
+        accounts = Account.objects.order_by("account_number")
+        expected = page(AccountSerializer(accounts, many=True).data)
+
+        # act
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("account-list"))
+
+        # assert
+        self.assertEqual(response.content, expected)
+
+    async def test_async_lists_match_the_sync_ones(self):
+        """
+        Test that the async lists use the same read path.
+        """
+        for name in ("account-list", "transaction-list-create"):
+            # act
+            sync = await self.async_client.get(reverse(name), headers=self.headers)
+            response = await self.async_client.get(
+                reverse(f"async-{name}"), headers=self.headers
+            )
+
+            # assert
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), sync.json())
+
+    def test_sparse_fieldset(self):
+        """
+        Test that ?fields= returns and selects only the fields asked for.
+        """
+        # act
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("transaction-list-create"), {"fields": "amount,id"}
+            )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()["results"][0], {"id": self.transfer.id, "amount": "50.50"}
+        )
+        # after the ETag query
+        select = queries.captured_queries[1]["sql"]
+        self.assertIn('"amount"', select)
+        self.assertNotIn('"description"', select)
+
+    def test_sparse_fieldset_with_unknown_field(self):
+        """
+        Test that unknown fields are rejected.
+        """
+        # act
+        response = self.client.get(
+            reverse("account-list"), {"fields": "balance,password"}
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {"fields": ["Unknown fields: password"]})
@@ -0,0 +1,231 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client.multiprocess import mark_process_dead
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from quotation_system.accounts.models import Account
+from quotation_system.currencies.models import Currency, CurrencyRate
+from quotation_system.metrics import MetricsMiddleware, metrics_view, stats_copier
+
+# a worker process writing its metrics to PROMETHEUS_MULTIPROC_DIR
+WORKER = """
+from prometheus_client import Counter, Gauge
+Counter("calls", "Calls.").inc()
+Gauge("open_connections", "Open.", multiprocess_mode="livesum").set(3)
+print(__import__("os").getpid())
+"""
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.unit
+@override_settings(METRICS_TOKEN="scraper-token")
+def test_view_adds_up_the_running_processes(tmp_path):
+    # arrange
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    pids = [
+        int(
+            subprocess.run(
+                [sys.executable, "-c", WORKER],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        )
+        for _ in range(2)
+    ]
+    # the process manager reports the workers that stopped
+    mark_process_dead(pids[0], str(tmp_path))
+    request = RequestFactory().get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer scraper-token"
+    )
+
+    # act
+    with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}):
+        text = metrics_view(request).content.decode()
+
+    # assert
+    # counters keep the values of stopped workers, gauges do not
+    assert "calls_total 2.0" in text
+    assert "open_connections 3.0" in text
+
+
+@pytest.mark.unit
+def test_database_connection_metrics():
+    # arrange
+    stats = {
+        "pool_min": 2,
+        "pool_max": 10,
+        "pool_size": 4,
+        "pool_available": 1,
+        "requests_waiting": 2,
+        "requests_num": 40,
+        "requests_wait_ms": 1500,
+    }
+    opened = sample("db_connections_opened_total", database="default")
+    checkouts = sample("db_pool_checkouts_total", database="default")
+
+    # act
+    connection_created.send(sender=type(connection), connection=connection)
+    with mock.patch(
+        "quotation_system.metrics.pool_stats", return_value={"default": stats}
+    ):
+        stats_copier.copy()
+        # only the increase since the previous copy is added
+        stats_copier.copy()
+
+    # assert
+    assert sample("db_connections_opened_total", database="default") == opened + 1
+    assert sample("db_pool_checkouts_total", database="default") == checkouts + 40
+    assert sample("db_pool_connections", database="default", state="idle") == 1
+    assert sample("db_pool_connections", database="default", state="waiting") == 2
+
+
+@pytest.mark.unit
+def test_unknown_methods_share_one_label():
+    # arrange
+    middleware = MetricsMiddleware(lambda request: None)
+    request = RequestFactory().generic("BREW", "/coffee")
+    request.resolver_match = None
+    before = sample(
+        "http_request_duration_seconds_count", view="unmatched", method="other"
+    )
+
+    # act
+    middleware(request)
+
+    # assert
+    assert (
+        sample("http_request_duration_seconds_count", view="unmatched", method="other")
+        == before + 1
+    )
+    assert (
+        sample("http_request_duration_seconds_count", view="unmatched", method="BREW")
+        == 0
+    )
+
+
+@pytest.mark.integration
+@override_settings(METRICS_TOKEN="scraper-token")
+class TestMetrics(APITestCase):
+    """
+    Test the metrics collected by the transaction endpoints and /metrics.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(user=self.user, currency="USD")
+        CurrencyRate.objects.create(
+            base_currency=Currency.objects.create(code="CLP", name="Chilean peso"),
+            target_currency=Currency.objects.create(code="USD", name="US dollar"),
+            rate=1000,
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def create(self, transaction_type, amount):
+        return self.client.post(
+            reverse("transaction-list-create"),
+            {
+                "transaction_type": transaction_type,
+                "account": self.account.id,
+                "amount": amount,
+                "currency": "CLP",
+            },
+            format="json",
+        )
+
+    def scrape(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer scraper-token")
+        return self.client.get(reverse("metrics"))
+
+    def test_transaction_outcomes(self):
+        """
+        Test that created and rejected transactions are counted by type.
+        """
+        # arrange
+        samples = [
+            (
+                "transaction_requests_total",
+                {"transaction_type": "deposit", "outcome": "created"},
+            ),
+            (
+                "transaction_requests_total",
+                {"transaction_type": "withdrawal", "outcome": "rejected"},
+            ),
+            ("insufficient_balance_total", {"transaction_type": "withdrawal"}),
+            ("account_lock_wait_seconds_count", {}),
+            ("currency_rate_lookup_seconds_count", {}),
+            (
+                "http_request_duration_seconds_count",
+                {"view": "transaction-list-create", "method": "POST"},
+            ),
+        ]
+        before = [sample(name, **labels) for name, labels in samples]
+
+        # act
+        self.assertEqual(self.create("deposit", 1000).status_code, 201)
+        self.assertEqual(self.create("withdrawal", 5000).status_code, 400)
+        response = self.scrape()
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], CONTENT_TYPE_LATEST)
+        self.assertIn("transaction_requests_total", response.content.decode())
+        self.assertEqual(
+            [
+                sample(name, **labels) - value
+                for (name, labels), value in zip(samples, before)
+            ],
+            [1, 1, 1, 2, 2, 2],
+        )
+
+    def test_token(self):
+        """
+        Test that /metrics requires METRICS_TOKEN, and is closed without it.
+        """
+        # act
+        forbidden = self.client.get(reverse("metrics"))
+        allowed = self.scrape()
+        with override_settings(METRICS_TOKEN=None):
+            closed = self.scrape()
+
+        # assert
+        self.assertEqual(forbidden.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(allowed.status_code, status.HTTP_200_OK)
+        self.assertEqual(closed.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_HOT_ACCOUNT_SECONDS=0)
+    def test_lock_contention_is_not_labelled_by_account(self):
+        """
+        Test that lock contention is one series whatever the accounts.
+        """
+        # arrange
+        before = sample("account_lock_contention_total")
+
+        # act
+        self.create("deposit", 1000)
+        self.create("deposit", 1000)
+        text = self.scrape().content.decode()
+
+        # assert
+        self.assertEqual(sample("account_lock_contention_total"), before + 2)
+        self.assertNotIn("account_lock_contention_total{", text)
@@ -0,0 +1,125 @@
+import random
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.budgets import BUDGETS, Budget, QueryRecorder, over_budget
+from quotation_system.transactions.models import Transaction
+from quotation_system.transactions.seeding import seed, username
+from quotation_system.users.tokens import AccessToken
+
+PASSWORD = "budget-password"
+
+
+@pytest.mark.integration
+class TestQueryBudgets(APITestCase):
+    """
+    Run each endpoint against a seeded dataset and fail when it runs more
+    queries or fetches more rows than its budget (quotation_system/budgets.py).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(
+            users=3,
+            accounts_per_user=2,
+            transactions_per_account=60,
+            codes=["USD", "EUR"],
+            days=30,
+            prefix="budget",
+            password=PASSWORD,
+            batch_size=1000,
+            rng=random.Random(1),
+        )
+
+        cls.user = Account.objects.select_related("user").first().user
+        cls.account = Account.objects.filter(user=cls.user).first()
+        cls.trx = Transaction.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        self.checked = set()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def assert_within_budget(self, key, request):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = request()
+
+        self.assertLess(response.status_code, 400, response.content)
+        report = over_budget(key, recorder)
+        self.assertIsNone(report, report)
+        return response
+
+    def test_account_list(self):
+        self.assert_within_budget(
+            ("account-list", "GET"), lambda: self.client.get(reverse("account-list"))
+        )
+
+    def test_transaction_list(self):
+        url = reverse("transaction-list-create")
+
+        first = self.assert_within_budget(
+            ("transaction-list-create", "GET"), lambda: self.client.get(url)
+        )
+        self.assert_within_budget(
+            ("transaction-list-create", "GET"),
+            lambda: self.client.get(first.data["next"]),
+        )
+
+    def test_transaction_create(self):
+        url = reverse("transaction-list-create")
+        deposit = {
+            "transaction_type": "deposit",
+            "account": self.account.id,
+            "amount": 10,
+            # a currency other than the account's, converted with a rate
+            "currency": "EUR" if self.account.currency == "USD" else "USD",
+        }
+        # the first conversion reads the rate into the cache
+        self.client.post(url, deposit, format="json")
+
+        self.assert_within_budget(
+            ("transaction-list-create", "POST"),
+            lambda: self.client.post(url, deposit, format="json"),
+        )
+
+    def test_transaction_detail(self):
+        url = reverse("transaction-detail", kwargs={"pk": self.trx.pk})
+
+        self.assert_within_budget(
+            ("transaction-detail", "GET"), lambda: self.client.get(url)
+        )
+
+    def test_login(self):
+        self.client.credentials()
+        credentials = {"username": username("budget", 0), "password": PASSWORD}
+
+        self.assert_within_budget(
+            ("login", "POST"),
+            lambda: self.client.post(reverse("login"), credentials, format="json"),
+        )
+
+    def test_over_budget_reports_the_queries(self):
+        """
+        Test that an exceeded budget reports every statement with its rows.
+        """
+        # arrange
+        recorder = QueryRecorder()
+        BUDGETS[("test", "GET")] = Budget(queries=1, rows=1)
+        self.addCleanup(BUDGETS.pop, ("test", "GET"))
+
+        # act
+        with connection.execute_wrapper(recorder):
+            list(Account.objects.filter(user=self.user))
+            list(Transaction.objects.filter(user=self.user)[:3])
+
+        # assert
+        report = over_budget(("test", "GET"), recorder)
+        self.assertIn("2 queries (budget 1), 5 rows (budget 1)", report)
+        self.assertIn("[2 rows] SELECT", report)
+        self.assertIn("[3 rows] SELECT", report)
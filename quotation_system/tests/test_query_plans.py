@@ -0,0 +1,148 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.transactions.models import Transaction
+
+# plan lines that mean a table was read in full or rows were sorted
+SQLITE_BAD_PLAN = ("SCAN ", "USE TEMP B-TREE")
+POSTGRES_BAD_PLAN = ("Seq Scan", "Sort")
+
+
+class CaptureStatements:
+    """
+    connection.execute_wrapper() collecting (sql, params) of every statement.
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def explain(sql, params):
+    """
+    Returns the plan lines of a statement.
+    On PostgreSQL sequential scans and sorts are disabled first, so they only
+    show up in the plan when no index can serve the query.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.mark.integration
+class TestEndpointQueryPlans(APITestCase):
+    """
+    Run EXPLAIN on the queries of each endpoint against a seeded dataset and
+    fail when one of them needs a full table scan or an explicit sort.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for user_index in range(3):
+            user = User.objects.create_user(
+                username=f"user{user_index}", password="testpassword"
+            )
+            accounts = [
+                Account.objects.create(user=user, currency="USD", balance=1000)
+                for _ in range(2)
+            ]
+            Transaction.objects.bulk_create(
+                Transaction(
+                    user=user,
+                    account=accounts[index % 2],
+                    transaction_type="deposit",
+                    amount=1,
+                    currency="USD",
+                    previous_balance=index,
+                    new_balance=index + 1,
+                )
+                for index in range(200)
+            )
+
+        # give the planner real statistics
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.user = User.objects.get(username="user1")
+        cls.accounts = list(Account.objects.filter(user=cls.user).order_by("pk"))
+        cls.trx = Transaction.objects.filter(user=cls.user).order_by("pk").first()
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def assert_plans_use_indexes(self, request):
+        capture = CaptureStatements()
+        with connection.execute_wrapper(capture):
+            response = request()
+
+        self.assertLess(response.status_code, 400, response.data)
+
+        bad_plan = (
+            POSTGRES_BAD_PLAN if connection.vendor == "postgresql" else SQLITE_BAD_PLAN
+        )
+        checked = 0
+        for sql, params in capture.statements:
+            if not sql.lstrip().upper().startswith(("SELECT", "UPDATE")):
+                continue
+
+            plan = explain(sql, params)
+            checked += 1
+            for line in plan:
+                self.assertFalse(
+                    any(marker in line for marker in bad_plan),
+                    f"{sql}\n" + "\n".join(plan),
+                )
+
+        self.assertGreater(checked, 0)
+        return response
+
+    def test_account_list(self):
+        self.assert_plans_use_indexes(lambda: self.client.get(reverse("account-list")))
+
+    def test_transaction_list(self):
+        url = reverse("transaction-list-create")
+
+        first = self.assert_plans_use_indexes(
+            lambda: self.client.get(url, {"page_size": 20})
+        )
+        self.assert_plans_use_indexes(lambda: self.client.get(first.data["next"]))
+
+    def test_transaction_detail(self):
+        url = reverse("transaction-detail", kwargs={"pk": self.trx.pk})
+
+        self.assert_plans_use_indexes(lambda: self.client.get(url))
+
+    def test_transaction_create(self):
+        url = reverse("transaction-list-create")
+        deposit = {
+            "transaction_type": "deposit",
+            "account": self.accounts[0].id,
+            "amount": 10,
+            "currency": "USD",
+        }
+        transfer = {
+            "transaction_type": "transfer",
+            "account": self.accounts[0].id,
+            "related_account": self.accounts[1].id,
+            "amount": 10,
+        }
+
+        self.assert_plans_use_indexes(
+            lambda: self.client.post(url, deposit, format="json")
+        )
+        self.assert_plans_use_indexes(
+            lambda: self.client.post(url, transfer, format="json")
+        )
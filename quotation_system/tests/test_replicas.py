@@ -0,0 +1,169 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections, router
+from django.test import modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.currencies.models import Currency, CurrencyRate
+from quotation_system.replicas import reading_from
+from quotation_system.transactions.models import Transaction
+from quotation_system.users.tokens import AccessToken
+
+REPLICA = "replica"
+
+
+@pytest.mark.integration
+@override_settings(REPLICA_DATABASE=REPLICA, REPLICA_PIN_SECONDS=60)
+@modify_settings(
+    MIDDLEWARE={"append": "quotation_system.replicas.ReplicaPinMiddleware"}
+)
+class TestReplicaRouting(APITestCase):
+    """
+    Test the reads routed to a replica, a second in-memory SQLite database
+    that never receives the writes of the primary (an infinite lag).
+    """
+
+    databases = {"default", REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        settings_dict = dict(connections["default"].settings_dict)
+        settings_dict["NAME"] = "file:memorydb_replica?mode=memory&cache=shared"
+        connections.settings[REPLICA] = settings_dict
+        call_command("migrate", database=REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self):
+        caches["default"].clear()
+
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(user=self.user, currency="USD")
+        CurrencyRate.objects.create(
+            base_currency=Currency.objects.create(code="CLP", name="Chilean peso"),
+            target_currency=Currency.objects.create(code="USD", name="US dollar"),
+            rate=1000,
+        )
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def deposit(self):
+        response = self.client.post(
+            reverse("transaction-list-create"),
+            {
+                "transaction_type": "deposit",
+                "account": self.account.id,
+                "amount": 1000,
+                "currency": "CLP",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["id"]
+
+    def test_reads_go_to_replica(self):
+        """
+        Test that the account list of a user without writes is read from the
+        replica only.
+        """
+        # act
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                response = self.client.get(reverse("account-list"))
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # the account exists on the primary only
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(len(primary), 0)
+        self.assertEqual(len(replica), 2)
+
+    def test_writer_reads_own_writes(self):
+        """
+        Test that after a write the user reads the list and the new
+        transaction from the primary.
+        """
+        # act
+        transaction_id = self.deposit()
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            listed = self.client.get(reverse("transaction-list-create"))
+            detail = self.client.get(
+                reverse("transaction-detail", kwargs={"pk": transaction_id})
+            )
+
+        # assert
+        self.assertEqual(listed.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in listed.data["results"]], [transaction_id]
+        )
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail.data["id"], transaction_id)
+        self.assertEqual(len(replica), 0)
+
+    def test_pin_expires(self):
+        """
+        Test that the user reads from the replica again once the pin expired.
+        """
+        # arrange
+        with override_settings(REPLICA_PIN_SECONDS=0):
+            transaction_id = self.deposit()
+
+        # act
+        response = self.client.get(
+            reverse("transaction-detail", kwargs={"pk": transaction_id})
+        )
+
+        # assert
+        # not replicated yet
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_users_are_not_pinned(self):
+        """
+        Test that the write of a user does not pin other users.
+        """
+        # arrange
+        self.deposit()
+        other = User.objects.create_user(username="other", password="testpassword")
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(other)}"
+        )
+
+        # act
+        with CaptureQueriesContext(connections["default"]) as primary:
+            response = self.client.get(reverse("transaction-list-create"))
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(primary), 0)
+
+    def test_locks_and_writes_go_to_primary(self):
+        """
+        Test that select_for_update() and saves use the primary inside a
+        replica read.
+        """
+        # act
+        with reading_from(REPLICA):
+            read = Transaction.objects.filter(user_id=self.user.pk).db
+            locked = Account.objects.select_for_update().db
+            written = router.db_for_write(Account, instance=self.account)
+
+        # assert
+        self.assertEqual(read, REPLICA)
+        self.assertEqual(locked, "default")
+        self.assertEqual(written, "default")
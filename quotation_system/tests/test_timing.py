@@ -0,0 +1,128 @@
+import json
+import re
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import modify_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from quotation_system.accounts.models import Account
+from quotation_system.currencies.models import Currency, CurrencyRate
+from quotation_system.timing import RequestTimings, current_timings, timed
+
+MIDDLEWARE = "quotation_system.timing.ServerTimingMiddleware"
+
+
+def phases(response):
+    """
+    {metric: duration} of a Server-Timing header.
+    """
+    return {
+        name: float(duration)
+        for name, duration in re.findall(
+            r"(\w+);dur=([\d.]+)", response["Server-Timing"]
+        )
+    }
+
+
+@pytest.mark.unit
+def test_timed_outside_a_request_does_nothing():
+    # act
+    with timed("lock"):
+        pass
+
+    # assert
+    assert current_timings.get() is None
+
+
+@pytest.mark.unit
+def test_timed_adds_up_repeated_phases():
+    # arrange
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+
+    # act
+    try:
+        with timed("convert"):
+            pass
+        with timed("convert"):
+            pass
+    finally:
+        current_timings.reset(token)
+
+    # assert
+    assert list(timings.phases) == ["convert"]
+    assert re.fullmatch(
+        r'convert;dur=[\d.]+, db;dur=0.00;desc="0 queries", total;dur=1000.00',
+        timings.header(1),
+    )
+
+
+@pytest.mark.integration
+@modify_settings(MIDDLEWARE={"prepend": MIDDLEWARE})
+class TestServerTimingMiddleware(APITestCase):
+    """
+    Test the Server-Timing header and log line of the requests.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(user=self.user, currency="USD")
+        CurrencyRate.objects.create(
+            base_currency=Currency.objects.create(code="CLP", name="Chilean peso"),
+            target_currency=Currency.objects.create(code="USD", name="US dollar"),
+            rate=1000,
+        )
+
+        self.headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.client.credentials(HTTP_AUTHORIZATION=self.headers["authorization"])
+
+    def test_transaction_create_phases(self):
+        """
+        Test that a deposit reports every phase of its request.
+        """
+        # act
+        with self.assertLogs("quotation_system.timing", "INFO") as logs:
+            response = self.client.post(
+                reverse("transaction-list-create"),
+                {
+                    "transaction_type": "deposit",
+                    "account": self.account.id,
+                    "amount": 1000,
+                    "currency": "CLP",
+                },
+                format="json",
+            )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(phases(response)),
+            {"auth", "validate", "lock", "convert", "render", "db", "total"},
+        )
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="\d+ queries"')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "transaction-list-create")
+        self.assertEqual(record["status"], 201)
+        self.assertGreater(record["db_queries"], 0)
+        self.assertLessEqual(record["lock_ms"], record["total_ms"])
+
+    async def test_async_view_phases(self):
+        """
+        Test that async views report their phases and queries too.
+        """
+        # act
+        response = await self.async_client.get(
+            reverse("async-account-list"), headers=self.headers
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(phases(response)), {"auth", "render", "db", "total"})
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
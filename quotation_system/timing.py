@@ -0,0 +1,190 @@
+"""
+Server-Timing instrumentation of the requests (opt-in, settings.SERVER_TIMING).
+
+ServerTimingMiddleware gives every request a RequestTimings in a context
+variable. Code on the request path adds the time of its phases with timed():
+JWT authentication ("auth"), serializer validation ("validate"), waiting for
+account row locks ("lock"), currency conversion ("convert") and response
+rendering ("render"). A connection execute wrapper adds the time and the
+number of the SQL queries ("db").
+
+The totals are sent in a Server-Timing header
+(auth;dur=0.41, validate;dur=1.92, ..., db;dur=2.10;desc="6 queries",
+total;dur=7.35) and logged as one JSON line on the
+"quotation_system.timing" logger.
+
+Outside a timed request every hook is a context variable lookup, so the
+hooks stay in place when the middleware is off.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# RequestTimings of the current request, copied into sync_to_async threads
+current_timings = ContextVar("current_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        # {phase: seconds}, in the order the phases were first seen
+        self.phases = {}
+        self.db_time = 0.0
+        self.db_queries = 0
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def header(self, total):
+        metrics = [
+            f"{phase};dur={seconds * 1000:.2f}"
+            for phase, seconds in self.phases.items()
+        ]
+        metrics.append(
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.db_queries} queries"'
+        )
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def record(self, request, response, total):
+        match = request.resolver_match
+        return {
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(self.db_time * 1000, 2),
+            "db_queries": self.db_queries,
+            **{
+                f"{phase}_ms": round(seconds * 1000, 2)
+                for phase, seconds in self.phases.items()
+            },
+        }
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block to phase of the current request.
+    Also usable as a decorator: @timed("convert").
+    """
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Execute wrapper adding every query to the current request.
+    """
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_time += time.perf_counter() - started
+        timings.db_queries += 1
+
+
+def install_query_timer(connection, **kwargs):
+    # ^ first, connection.execute_wrapper() blocks pop the last wrapper
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
+
+
+def install_query_timers():
+    for connection in connections.all(initialized_only=True):
+        install_query_timer(connection)
+
+
+class ServerTimingMiddleware:
+    """
+    Time the request phases and send them in the Server-Timing header.
+    Works under WSGI and ASGI, put it first in MIDDLEWARE to time the others.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        # every connection opened from now on, in any thread, and the ones
+        # this thread already has
+        connection_created.connect(install_query_timer)
+        install_query_timers()
+        self.sync_thread_ready = False
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self.sync_thread_ready:
+            # the ORM runs in the thread of sync_to_async(), which may have
+            # connected before the middleware was loaded
+            await sync_to_async(install_query_timers)()
+            self.sync_thread_ready = True
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        return self.finish(request, response, timings)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns
+        timings = current_timings.get()
+        if timings is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add("render", time.perf_counter() - started)
+            )
+        return response
+
+    def finish(self, request, response, timings):
+        total = time.perf_counter() - timings.started
+        response["Server-Timing"] = timings.header(total)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                json.dumps(
+                    timings.record(request, response, total), separators=(",", ":")
+                )
+            )
+
+        return response
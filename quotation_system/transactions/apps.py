@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TransactionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "quotation_system.transactions"
+
+    def ready(self):
+        from . import checks  # noqa: F401
@@ -0,0 +1,310 @@
+"""
+Cold storage of old transactions.
+
+`manage.py archive_transactions` moves the transactions made before a cutoff
+out of the transactions table into segment files on local disk
+(TRANSACTIONS_ARCHIVE_DIR). A segment is written once, by one run, and never
+modified: it is a series of gzip members (blocks), each holding up to
+TRANSACTIONS_ARCHIVE_BLOCK_SIZE transactions of one account as NDJSON, in
+(created_at, id) order. The ArchiveBlock rows are the index of the blocks:
+their account, user, id and created_at ranges, offset and length, so a read
+decompresses only the blocks it needs.
+
+Every column is stored as it was (amounts and balances as decimal strings,
+full precision datetimes), so the previous_balance/new_balance chain of an
+account continues unchanged from its archived blocks to its rows in the table.
+
+The detail and list endpoints fall back to the archive (see find_archived()
+and ArchiveCursorPagination), the export and the rollup backfill read it
+first (see archived_transactions()).
+"""
+
+import gzip
+import heapq
+import json
+import os
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from quotation_system.pagination import KeysetCursorPagination
+
+from .models import ArchiveBlock, Transaction
+
+# archived columns, by attribute name
+FIELDS = (
+    "id",
+    "user_id",
+    "account_id",
+    "related_account_id",
+    "transaction_type",
+    "amount",
+    "currency",
+    "previous_balance",
+    "new_balance",
+    "description",
+    "created_at",
+)
+DECIMAL_FIELDS = ("amount", "previous_balance", "new_balance")
+
+
+def encode(row):
+    """
+    One NDJSON line of an archived transaction (a dict of FIELDS).
+    """
+    values = {
+        name: (
+            str(value)
+            if isinstance(value, Decimal)
+            else value.isoformat() if isinstance(value, datetime) else value
+        )
+        for name, value in row.items()
+    }
+    return json.dumps(values, separators=(",", ":")).encode() + b"\n"
+
+
+def decode(line):
+    """
+    The (unsaved) Transaction of an NDJSON line.
+    """
+    values = json.loads(line)
+    for name in DECIMAL_FIELDS:
+        values[name] = Decimal(values[name])
+    values["created_at"] = datetime.fromisoformat(values["created_at"])
+
+    return Transaction(**values)
+
+
+def segment_path(segment):
+    return os.path.join(settings.TRANSACTIONS_ARCHIVE_DIR, segment)
+
+
+class SegmentWriter:
+    """
+    Appends blocks to a new segment file.
+    """
+
+    def __init__(self):
+        os.makedirs(settings.TRANSACTIONS_ARCHIVE_DIR, exist_ok=True)
+
+        self.name = f"{timezone.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.seg"
+        # ^ "x": a segment is never opened for writing twice
+        self.file = open(segment_path(self.name), "xb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.file.close()
+
+        # nothing was archived, no empty segment is left behind
+        if not os.path.getsize(segment_path(self.name)):
+            os.remove(segment_path(self.name))
+
+    def write_block(self, account_id, rows):
+        """
+        Write rows (dicts of FIELDS of one account, in order) as one block.
+        Returns its unsaved ArchiveBlock.
+        """
+        data = gzip.compress(b"".join(encode(row) for row in rows))
+        offset = self.file.tell()
+        self.file.write(data)
+
+        ids = [row["id"] for row in rows]
+        return ArchiveBlock(
+            account_id=account_id,
+            user_id=rows[0]["user_id"],
+            segment=self.name,
+            offset=offset,
+            length=len(data),
+            transaction_count=len(rows),
+            first_id=min(ids),
+            last_id=max(ids),
+            first_created_at=rows[0]["created_at"],
+            last_created_at=rows[-1]["created_at"],
+            opening_balance=rows[0]["previous_balance"],
+            closing_balance=rows[-1]["new_balance"],
+        )
+
+    def sync(self):
+        """
+        Make the blocks written so far durable, before their rows are deleted.
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+
+def read_block(block):
+    """
+    The transactions of a block, in (created_at, id) order.
+    """
+    with open(segment_path(block.segment), "rb") as file:
+        file.seek(block.offset)
+        data = gzip.decompress(file.read(block.length))
+
+    return [decode(line) for line in data.splitlines()]
+
+
+def transaction_key(trx):
+    return (trx.created_at, trx.id)
+
+
+def archived_transactions(blocks):
+    """
+    The transactions of blocks, in (created_at, id) order. Blocks of one
+    account never overlap, so only one block per account is decompressed
+    at a time.
+    """
+    by_account = {}
+    for block in blocks.order_by("account_id", "first_created_at"):
+        by_account.setdefault(block.account_id, []).append(block)
+
+    def account_transactions(account_blocks):
+        for block in account_blocks:
+            yield from read_block(block)
+
+    return heapq.merge(
+        *(
+            account_transactions(account_blocks)
+            for account_blocks in by_account.values()
+        ),
+        key=transaction_key,
+    )
+
+
+def archive_account(account_id, cutoff, segment, block_size):
+    """
+    Move the transactions of an account made before cutoff to segment.
+    The blocks are synced to disk first, then indexed and their rows deleted
+    in one database transaction. Returns the number of archived transactions.
+    """
+    history = Transaction.objects.filter(
+        account_id=account_id, created_at__lt=cutoff
+    ).order_by("created_at", "id")
+
+    blocks = []
+    rows = []
+    for row in history.values(*FIELDS).iterator(chunk_size=block_size):
+        rows.append(row)
+        if len(rows) == block_size:
+            blocks.append(segment.write_block(account_id, rows))
+            rows = []
+    if rows:
+        blocks.append(segment.write_block(account_id, rows))
+
+    if not blocks:
+        return 0
+
+    segment.sync()
+
+    with transaction.atomic():
+        ArchiveBlock.objects.bulk_create(blocks)
+        # transactions are never created in the past, so these are the rows
+        # that were just written
+        history.filter(id__lte=max(block.last_id for block in blocks)).delete()
+
+    return sum(block.transaction_count for block in blocks)
+
+
+def find_archived(user, pk):
+    """
+    The archived transaction pk of user, or None.
+    """
+    blocks = ArchiveBlock.objects.filter(
+        user_id=user.pk, first_id__lte=pk, last_id__gte=pk
+    )
+
+    for block in blocks:
+        for trx in read_block(block):
+            if trx.pk == pk:
+                return trx
+
+    return None
+
+
+def archived_page(user, ordering, position, limit, bound=None):
+    """
+    Up to limit archived transactions of user placed after position in
+    ordering (("-created_at", "-id") or its reverse), in that order.
+    bound is the position of the last row of the same page read from the
+    table: blocks entirely past it cannot contribute to the page.
+    """
+    descending = ordering[0].startswith("-")
+
+    blocks = ArchiveBlock.objects.filter(user_id=user.pk)
+    if descending:
+        if position is not None:
+            blocks = blocks.filter(first_created_at__lte=position[0])
+        if bound is not None:
+            blocks = blocks.filter(last_created_at__gte=bound[0])
+        blocks = blocks.order_by("-last_created_at")
+    else:
+        if position is not None:
+            blocks = blocks.filter(last_created_at__gte=position[0])
+        if bound is not None:
+            blocks = blocks.filter(first_created_at__lte=bound[0])
+        blocks = blocks.order_by("first_created_at")
+
+    def key(trx):
+        return (trx.created_at, trx.id)
+
+    def after(trx):
+        if position is None:
+            return True
+        return key(trx) < tuple(position) if descending else key(trx) > tuple(position)
+
+    rows = []
+    for block in blocks:
+        # blocks come nearest first: once the page is full, a block starting
+        # past its last row cannot contribute
+        if len(rows) >= limit:
+            edge = block.last_created_at if descending else block.first_created_at
+            last = rows[limit - 1].created_at
+            if (edge < last) if descending else (edge > last):
+                break
+
+        rows.extend(trx for trx in read_block(block) if after(trx))
+        rows.sort(key=key, reverse=descending)
+
+    return rows[:limit]
+
+
+class ArchiveCursorPagination(KeysetCursorPagination):
+    """
+    KeysetCursorPagination of the transactions of the request user that
+    merges the archived transactions into the pages, same cursors.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = list(self.page_queryset(queryset, request))
+
+        return self.set_page(self.merge_archived(rows))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        rows = [row async for row in self.page_queryset(queryset, request)]
+
+        return self.set_page(await sync_to_async(self.merge_archived)(rows))
+
+    def merge_archived(self, rows):
+        limit = self.page_size + 1
+        bound = self.row_position(rows[-1]) if len(rows) == limit else None
+
+        archived = archived_page(
+            self.request.user, self.page_ordering, self.position, limit, bound
+        )
+        if not archived:
+            return rows
+
+        descending = self.page_ordering[0].startswith("-")
+        # page rows may be values() dicts, archived rows are instances
+        rows = sorted(
+            rows + archived,
+            key=lambda row: tuple(self.row_position(row)),
+            reverse=descending,
+        )
+        return rows[:limit]
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from .async_views import AsyncTransactionDetailView, AsyncTransactionListView
+
+urlpatterns = [
+    path("", AsyncTransactionListView.as_view(), name="async-transaction-list-create"),
+    path(
+        "<int:pk>/",
+        AsyncTransactionDetailView.as_view(),
+        name="async-transaction-detail",
+    ),
+]
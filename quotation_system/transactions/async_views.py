@@ -0,0 +1,97 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
+from rest_framework import status
+from rest_framework.response import Response
+
+from quotation_system.async_api import AsyncAPIView
+from quotation_system.conditional import make_etag, not_modified, with_etag
+from quotation_system.metrics import transaction_outcome
+from quotation_system.users.authentication import model_user
+
+from .archive import ArchiveCursorPagination, find_archived
+from .idempotency import idempotent
+from .models import Transaction
+from .retry import run_with_retry
+from .serializers import TransactionSerializer, transaction_plan
+from .views import create_transaction, latest_transaction_id, transaction_etag
+
+
+class AsyncTransactionListView(AsyncAPIView):
+    """
+    Async TransactionListView (same payloads), served under /api/async/.
+    """
+
+    pagination_class = ArchiveCursorPagination
+
+    async def get(self, request):
+        queryset = Transaction.objects.filter(user_id=request.user.pk)
+
+        latest = await sync_to_async(latest_transaction_id)(queryset)
+        etag = make_etag(request, latest)
+        response = not_modified(request, etag)
+        if response is None:
+            response = await self.page(request, queryset)
+
+        return with_etag(response, etag, no_cache=True)
+
+    async def page(self, request, queryset):
+        paginator = self.pagination_class()
+        fields = transaction_plan.requested(request)
+        transactions = await paginator.apaginate_queryset(
+            transaction_plan.select(queryset, fields, paginator.ordering),
+            request,
+            view=self,
+        )
+
+        return paginator.get_paginated_response(
+            transaction_plan.serialize(transactions, fields)
+        )
+
+    async def post(self, request):
+        # validation reads the accounts and the write needs transaction.atomic()
+        # and select_for_update(), so all of it runs in one thread
+        return await sync_to_async(idempotent)(request, lambda: self.create(request))
+
+    def create(self, request):
+        serializer = TransactionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        transaction_type = request.data["transaction_type"]
+        serializer.validated_data["user"] = model_user(request.user)
+
+        # deadlocks and serialization failures run the whole transaction again
+        with transaction_outcome(transaction_type):
+            run_with_retry(
+                lambda: create_transaction(
+                    request.user, serializer, transaction_type, request.data
+                )
+            )
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class AsyncTransactionDetailView(AsyncAPIView):
+    """
+    Async TransactionDetailView, served under /api/async/.
+    """
+
+    async def get(self, request, pk):
+        # 304 only for a transaction the user can read
+        trx = await self.read(request, pk)
+        etag = transaction_etag(request, trx)
+        response = not_modified(request, etag)
+        if response is None:
+            response = Response(TransactionSerializer(trx).data)
+
+        return with_etag(response, etag, max_age=settings.TRANSACTIONS_DETAIL_MAX_AGE)
+
+    async def read(self, request, pk):
+        try:
+            return await Transaction.objects.aget(user_id=request.user.pk, pk=pk)
+        except Transaction.DoesNotExist:
+            # moved to cold storage
+            trx = await sync_to_async(find_archived)(request.user, pk)
+            if trx is None:
+                raise Http404
+            return trx
@@ -0,0 +1,34 @@
+from django.core.checks import Error, Tags, register
+from django.db import DatabaseError
+
+from .ledger import ledger_mode, stale_balances
+
+
+@register(Tags.database)
+def check_account_balances(app_configs, databases=None, **kwargs):
+    """
+    Outside ledger mode the writes start from Account.balance, which ledger
+    mode leaves stale: refuse to start until it matches the ledger again.
+    Database checks run with `manage.py migrate` and `check --database`.
+    """
+    if ledger_mode() or not databases or "default" not in databases:
+        return []
+
+    try:
+        stale = next(stale_balances(), None)
+    except DatabaseError:
+        # not migrated yet
+        return []
+
+    if stale is None:
+        return []
+
+    return [
+        Error(
+            "Account.balance differs from the ledger balance "
+            f"(account {stale[0].pk}), it was not written in ledger mode.",
+            hint="Run `manage.py rebuild_account_balances` before leaving "
+            "ledger mode.",
+            id="transactions.E001",
+        )
+    ]
@@ -0,0 +1,113 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+from .retry import run_with_retry
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def request_hash(request):
+    """
+    Hash of the method, path and payload of a request.
+    """
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    content = f"{request.method} {request.path} {payload}"
+
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def replay(record, expected_hash):
+    """
+    Response stored for a key, or an error if the key was used for another request.
+    """
+    if record.request_hash != expected_hash:
+        return Response(
+            {"detail": f"{IDEMPOTENCY_HEADER} was already used with another request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    return Response(
+        record.response_body,
+        status=record.response_status,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def idempotent(request, handler):
+    """
+    Run handler() once per (user, Idempotency-Key header).
+
+    - requests without the header just run handler()
+    - the first request inserts the key and stores its successful response in
+      the same database transaction as the work done by handler()
+    - replays of a stored key get the stored response with a single SELECT,
+      no account is locked and nothing is written
+    - a concurrent duplicate blocks on the unique (user, key) index until the
+      first request commits, then replays its response. If the first request
+      fails its key is rolled back and the duplicate runs handler() itself
+
+    Failed responses are not stored, so the client can retry them.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return handler()
+
+    if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+        return Response(
+            {"detail": f"{IDEMPOTENCY_HEADER} is too long"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    expected_hash = request_hash(request)
+    expires_before = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+
+    # --- REPLAY ----
+    record = IdempotencyKey.objects.filter(
+        user_id=request.user.pk, key=key, created_at__gte=expires_before
+    ).first()
+    if record is not None:
+        return replay(record, expected_hash)
+
+    # --- FIRST REQUEST ----
+    def run():
+        with transaction.atomic():
+
+            # an expired key can be used again
+            IdempotencyKey.objects.filter(
+                user_id=request.user.pk, key=key, created_at__lt=expires_before
+            ).delete()
+
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user_id=request.user.pk, key=key, request_hash=expected_hash
+                    )
+            except IntegrityError:
+                # ^ raised once the concurrent request holding the key committed
+                return replay(
+                    IdempotencyKey.objects.get(user_id=request.user.pk, key=key),
+                    expected_hash,
+                )
+
+            response = handler()
+
+            if status.is_success(response.status_code):
+                record.response_status = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=["response_status", "response_body"])
+            else:
+                # free the key so the client can retry
+                record.delete()
+
+            return response
+
+    # the retry loop wraps the outermost transaction, retries inside handler()
+    # are skipped because they run in this atomic block
+    return run_with_retry(run)
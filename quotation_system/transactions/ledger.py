@@ -0,0 +1,307 @@
+"""
+Append-only double-entry ledger of the balances.
+
+Every transaction write inserts its postings (see Posting), in every balance
+update mode. Postings are never updated or deleted, archiving transactions
+keeps them. The balance of an account is the one of its latest
+BalanceCheckpoint plus the postings after it (the tail);
+`manage.py checkpoint_balances` adds checkpoints periodically so the tail
+stays short. Accounts that existed before the ledger start from a checkpoint
+of their balance column (migration 0009).
+
+With TRANSACTIONS_BALANCE_UPDATE_MODE = "ledger" the ledger is the only
+source of the balances and no row is updated by the writes, they only
+insert: Account.balance is no longer written and the daily rollups are
+inserted as deltas (see rollups.py):
+- credits (deposits, the receiver of a transfer) insert their postings
+  without locking the account row
+- debits lock the debited account row (SELECT ... FOR UPDATE, it is not
+  updated) while its balance is checked, so concurrent debits cannot
+  overdraw it
+The previous_balance / new_balance of a transaction are the balance it read,
+credits of the account committing at the same time are not included.
+
+Account.balance is left stale meanwhile: before switching back to another
+mode, `manage.py rebuild_account_balances` writes the ledger balances to it,
+and the transactions.E001 check (see checks.py) refuses to start while they
+differ.
+"""
+
+from django.conf import settings
+from django.db.models import Case, DecimalField, F, Q, Sum, When
+from rest_framework import serializers
+
+from quotation_system.accounts.models import Account
+
+from .models import BalanceCheckpoint, Posting, Transaction
+from .services import apply_transaction, lock_accounts, quantize_balance
+
+# balance update mode (settings.TRANSACTIONS_BALANCE_UPDATE_MODE)
+LEDGER = "ledger"
+
+# change of the balance made by a posting
+SIGNED_AMOUNT = Case(
+    When(side=Posting.DEBIT, then=-F("amount")),
+    default=F("amount"),
+    output_field=DecimalField(max_digits=10, decimal_places=2),
+)
+
+
+def ledger_mode():
+    return settings.TRANSACTIONS_BALANCE_UPDATE_MODE == LEDGER
+
+
+def postings_for(
+    trx, receiver=None, receiver_previous_balance=None, receiver_new_balance=None
+):
+    """
+    Unsaved postings of a saved transaction, receiver is the account credited
+    by a transfer (its new balance defaults to receiver.balance).
+    """
+    change = quantize_balance(trx.new_balance) - quantize_balance(trx.previous_balance)
+    postings = [
+        Posting(
+            account_id=trx.account_id,
+            transaction_id=trx.pk,
+            side=Posting.CREDIT if change >= 0 else Posting.DEBIT,
+            amount=abs(change),
+        )
+    ]
+
+    if receiver is not None:
+        received = quantize_balance(
+            receiver.balance if receiver_new_balance is None else receiver_new_balance
+        ) - quantize_balance(receiver_previous_balance)
+        postings.append(
+            Posting(
+                account_id=receiver.pk,
+                transaction_id=trx.pk,
+                side=Posting.CREDIT,
+                amount=received,
+            )
+        )
+
+    return postings
+
+
+def record_postings(trx, receiver=None, receiver_previous_balance=None):
+    """
+    Insert the postings of one saved transaction.
+    Must run in the database transaction that saved it.
+    """
+    Posting.objects.bulk_create(postings_for(trx, receiver, receiver_previous_balance))
+
+
+def latest_checkpoints(account_ids):
+    """
+    {account_id: (posting_id, balance)} of the latest checkpoint of the
+    accounts that have one.
+    """
+    checkpoints = BalanceCheckpoint.objects.filter(account_id__in=account_ids)
+
+    latest = {}
+    # ^ superseded checkpoints are deleted, there are few per account
+    for account_id, posting_id, balance in checkpoints.order_by(
+        "account_id", "posting_id"
+    ).values_list("account_id", "posting_id", "balance"):
+        latest[account_id] = (posting_id, balance)
+
+    return latest
+
+
+def tail_sums(account_ids, checkpoints, up_to=None):
+    """
+    {account_id: balance change} of the postings of the accounts after their
+    checkpoint (and up to the posting up_to), accounts without postings are
+    missing.
+    """
+    # accounts grouped by the posting their checkpoint ends at, checkpoints
+    # are made for many accounts at once so there are few groups
+    groups = {}
+    for account_id in account_ids:
+        posting_id = checkpoints.get(account_id, (0, None))[0]
+        groups.setdefault(posting_id, []).append(account_id)
+
+    tail = Q()
+    for posting_id, ids in groups.items():
+        tail |= Q(account_id__in=ids, id__gt=posting_id)
+    if not tail:
+        return {}
+
+    postings = Posting.objects.filter(tail)
+    if up_to is not None:
+        postings = postings.filter(id__lte=up_to)
+
+    return dict(
+        postings.order_by()
+        .values("account_id")
+        .annotate(change=Sum(SIGNED_AMOUNT))
+        .values_list("account_id", "change")
+    )
+
+
+def balances(account_ids):
+    """
+    {account_id: balance} from the ledger, two queries for any number of
+    accounts.
+    """
+    account_ids = list(account_ids)
+    checkpoints = latest_checkpoints(account_ids)
+    changes = tail_sums(account_ids, checkpoints)
+
+    return {
+        account_id: quantize_balance(
+            checkpoints.get(account_id, (0, 0))[1] + changes.get(account_id, 0)
+        )
+        for account_id in account_ids
+    }
+
+
+def load_balances(accounts):
+    """
+    Set the balance of account instances from the ledger.
+    """
+    current = balances(account.pk for account in accounts)
+    for account in accounts:
+        account.balance = current[account.pk]
+
+
+def fill_balances(rows):
+    """
+    Set the balance of account values() rows (with their id) from the ledger.
+    """
+    current = balances(row["id"] for row in rows)
+    for row in rows:
+        row["balance"] = current[row["id"]]
+
+
+def apply_ledger_transaction(user, transaction_type, validated_data, data):
+    """
+    Apply a transaction to balances read from the ledger (in memory), only
+    the debited account is locked. validated_data gets previous_balance and
+    new_balance like with apply_transaction(), data is the request payload
+    (account ids).
+    Returns (receiver account, its previous balance) of transfers, else
+    (None, None).
+    """
+    account = validated_data["account"]
+
+    # same error as the locked path for accounts of other users
+    if account.user_id != user.pk:
+        raise Account.DoesNotExist("Account matching query does not exist.")
+
+    receiver = None
+
+    # --- TRANSFER ----
+    if transaction_type == Transaction.TRANSACTION_TYPES[2][0]:
+
+        # check if related_account is defined
+        if not data.get("related_account"):
+            raise serializers.ValidationError("Related account must be defined")
+
+        # the receiver is only credited, it is not locked
+        receiver = Account.objects.get(user_id=user.pk, pk=int(data["related_account"]))
+
+    # debits keep the account row locked until the postings are committed
+    if transaction_type != Transaction.TRANSACTION_TYPES[0][0]:
+        lock_accounts(user, [account.pk])
+
+    accounts = [account] if receiver is None else [account, receiver]
+    load_balances(accounts)
+    receiver_previous_balance = receiver.balance if receiver is not None else None
+
+    # update balances (in memory only)
+    apply_transaction(transaction_type, validated_data, account, receiver)
+
+    return receiver, receiver_previous_balance
+
+
+def stale_balances(batch_size=1000):
+    """
+    Yields (account, ledger balance) of the accounts whose balance column
+    differs from the ledger, batch_size accounts per query.
+    """
+    last = 0
+    while True:
+        accounts = list(
+            Account.objects.filter(pk__gt=last)
+            .order_by("pk")
+            .only("balance")[:batch_size]
+        )
+        if not accounts:
+            return
+
+        current = balances(account.pk for account in accounts)
+        for account in accounts:
+            if quantize_balance(account.balance) != current[account.pk]:
+                yield account, current[account.pk]
+
+        last = accounts[-1].pk
+
+
+def rebuild_balances(batch_size=1000):
+    """
+    Write the ledger balances to the stale Account.balance columns, with no
+    transaction being written. Returns the number of accounts updated.
+    """
+    updated = 0
+    stale = []
+    for account, balance in stale_balances(batch_size):
+        account.balance = balance
+        stale.append(account)
+
+        if len(stale) == batch_size:
+            updated += Account.objects.bulk_update(stale, ["balance"])
+            stale = []
+
+    if stale:
+        updated += Account.objects.bulk_update(stale, ["balance"])
+
+    return updated
+
+
+def checkpoint_balances(up_to, batch_size=1000):
+    """
+    Add a checkpoint at the posting up_to to every account with postings
+    after its latest checkpoint, and delete the checkpoints it supersedes.
+    Returns the number of checkpoints added.
+    """
+    # every account with a posting up to the previous run has a checkpoint
+    # there, only the accounts posted to since then can have a tail
+    previous = (
+        BalanceCheckpoint.objects.order_by("-posting_id")
+        .values_list("posting_id", flat=True)
+        .first()
+        or 0
+    )
+    account_ids = list(
+        Posting.objects.filter(id__gt=previous, id__lte=up_to)
+        .order_by("account_id")
+        .values_list("account_id", flat=True)
+        .distinct()
+    )
+
+    added = 0
+    for start in range(0, len(account_ids), batch_size):
+        batch = account_ids[start : start + batch_size]
+        checkpoints = latest_checkpoints(batch)
+        changes = tail_sums(batch, checkpoints, up_to)
+
+        new = [
+            BalanceCheckpoint(
+                account_id=account_id,
+                posting_id=up_to,
+                balance=quantize_balance(
+                    checkpoints.get(account_id, (0, 0))[1] + change
+                ),
+            )
+            for account_id, change in changes.items()
+        ]
+        BalanceCheckpoint.objects.bulk_create(new)
+        BalanceCheckpoint.objects.filter(
+            account_id__in=[checkpoint.account_id for checkpoint in new],
+            posting_id__lt=up_to,
+        ).delete()
+        added += len(new)
+
+    return added
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from quotation_system.transactions.archive import SegmentWriter, archive_account
+from quotation_system.transactions.models import Transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the transactions older than a cutoff from the transactions table "
+        "to a new compressed segment file in TRANSACTIONS_ARCHIVE_DIR. "
+        "The API keeps serving them from the archive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.TRANSACTIONS_ARCHIVE_AFTER_DAYS,
+            help="Archive the transactions made more than this many days ago.",
+        )
+        parser.add_argument(
+            "--account",
+            type=int,
+            nargs="*",
+            help="Ids of the accounts to archive, all accounts by default.",
+        )
+        parser.add_argument(
+            "--block-size",
+            type=int,
+            default=settings.TRANSACTIONS_ARCHIVE_BLOCK_SIZE,
+            help="Transactions per compressed block.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+
+        accounts = Transaction.objects.filter(created_at__lt=cutoff)
+        if options["account"]:
+            accounts = accounts.filter(account_id__in=options["account"])
+        account_ids = list(
+            accounts.values_list("account_id", flat=True)
+            .distinct()
+            .order_by("account_id")
+        )
+
+        archived = 0
+        with SegmentWriter() as segment:
+            for account_id in account_ids:
+                archived += archive_account(
+                    account_id, cutoff, segment, options["block_size"]
+                )
+
+        self.stdout.write(
+            f"Archived {archived} transactions made before {cutoff:%Y-%m-%d %H:%M} "
+            f"to {segment.name}"
+            if archived
+            else "Nothing to archive"
+        )
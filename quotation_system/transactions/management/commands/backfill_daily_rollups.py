@@ -0,0 +1,114 @@
+import heapq
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from quotation_system.accounts.models import Account
+from quotation_system.currencies.utils import convert_amount
+from quotation_system.transactions.archive import (
+    archived_transactions,
+    transaction_key,
+)
+from quotation_system.transactions.models import (
+    AccountDailyRollup,
+    AccountDailyRollupDelta,
+    ArchiveBlock,
+    Transaction,
+)
+from quotation_system.transactions.rollups import (
+    TOTAL_FIELDS,
+    TRANSFERS_IN,
+    RollupChanges,
+)
+from quotation_system.transactions.services import quantize_balance
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily rollups of accounts from their transactions. "
+        "Transfers received store no receiver balance, so they are converted "
+        "with the current rates and the running balance is anchored again by "
+        "every transaction made on the account. Archived transactions are "
+        "read from their blocks, before the ones left in the table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--account",
+            type=int,
+            nargs="*",
+            help="Ids of the accounts to rebuild, all accounts by default.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Transactions fetched per round trip.",
+        )
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.order_by("pk")
+        if options["account"]:
+            accounts = accounts.filter(pk__in=options["account"])
+
+        rebuilt = 0
+        for account_id in accounts.values_list("pk", flat=True).iterator():
+            rebuilt += self.rebuild(account_id, options["chunk_size"])
+
+        self.stdout.write(f"Rebuilt {rebuilt} daily rollups")
+
+    def rebuild(self, account_id, chunk_size):
+        """
+        Replace the rollups of one account, the account row stays locked so
+        no transaction is recorded while its history is read.
+        """
+        with transaction.atomic():
+            account = Account.objects.select_for_update().get(pk=account_id)
+
+            history = (
+                Transaction.objects.filter(
+                    Q(account_id=account_id) | Q(related_account_id=account_id)
+                )
+                .order_by("created_at", "id")
+                .iterator(chunk_size=chunk_size)
+            )
+            # transfers are made between accounts of one user, its blocks
+            # hold every archived transaction of the account
+            archived = (
+                trx
+                for trx in archived_transactions(
+                    ArchiveBlock.objects.filter(user_id=account.user_id)
+                )
+                if account_id in (trx.account_id, trx.related_account_id)
+            )
+
+            changes = RollupChanges()
+            balance = quantize_balance(0)
+            for trx in heapq.merge(archived, history, key=transaction_key):
+                day = timezone.localdate(trx.created_at)
+
+                if trx.account_id == account_id:
+                    changes.add(
+                        account,
+                        day,
+                        TOTAL_FIELDS[trx.transaction_type],
+                        trx.previous_balance,
+                        trx.new_balance,
+                    )
+                    balance = quantize_balance(trx.new_balance)
+
+                if trx.related_account_id == account_id:
+                    received = quantize_balance(
+                        convert_amount(trx.amount, trx.currency, account.currency)
+                    )
+                    changes.add(account, day, TRANSFERS_IN, balance, balance + received)
+                    balance += received
+
+            # the deltas of the ledger mode are rebuilt with the rollups
+            AccountDailyRollupDelta.objects.filter(account_id=account_id).delete()
+            AccountDailyRollup.objects.filter(account_id=account_id).delete()
+            rollups = AccountDailyRollup.objects.bulk_create(changes.build())
+
+        return len(rollups)
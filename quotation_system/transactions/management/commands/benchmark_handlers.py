@@ -0,0 +1,147 @@
+import asyncio
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from quotation_system.transactions.seeding import (
+    save_history,
+    seed_accounts,
+    seed_currencies,
+    seed_history,
+)
+from quotation_system.users.tokens import AccessToken
+
+# (label, sync url name, async url name)
+ENDPOINTS = {
+    "transactions": ("transaction-list-create", "async-transaction-list-create"),
+    "accounts": ("account-list", "async-account-list"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark of Django's request handlers: requests/second and p50/p99 "
+        "latency of the sync views behind the WSGI handler, the same views behind "
+        "the ASGI handler, and the async views behind the ASGI handler, all in "
+        "this process (test clients, no server, no network). It compares the "
+        "request paths only, not deployments: for WSGI vs ASGI, run `load_test "
+        "--base-url` against gunicorn and against uvicorn."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument(
+            "--endpoint", choices=sorted(ENDPOINTS), default="transactions"
+        )
+        parser.add_argument(
+            "--username",
+            default="benchmark",
+            help="User the requests are made as, created with some data if missing.",
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["username"])
+        headers = {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+        # the test clients send Host: testserver, allowed like the test runner does
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+        sync_name, async_name = ENDPOINTS[options["endpoint"]]
+
+        runs = [
+            ("wsgi + sync views", self.run_wsgi, reverse(sync_name)),
+            ("asgi + sync views", self.run_asgi, reverse(sync_name)),
+            ("asgi + async views", self.run_asgi, reverse(async_name)),
+        ]
+
+        self.stdout.write(
+            f"{options['requests']} requests, concurrency {options['concurrency']}"
+        )
+        self.stdout.write(f"{'path':<20} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+
+        for label, run, url in runs:
+            started = time.perf_counter()
+            latencies = run(url, headers, options["requests"], options["concurrency"])
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(self.format_row(label, latencies, elapsed))
+
+    def get_user(self, username):
+        """
+        The user of the requests. A missing one is created with 2 accounts
+        and 100 transactions seeded like `manage.py seed_load` does, so
+        balances, rollups and postings agree.
+        """
+        with transaction.atomic():
+            user, created = User.objects.get_or_create(username=username)
+            if created:
+                rng = random.Random(0)
+                seed_currencies(["USD"], rng)
+                accounts = seed_accounts([user], 2, ["USD"], rng)
+                transactions, changes, receivers = seed_history(accounts, 50, 30, rng)
+                save_history(accounts, transactions, [changes], receivers)
+        return user
+
+    def run_wsgi(self, url, headers, requests, concurrency):
+        def worker(count):
+            client = Client()
+            latencies = [
+                self.timed(lambda: client.get(url, headers=headers))
+                for _ in range(count)
+            ]
+            connections.close_all()
+            return latencies
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = executor.map(worker, self.shares(requests, concurrency))
+            return [latency for latencies in results for latency in latencies]
+
+    def run_asgi(self, url, headers, requests, concurrency):
+        async def worker(count):
+            client = AsyncClient()
+            latencies = []
+            for _ in range(count):
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append(self.measure(response, started))
+            return latencies
+
+        async def main():
+            results = await asyncio.gather(
+                *(worker(count) for count in self.shares(requests, concurrency))
+            )
+            return [latency for latencies in results for latency in latencies]
+
+        return asyncio.run(main())
+
+    def timed(self, request):
+        started = time.perf_counter()
+        return self.measure(request(), started)
+
+    def measure(self, response, started):
+        latency = time.perf_counter() - started
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code}: {response.content[:200]}")
+        return latency
+
+    def shares(self, requests, concurrency):
+        """
+        Requests made by each of the concurrent clients.
+        """
+        share, extra = divmod(requests, concurrency)
+        return [share + (index < extra) for index in range(concurrency)]
+
+    def format_row(self, label, latencies, elapsed):
+        percentiles = statistics.quantiles(latencies, n=100)
+        return (
+            f"{label:<20} {len(latencies) / elapsed:>10.1f} "
+            f"{percentiles[49] * 1000:>10.2f} {percentiles[98] * 1000:>10.2f}"
+        )
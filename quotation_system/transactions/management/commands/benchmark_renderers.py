@@ -0,0 +1,96 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from quotation_system.fastjson import ORJSONRenderer
+from quotation_system.transactions.models import Transaction
+from quotation_system.transactions.serializers import TransactionSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the render time of transaction list payloads with DRF's "
+        "JSONRenderer and the orjson renderer, and check both give the same "
+        "bytes. Payloads are built in memory, no database is used."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=lambda value: [int(size) for size in value.split(",")],
+            default=[1000, 10000],
+            help="Comma separated numbers of transactions per payload.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Renders per payload, best kept."
+        )
+
+    def handle(self, *args, **options):
+        renderers = [("json", JSONRenderer()), ("orjson", ORJSONRenderer())]
+
+        self.stdout.write(
+            f"{'transactions':>12} {'json ms':>10} {'orjson ms':>10} "
+            f"{'speedup':>8} {'identical':>10}"
+        )
+
+        for size in options["sizes"]:
+            payload = self.payload(size)
+
+            timings = {}
+            outputs = {}
+            for name, renderer in renderers:
+                timings[name], outputs[name] = self.best(
+                    renderer, payload, options["repeat"]
+                )
+
+            self.stdout.write(
+                f"{size:>12} {timings['json'] * 1000:>10.2f} "
+                f"{timings['orjson'] * 1000:>10.2f} "
+                f"{timings['json'] / timings['orjson']:>7.1f}x "
+                f"{'yes' if outputs['json'] == outputs['orjson'] else 'NO':>10}"
+            )
+
+    def payload(self, size):
+        """
+        A transaction list response of size transactions.
+        """
+        now = timezone.now()
+        transactions = [
+            Transaction(
+                id=index + 1,
+                user_id=1,
+                account_id=1,
+                related_account_id=2 if index % 3 == 0 else None,
+                transaction_type=Transaction.TRANSACTION_TYPES[index % 3][0],
+                amount=Decimal("10.25") + index,
+                currency="USD",
+                previous_balance=Decimal("1000.50") + index,
+                new_balance=Decimal("1010.75") + index,
+                description=f"payment {index}",
+                created_at=now - timedelta(seconds=index, microseconds=index),
+            )
+            for index in range(size)
+        ]
+
+        return {
+            "next": "http://testserver/api/transactions/?cursor=eyJwIjpbXX0",
+            "previous": None,
+            "results": TransactionSerializer(transactions, many=True).data,
+        }
+
+    def best(self, renderer, payload, repeat):
+        """
+        (fastest render time, output) of repeat renders.
+        """
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = renderer.render(payload, renderer.media_type)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best, output
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from quotation_system.transactions.ledger import checkpoint_balances
+from quotation_system.transactions.models import Posting
+from quotation_system.transactions.rollups import fold_rollup_deltas
+
+
+class Command(BaseCommand):
+    help = (
+        "Add a balance checkpoint to every account posted to since the last "
+        "run, so ledger balances only sum the postings made after it, and fold "
+        "the rollup deltas of the ledger mode into the daily rollups. Run it "
+        "periodically (e.g. every minute)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=settings.LEDGER_CHECKPOINT_DELAY,
+            help=(
+                "Seconds, postings (and rollup deltas) younger than this are "
+                "left in the tail: a posting committing after a checkpoint past "
+                "its id would be lost, so it must be longer than any database "
+                "transaction."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Accounts checkpointed (and rollup deltas folded) per query.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options["delay"])
+
+        folded = fold_rollup_deltas(cutoff, options["batch_size"])
+        self.stdout.write(f"Folded {folded} rollup deltas")
+
+        up_to = (
+            Posting.objects.filter(created_at__lte=cutoff)
+            .order_by("-id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if up_to is None:
+            self.stdout.write("No postings to checkpoint")
+            return
+
+        added = checkpoint_balances(up_to, options["batch_size"])
+        self.stdout.write(f"Added {added} balance checkpoints up to posting {up_to}")
@@ -0,0 +1,331 @@
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from quotation_system.metrics import opened_connections, pool_stats
+from quotation_system.transactions.seeding import username
+
+# operations of the traffic mix
+LOGIN = "login"
+LIST = "list"
+CREATE = "create"
+
+
+class ClientTransport:
+    """
+    Requests through Django's test client (the WSGI handler, in process).
+    """
+
+    name = "in-process"
+
+    def __init__(self):
+        # server errors are counted in the report, not raised
+        self.client = Client(raise_request_exception=False)
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"authorization": f"Bearer {token}"} if token else {}
+        response = self.client.generic(
+            method,
+            path,
+            json.dumps(data) if data is not None else "",
+            content_type="application/json",
+            headers=headers,
+        )
+
+        body = None
+        if response.get("Content-Type", "").startswith("application/json"):
+            body = response.json()
+        return response.status_code, body
+
+    def close(self):
+        connections.close_all()
+
+
+class HTTPTransport:
+    """
+    Requests to a live server.
+    """
+
+    def __init__(self, base_url):
+        self.name = base_url
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, data=None, token=None):
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method)
+        if body is not None:
+            request.add_header("Content-Type", "application/json")
+        if token:
+            request.add_header("Authorization", f"Bearer {token}")
+
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+    def close(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a mix of login, list and create (deposit) traffic as the users "
+        "created by seed_load, with concurrent workers, against the in-process "
+        "test client or a live server (--base-url). Prints throughput and "
+        "p50/p95/p99 latencies per endpoint as JSON, and in process the "
+        "database connections opened and the pool checkouts and waits "
+        "(compare DB_CONN_MAX_AGE=0, DB_CONN_MAX_AGE=60 and DB_POOL=True)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--mix",
+            default="login=1,list=6,create=3",
+            help="Relative weights of the operations, e.g. login=1,list=6,create=3.",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Server to load, e.g. http://localhost:8000. In process by default.",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            help="Number of seeded users, counted in the database by default.",
+        )
+        parser.add_argument("--prefix", default="load")
+        parser.add_argument("--password", default="load-test-password")
+        parser.add_argument("--seed", type=int, help="Random seed of the workers.")
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        mix = self.parse_mix(options["mix"])
+
+        users = options["users"]
+        if users is None:
+            users = User.objects.filter(username__startswith=options["prefix"]).count()
+        if not users:
+            raise CommandError("No seeded users, run seed_load first")
+
+        if options["base_url"]:
+            base_url = options["base_url"]
+            self.transport = lambda: HTTPTransport(base_url)
+            target = base_url
+        else:
+            # the test client sends Host: testserver, allowed like the test runner does
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+            self.transport = ClientTransport
+            target = ClientTransport.name
+
+        self.urls = {
+            LOGIN: reverse("login"),
+            LIST: reverse("transaction-list-create"),
+            CREATE: reverse("transaction-list-create"),
+            "accounts": reverse("account-list"),
+        }
+        self.options = options
+        self.usernames = [username(options["prefix"], index) for index in range(users)]
+
+        rng = random.Random(options["seed"])
+        shares = self.shares(options["requests"], options["concurrency"])
+
+        database_before = self.database_stats()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            results = list(
+                executor.map(
+                    self.worker,
+                    shares,
+                    [mix] * len(shares),
+                    [rng.random() for _ in shares],
+                )
+            )
+        elapsed = time.perf_counter() - started
+
+        samples = [sample for worker_samples in results for sample in worker_samples]
+        report = self.report(samples, elapsed, target)
+        if not options["base_url"]:
+            # a live server exposes them at /metrics
+            report["database"] = self.database_usage(database_before)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        self.stdout.write(output)
+
+    def parse_mix(self, value):
+        """
+        {operation: weight} of "login=1,list=6,create=3".
+        """
+        mix = {}
+        try:
+            for item in value.split(","):
+                operation, weight = item.split("=")
+                mix[operation.strip()] = float(weight)
+        except ValueError:
+            raise CommandError(f"Invalid --mix: {value}")
+
+        unknown = set(mix) - {LOGIN, LIST, CREATE}
+        if unknown or not any(mix.values()):
+            raise CommandError(f"Invalid --mix: {value}")
+
+        return mix
+
+    def shares(self, requests, concurrency):
+        """
+        Requests made by each of the concurrent workers.
+        """
+        share, extra = divmod(requests, concurrency)
+        return [
+            share + (index < extra)
+            for index in range(concurrency)
+            if share + (index < extra)
+        ]
+
+    def worker(self, count, mix, seed):
+        """
+        Log in as a random seeded user and make count requests (the login
+        included). Returns [(operation, status, seconds)].
+        """
+        rng = random.Random(seed)
+        transport = self.transport()
+        operations = list(mix)
+        weights = list(mix.values())
+        user = rng.choice(self.usernames)
+
+        samples = []
+
+        def timed(operation, method, path, data=None, token=None):
+            started = time.perf_counter()
+            status, body = transport.request(method, path, data, token)
+            samples.append((operation, status, time.perf_counter() - started))
+            return status, body
+
+        def login():
+            status, body = timed(
+                LOGIN,
+                "POST",
+                self.urls[LOGIN],
+                {"username": user, "password": self.options["password"]},
+            )
+            if status != 200:
+                raise CommandError(f"Login failed for {user}: {status}")
+            return body["access"]
+
+        try:
+            token = login()
+            # the accounts deposits go to, not part of the measured traffic
+            _, body = transport.request("GET", self.urls["accounts"], token=token)
+            accounts = [
+                (account["id"], account["currency"]) for account in body["results"]
+            ]
+
+            for _ in range(count - 1):
+                operation = rng.choices(operations, weights)[0]
+
+                if operation == LOGIN:
+                    token = login()
+                elif operation == LIST:
+                    timed(LIST, "GET", self.urls[LIST], token=token)
+                elif accounts:
+                    account, currency = rng.choice(accounts)
+                    timed(
+                        CREATE,
+                        "POST",
+                        self.urls[CREATE],
+                        {
+                            "account": account,
+                            "transaction_type": "deposit",
+                            "amount": f"{rng.randint(100, 10000) / 100:.2f}",
+                            "currency": currency,
+                        },
+                        token=token,
+                    )
+        finally:
+            transport.close()
+
+        return samples
+
+    def report(self, samples, elapsed, target):
+        by_operation = defaultdict(list)
+        errors = defaultdict(int)
+        for operation, status, latency in samples:
+            by_operation[operation].append(latency)
+            if status >= 400:
+                errors[operation] += 1
+
+        endpoints = {}
+        for operation, latencies in sorted(by_operation.items()):
+            latencies.sort()
+            endpoints[operation] = {
+                "requests": len(latencies),
+                "errors": errors[operation],
+                "throughput_rps": round(len(latencies) / elapsed, 2),
+                "p50_ms": self.percentile(latencies, 50),
+                "p95_ms": self.percentile(latencies, 95),
+                "p99_ms": self.percentile(latencies, 99),
+            }
+
+        return {
+            "target": target,
+            "concurrency": self.options["concurrency"],
+            "requests": len(samples),
+            "errors": sum(errors.values()),
+            "duration_s": round(elapsed, 3),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+    def database_stats(self):
+        return {
+            "connections_opened": opened_connections(),
+            "pools": pool_stats(),
+        }
+
+    def database_usage(self, before):
+        """
+        Connections opened and pool usage since the stats before.
+        """
+        after = self.database_stats()
+
+        pools = {}
+        for alias, stats in after["pools"].items():
+            previous = before["pools"].get(alias, {})
+
+            def delta(key):
+                return stats.get(key, 0) - previous.get(key, 0)
+
+            pools[alias] = {
+                "checkouts": delta("requests_num"),
+                "wait_ms": delta("requests_wait_ms"),
+                "errors": delta("requests_errors"),
+                "max_size": stats["pool_max"],
+            }
+
+        return {
+            "conn_max_age": settings.DATABASES["default"]["CONN_MAX_AGE"],
+            "connections_opened": after["connections_opened"]
+            - before["connections_opened"],
+            "pools": pools,
+        }
+
+    def percentile(self, latencies, percent):
+        """
+        Nearest-rank percentile of sorted latencies, in milliseconds.
+        """
+        rank = max(0, -(-len(latencies) * percent // 100) - 1)
+        return round(latencies[int(rank)] * 1000, 2)
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from quotation_system.transactions.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete idempotency keys older than settings.IDEMPOTENCY_KEY_TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Rows deleted per query, keeps each delete short.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+        expired = IdempotencyKey.objects.filter(created_at__lt=cutoff)
+
+        deleted = 0
+        while True:
+            # ^ uses the created_at index, one DELETE per batch
+            pks = list(expired.values_list("pk", flat=True)[: options["batch_size"]])
+            if not pks:
+                break
+
+            deleted += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
+
+        self.stdout.write(f"Deleted {deleted} expired idempotency keys")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from quotation_system.transactions.ledger import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the ledger balances to Account.balance, which is not updated in "
+        "ledger mode. Run it with the writers stopped, before switching "
+        "TRANSACTIONS_BALANCE_UPDATE_MODE from ledger to another mode."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Accounts compared with the ledger per query.",
+        )
+
+    def handle(self, *args, **options):
+        updated = rebuild_balances(options["batch_size"])
+        self.stdout.write(f"Updated the balance of {updated} accounts")
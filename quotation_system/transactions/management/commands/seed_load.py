@@ -0,0 +1,65 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quotation_system.transactions.seeding import CURRENCY_VALUES, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate load test data: users (all with the same password), their "
+        "accounts, currencies with a rate for every pair and transaction "
+        "histories with daily rollups. Users that already exist are skipped, "
+        "so running it again only adds the missing ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--accounts-per-user", type=int, default=2)
+        parser.add_argument("--transactions-per-account", type=int, default=100)
+        parser.add_argument(
+            "--currencies",
+            nargs="+",
+            default=["USD", "EUR", "GBP"],
+            choices=sorted(CURRENCY_VALUES),
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Histories are spread over this many past days.",
+        )
+        parser.add_argument("--prefix", default="load", help="Prefix of the usernames.")
+        parser.add_argument("--password", default="load-test-password")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Transactions written per database transaction.",
+        )
+        parser.add_argument(
+            "--seed", type=int, help="Random seed, for a reproducible dataset."
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1")
+
+        started = time.perf_counter()
+        users, accounts, transactions = seed(
+            users=options["users"],
+            accounts_per_user=options["accounts_per_user"],
+            transactions_per_account=options["transactions_per_account"],
+            codes=options["currencies"],
+            days=options["days"],
+            prefix=options["prefix"],
+            password=options["password"],
+            batch_size=options["batch_size"],
+            rng=random.Random(options["seed"]),
+        )
+
+        self.stdout.write(
+            f"Seeded {users} users, {accounts} accounts and {transactions} "
+            f"transactions in {time.perf_counter() - started:.1f}s"
+        )
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from quotation_system.transactions import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Manage the monthly partitions of the transactions table (PostgreSQL): "
+        "convert the table once with --convert, then run regularly to create "
+        "the coming months and detach the months past the retention."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Turn the table into a partitioned table first (once).",
+        )
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.TRANSACTIONS_PARTITION_AHEAD_MONTHS,
+            help="Months after the current one that must have a partition.",
+        )
+        parser.add_argument(
+            "--retain-months",
+            type=int,
+            default=settings.TRANSACTIONS_PARTITION_RETAIN_MONTHS,
+            help="Detach partitions ending more than this many months ago.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the statements without running them.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning is only supported on PostgreSQL")
+        if connection.in_atomic_block:
+            # CREATE INDEX CONCURRENTLY and DETACH PARTITION ... CONCURRENTLY
+            raise CommandError("transaction_partitions cannot run in a transaction")
+
+        self.dry_run = options["dry_run"]
+        this_month = partitioning.month_start(timezone.now())
+
+        if not partitioning.is_partitioned(connection):
+            if not options["convert"]:
+                raise CommandError("The table is not partitioned, run with --convert")
+
+            self.convert(partitioning.add_months(this_month, 1))
+            if self.dry_run:
+                # the partitions depend on the conversion that did not run
+                return
+
+        self.create_partitions(this_month, options["ahead"])
+
+        if options["retain_months"] is not None:
+            self.detach_partitions(
+                partitioning.add_months(this_month, -options["retain_months"])
+            )
+
+    def convert(self, first_month):
+        """
+        The current table becomes the partition of everything before
+        first_month (next month), so the rows written meanwhile still fit.
+        """
+        for statement in partitioning.prepare_conversion_sql(first_month):
+            self.run(statement)
+
+        index_names = partitioning.index_names(connection)
+        with transaction.atomic():
+            for statement in partitioning.conversion_sql(index_names, first_month):
+                self.run(statement)
+
+    def create_partitions(self, this_month, ahead):
+        # months before the last upper bound are already covered
+        bounds = [upper for _, upper in partitioning.list_partitions(connection)]
+        month = max(
+            [partitioning.month_start(upper) for upper in bounds if upper]
+            + [this_month]
+        )
+
+        last_month = partitioning.add_months(this_month, ahead)
+        while month <= last_month:
+            self.run(partitioning.create_partition_sql(month))
+            month = partitioning.add_months(month, 1)
+
+    def detach_partitions(self, cutoff):
+        cutoff = partitioning.bound(cutoff)
+
+        for name, upper in partitioning.list_partitions(connection):
+            if upper is not None and upper.isoformat() <= cutoff:
+                self.run(partitioning.detach_partition_sql(name))
+
+    def run(self, statement):
+        self.stdout.write(f"{statement};")
+
+        if not self.dry_run:
+            with connection.cursor() as cursor:
+                cursor.execute(statement)
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def checkpoint_current_balances(apps, schema_editor):
+    """
+    The ledger of the existing accounts starts from their balance column.
+    """
+    Account = apps.get_model("accounts", "Account")
+    BalanceCheckpoint = apps.get_model("transactions", "BalanceCheckpoint")
+    db = schema_editor.connection.alias
+
+    accounts = Account.objects.using(db).exclude(balance=0).values_list("pk", "balance")
+    checkpoints = (
+        BalanceCheckpoint(account_id=pk, posting_id=0, balance=balance)
+        for pk, balance in accounts.iterator()
+    )
+    BalanceCheckpoint.objects.using(db).bulk_create(checkpoints, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_account_number_allocator"),
+        ("transactions", "0008_archiveblock"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BalanceCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("posting_id", models.BigIntegerField()),
+                ("balance", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_checkpoints",
+                        to="accounts.account",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("account", "posting_id")},
+            },
+        ),
+        migrations.CreateModel(
+            name="Posting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("transaction_id", models.BigIntegerField()),
+                (
+                    "side",
+                    models.CharField(
+                        choices=[("debit", "Debit"), ("credit", "Credit")], max_length=6
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="postings",
+                        to="accounts.account",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["account", "id"], name="posting_account_id_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(checkpoint_current_balances, migrations.RunPython.noop),
+    ]
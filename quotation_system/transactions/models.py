@@ -1,4 +1,5 @@
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
 from django.db import models
 
@@ -31,5 +32,206 @@ class Transaction(models.Model):
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # list view: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="trx_user_created_idx"
+            ),
+            # history of one account in time order
+            models.Index(
+                fields=["account", "created_at"], name="trx_account_created_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} - {self.currency} - {self.previous_balance} - {self.new_balance} - {self.description}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response of the first successful request sent with an Idempotency-Key header.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="idempotency_keys"
+    )
+    key = models.CharField(max_length=255)
+    # hash of the request the key was first used with
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return f"{self.user_id} - {self.key} - {self.response_status}"
+
+
+class AccountDailyRollup(models.Model):
+    """
+    Totals of the transactions of one account in one day, in the account currency.
+    Updated by every transaction write in the same database transaction
+    (see transactions/rollups.py), through AccountDailyRollupDelta in ledger
+    mode, rebuilt with `manage.py backfill_daily_rollups`.
+    """
+
+    account = models.ForeignKey(
+        "accounts.Account", on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    currency = models.CharField(max_length=3)
+    day = models.DateField()
+    deposits = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    withdrawals = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transfers_in = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transfers_out = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.PositiveIntegerField(default=0)
+    # balance before the first and after the last transaction of the day
+    opening_balance = models.DecimalField(max_digits=10, decimal_places=2)
+    closing_balance = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        # ^ also the index of the statement: WHERE account_id = ? AND day BETWEEN
+        unique_together = ("account", "day", "currency")
+
+    def __str__(self):
+        return (
+            f"{self.account_id} - {self.day} - {self.currency} - {self.closing_balance}"
+        )
+
+
+class AccountDailyRollupDelta(models.Model):
+    """
+    Changes of the daily rollup of an account made by one database
+    transaction in ledger mode: rollups are not updated by the writes, their
+    changes are inserted here and folded into AccountDailyRollup by
+    `manage.py checkpoint_balances` (see transactions/rollups.py).
+    """
+
+    account = models.ForeignKey(
+        "accounts.Account", on_delete=models.CASCADE, related_name="rollup_deltas"
+    )
+    currency = models.CharField(max_length=3)
+    day = models.DateField()
+    deposits = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    withdrawals = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transfers_in = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transfers_out = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.PositiveIntegerField(default=0)
+    opening_balance = models.DecimalField(max_digits=10, decimal_places=2)
+    closing_balance = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # statement: WHERE account_id = ? ORDER BY id
+            models.Index(fields=["account", "id"], name="rollup_delta_account_id_idx"),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.account_id} - {self.day} - {self.currency} - {self.closing_balance}"
+        )
+
+
+class ArchiveBlock(models.Model):
+    """
+    Transactions of one account moved out of the transactions table by
+    `manage.py archive_transactions`: a gzip member of an append-only segment
+    file, at offset (length bytes) in TRANSACTIONS_ARCHIVE_DIR / segment.
+    See transactions/archive.py.
+    """
+
+    account = models.ForeignKey(
+        "accounts.Account", on_delete=models.CASCADE, related_name="archive_blocks"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="archive_blocks"
+    )
+    segment = models.CharField(max_length=255)
+    offset = models.PositiveBigIntegerField()
+    length = models.PositiveBigIntegerField()
+    transaction_count = models.PositiveIntegerField()
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    # previous_balance of the first and new_balance of the last transaction
+    opening_balance = models.DecimalField(max_digits=10, decimal_places=2)
+    closing_balance = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # detail view: WHERE user_id = ? AND first_id <= pk AND last_id >= pk
+            models.Index(fields=["user", "first_id"], name="archive_user_first_id_idx"),
+            # list view: blocks overlapping a page of the history
+            models.Index(
+                fields=["user", "last_created_at"], name="archive_user_last_at_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.account_id} - {self.segment} - {self.offset}"
+            f" - {self.transaction_count}"
+        )
+
+
+class Posting(models.Model):
+    """
+    One side of a balance change, in the account currency: a deposit is a
+    credit, a withdrawal a debit and a transfer a debit of the sender and a
+    credit of the receiver. Postings are only inserted, see
+    transactions/ledger.py.
+    """
+
+    DEBIT = "debit"
+    CREDIT = "credit"
+    SIDES = [(DEBIT, "Debit"), (CREDIT, "Credit")]
+
+    account = models.ForeignKey(
+        "accounts.Account", on_delete=models.CASCADE, related_name="postings"
+    )
+    # not a foreign key: transactions may be archived or live in partitions
+    transaction_id = models.BigIntegerField()
+    side = models.CharField(max_length=6, choices=SIDES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # balances: WHERE account_id = ? AND id > <checkpoint>
+            models.Index(fields=["account", "id"], name="posting_account_id_idx"),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.account_id} - {self.side} - {self.amount} - {self.transaction_id}"
+        )
+
+
+class BalanceCheckpoint(models.Model):
+    """
+    Balance of an account after its postings up to posting_id, written by
+    `manage.py checkpoint_balances`. The balance of the account is the one
+    of its latest checkpoint plus the postings after it.
+    """
+
+    account = models.ForeignKey(
+        "accounts.Account",
+        on_delete=models.CASCADE,
+        related_name="balance_checkpoints",
+    )
+    # last posting included in the balance, 0 before the first one
+    posting_id = models.BigIntegerField()
+    balance = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("account", "posting_id")
+
+    def __str__(self):
+        return f"{self.account_id} - {self.posting_id} - {self.balance}"
@@ -0,0 +1,225 @@
+"""
+Monthly range partitioning of transactions_transaction by created_at (PostgreSQL).
+
+The table keeps its name, so the ORM does not notice it is partitioned.
+The primary key becomes (id, created_at) because PostgreSQL requires the
+partition key in every unique index; id still comes from a single sequence
+and stays unique. Queries filtered on created_at only scan the partitions of
+that range, and every partition has its own (small) indexes.
+
+Rows are only accepted for months that have a partition, so
+`manage.py transaction_partitions` has to run ahead of time (e.g. daily
+from cron) to create the coming months.
+
+Costs of the composite primary key:
+- lookups by id alone (TransactionDetailView.get_object, and the miss that
+  sends a read to find_archived) cannot be pruned, every attached partition
+  is probed through its (id, created_at) index: detaching old months keeps
+  that number bounded.
+- CREATE INDEX CONCURRENTLY is refused on a partitioned table, the
+  AddIndexConcurrently migration operation builds the index partition by
+  partition instead (see migration_operations.py).
+
+Both the conversion and DETACH PARTITION ... CONCURRENTLY run outside a
+transaction, the command refuses to run inside one.
+"""
+
+import re
+from datetime import date, datetime, timezone
+
+from .models import Transaction
+
+TABLE = Transaction._meta.db_table
+# the table as it was before the conversion, attached as the first partition
+LEGACY_TABLE = f"{TABLE}_legacy"
+ID_SEQUENCE = f"{TABLE}_id_partitioned_seq"
+
+# upper bound of a partition in pg_get_expr(relpartbound)
+UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def bound(month):
+    """
+    Partition bound of the first instant of month (UTC).
+    """
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def create_partition_sql(month):
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{bound(month)}') TO ('{bound(add_months(month, 1))}')"
+    )
+
+
+def detach_partition_sql(name):
+    # ^ CONCURRENTLY only takes a SHARE UPDATE EXCLUSIVE lock on the table,
+    # it cannot run inside a transaction block. An interrupted detach leaves
+    # the partition pending, ALTER TABLE ... DETACH PARTITION ... FINALIZE
+    # completes it
+    return f"ALTER TABLE {TABLE} DETACH PARTITION {name} CONCURRENTLY"
+
+
+def parse_upper_bound(expression):
+    """
+    Upper bound (a datetime) of a partition bound expression, None for
+    MAXVALUE or a default partition.
+    """
+    match = UPPER_BOUND.search(expression)
+    if match is None:
+        return None
+
+    return datetime.fromisoformat(match.group(1))
+
+
+def is_partitioned(connection, table=TABLE):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+            [table],
+        )
+        row = cursor.fetchone()
+
+    # "p" is a partitioned table
+    return row is not None and row[0] == "p"
+
+
+def list_partitions(connection, table=TABLE):
+    """
+    Returns [(name, upper bound)] of the attached partitions of table, oldest
+    first.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [table],
+        )
+        partitions = [
+            (name, parse_upper_bound(expression))
+            for name, expression in cursor.fetchall()
+        ]
+
+    return sorted(partitions, key=lambda partition: partition[1] or datetime.max)
+
+
+def index_names(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s",
+            [TABLE],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def prepare_conversion_sql(first_month):
+    """
+    Statements run before the conversion, outside a transaction: they build
+    what the legacy table needs to become a partition without holding a lock
+    that blocks writes.
+    """
+    return [
+        # unique index matching the new primary key (id, created_at)
+        f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {TABLE}_id_created_uniq "
+        f"ON {TABLE} (id, created_at)",
+        # ATTACH PARTITION skips its validation scan when a valid
+        # constraint already proves the bound
+        f"ALTER TABLE {TABLE} DROP CONSTRAINT IF EXISTS {TABLE}_legacy_bound",
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_legacy_bound "
+        f"CHECK (created_at < '{bound(first_month)}') NOT VALID",
+        f"ALTER TABLE {TABLE} VALIDATE CONSTRAINT {TABLE}_legacy_bound",
+    ]
+
+
+def conversion_sql(index_names, first_month):
+    """
+    Statements turning the table into a partitioned one, run in a single
+    transaction. The legacy table keeps every existing row and becomes the
+    partition of everything before first_month, so no row is copied.
+    index_names are the indexes of the table, renamed to free their names.
+    """
+    statements = [
+        f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE",
+        f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}",
+    ]
+    statements += [
+        f"ALTER INDEX {name} RENAME TO {legacy_name(name)}" for name in index_names
+    ]
+    statements += [
+        # same columns, defaults and NOT NULLs, no identity (not supported on
+        # partitioned tables before PostgreSQL 17): ids come from a sequence
+        f"CREATE TABLE {TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE (created_at)",
+        f"CREATE SEQUENCE IF NOT EXISTS {ID_SEQUENCE} OWNED BY {TABLE}.id",
+        f"SELECT setval('{ID_SEQUENCE}', COALESCE(MAX(id), 0) + 1, false) "
+        f"FROM {LEGACY_TABLE}",
+        f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{ID_SEQUENCE}')",
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, created_at)",
+        # a partition cannot have an identity column, its ids now come from
+        # the sequence set above
+        f"ALTER TABLE {LEGACY_TABLE} ALTER COLUMN id DROP IDENTITY IF EXISTS",
+    ]
+    statements += foreign_keys_sql() + indexes_sql()
+    statements += [
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY_TABLE} "
+        f"FOR VALUES FROM (MINVALUE) TO ('{bound(first_month)}')",
+    ]
+    return statements
+
+
+def foreign_keys_sql():
+    statements = []
+    for field in Transaction._meta.concrete_fields:
+        if not field.is_relation:
+            continue
+
+        target = field.related_model._meta
+        statements.append(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_{field.column}_fk "
+            f"FOREIGN KEY ({field.column}) "
+            f"REFERENCES {target.db_table} ({target.pk.column}) "
+            f"DEFERRABLE INITIALLY DEFERRED"
+        )
+    return statements
+
+
+def indexes_sql():
+    """
+    Indexes of the model, created on the partitioned table so every partition
+    gets them. Equivalent indexes of the legacy table are attached, not built.
+    """
+    statements = [
+        f"CREATE INDEX {TABLE}_{field.column}_idx ON {TABLE} ({field.column})"
+        for field in Transaction._meta.concrete_fields
+        if field.is_relation and field.db_index
+    ]
+
+    for index in Transaction._meta.indexes:
+        columns = ", ".join(
+            f"{Transaction._meta.get_field(name.lstrip('-')).column}"
+            f"{' DESC' if name.startswith('-') else ''}"
+            for name in index.fields
+        )
+        statements.append(f"CREATE INDEX {index.name} ON {TABLE} ({columns})")
+
+    return statements
+
+
+def legacy_name(name):
+    # identifiers are at most 63 characters
+    return f"{name[:56]}_legacy"
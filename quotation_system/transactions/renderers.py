@@ -0,0 +1,86 @@
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from rest_framework.renderers import BaseRenderer
+
+
+class Echo:
+    """
+    File-like object returning what is written, lets csv.writer build one line.
+    """
+
+    def write(self, value):
+        return value
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Renders rows one line at a time.
+    stream() feeds a StreamingHttpResponse, render() is used for a list of dicts.
+    """
+
+    charset = "utf-8"
+
+    def stream(self, fields, rows):
+        """
+        Yields the encoded lines of rows (tuples ordered like fields).
+        """
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not data:
+            return b""
+
+        fields = list(data[0])
+        rows = ([item[field] for field in fields] for item in data)
+        return b"".join(self.stream(fields, rows))
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def stream(self, fields, rows):
+        writer = csv.writer(Echo())
+
+        yield writer.writerow(fields).encode(self.charset)
+        for row in rows:
+            yield writer.writerow([represent(value) for value in row]).encode(
+                self.charset
+            )
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """
+    One JSON object per line (application/x-ndjson).
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def stream(self, fields, rows):
+        for row in rows:
+            line = json.dumps(
+                {field: represent(value) for field, value in zip(fields, row)},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            yield f"{line}\n".encode(self.charset)
+
+
+def represent(value):
+    """
+    A value as the JSON API shows it: decimals as strings and ISO 8601
+    datetimes ending in Z.
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+
+    if isinstance(value, datetime):
+        value = value.isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+
+    return value
@@ -0,0 +1,95 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE codes of errors that succeed when the transaction is run again
+RETRYABLE_SQLSTATES = {
+    "40P01": "deadlock",
+    "40001": "serialization_failure",
+}
+
+
+class RetryStats:
+    """
+    Process wide counters of retried database transactions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def increment(self, name, reason):
+        with self._lock:
+            self._counts[(name, reason)] += 1
+
+    def snapshot(self):
+        """
+        Returns {(counter, reason): value}, counters are
+        "retries" (attempts run again) and "exhausted" (gave up after the last attempt).
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+retry_stats = RetryStats()
+
+
+def retry_reason(error):
+    """
+    Returns the retry reason of a database error, or None if it is not retryable.
+    """
+    # psycopg errors carry the SQLSTATE, SQLite errors do not
+    sqlstate = getattr(error.__cause__, "sqlstate", None)
+
+    return RETRYABLE_SQLSTATES.get(sqlstate)
+
+
+def run_with_retry(func):
+    """
+    Run func (which opens its own transaction.atomic() block) and run it again
+    when the database aborts it with a deadlock or serialization failure.
+    Waits a random (full jitter) exponential backoff between attempts so the
+    competing transactions do not collide again.
+
+    Nothing is retried inside an outer atomic block: the error belongs to the
+    outer transaction, which has to be rolled back by its owner.
+    """
+    max_attempts = settings.TRANSACTIONS_RETRY_MAX_ATTEMPTS
+    can_retry = not connection.in_atomic_block
+
+    attempt = 1
+    while True:
+        try:
+            return func()
+        except DatabaseError as e:
+            reason = retry_reason(e)
+            if reason is None or not can_retry:
+                raise
+
+            if attempt >= max_attempts:
+                retry_stats.increment("exhausted", reason)
+                logger.warning(
+                    "Transaction failed with %s after %s attempts", reason, attempt
+                )
+                raise
+
+            retry_stats.increment("retries", reason)
+
+            delay = min(
+                settings.TRANSACTIONS_RETRY_MAX_DELAY,
+                settings.TRANSACTIONS_RETRY_BASE_DELAY * 2 ** (attempt - 1),
+            )
+            time.sleep(random.uniform(0, delay))
+
+            attempt += 1
@@ -0,0 +1,281 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .ledger import balances, ledger_mode
+from .models import AccountDailyRollup, AccountDailyRollupDelta, Transaction
+from .services import quantize_balance
+
+# rollup column of the balance change of the account a transaction was made on
+TOTAL_FIELDS = {
+    Transaction.TRANSACTION_TYPES[0][0]: "deposits",
+    Transaction.TRANSACTION_TYPES[1][0]: "withdrawals",
+    Transaction.TRANSACTION_TYPES[2][0]: "transfers_out",
+}
+# rollup column of the receiver of a transfer
+TRANSFERS_IN = "transfers_in"
+
+AMOUNT_FIELDS = ("deposits", "withdrawals", "transfers_in", "transfers_out")
+# columns a later change of the same day adds to
+SUMMED_FIELDS = AMOUNT_FIELDS + ("transaction_count",)
+
+
+class RollupChanges:
+    """
+    Balance changes of the accounts touched by one database transaction,
+    grouped by (account, day) so each daily rollup is written once.
+
+    In ledger mode no rollup is updated by the writes: the changes are
+    inserted as AccountDailyRollupDelta rows, added to the statements when
+    they are read and folded into the rollups by fold_rollup_deltas().
+    """
+
+    def __init__(self):
+        # {(account_id, currency, day): row}, in the order they were added
+        self._rows = {}
+
+    def add(self, account, day, field, previous_balance, new_balance):
+        """
+        One transaction moved the balance of account from previous_balance
+        to new_balance, the amount goes to the rollup column field.
+        """
+        previous_balance = quantize_balance(previous_balance)
+        new_balance = quantize_balance(new_balance)
+
+        key = (account.pk, account.currency, day)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = dict.fromkeys(AMOUNT_FIELDS, 0)
+            row.update(transaction_count=0, opening_balance=previous_balance)
+
+        row[field] += abs(new_balance - previous_balance)
+        row["transaction_count"] += 1
+        row["closing_balance"] = new_balance
+
+    def merge(self, rollup):
+        """
+        Add a rollup or a rollup delta, made after the changes already added.
+        """
+        key = (rollup.account_id, rollup.currency, rollup.day)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = dict.fromkeys(SUMMED_FIELDS, 0)
+            row["opening_balance"] = rollup.opening_balance
+
+        for field in SUMMED_FIELDS:
+            row[field] += getattr(rollup, field)
+        row["closing_balance"] = rollup.closing_balance
+
+    def add_transaction(
+        self,
+        trx,
+        receiver=None,
+        receiver_previous_balance=None,
+        receiver_new_balance=None,
+    ):
+        """
+        Add a saved transaction, receiver is the account credited by a transfer
+        (its new balance defaults to receiver.balance).
+        """
+        day = timezone.localdate(trx.created_at)
+
+        self.add(
+            trx.account,
+            day,
+            TOTAL_FIELDS[trx.transaction_type],
+            trx.previous_balance,
+            trx.new_balance,
+        )
+
+        if receiver is not None:
+            self.add(
+                receiver,
+                day,
+                TRANSFERS_IN,
+                receiver_previous_balance,
+                (
+                    receiver.balance
+                    if receiver_new_balance is None
+                    else receiver_new_balance
+                ),
+            )
+
+    def build(self, model=AccountDailyRollup):
+        """
+        Returns the unsaved rollups (or rollup deltas), for accounts that
+        have none yet.
+        """
+        return [
+            model(account_id=account_id, currency=currency, day=day, **row)
+            for (account_id, currency, day), row in self._rows.items()
+        ]
+
+    def save(self):
+        """
+        Add the changes to the stored rollups, or insert them as rollup
+        deltas in ledger mode.
+        """
+        if ledger_mode():
+            AccountDailyRollupDelta.objects.bulk_create(
+                self.build(AccountDailyRollupDelta)
+            )
+            return
+
+        self.apply()
+
+    def apply(self):
+        """
+        Add the changes to the stored rollups, one UPDATE per (account, day)
+        and an INSERT for the first transaction of the day.
+        """
+        for (account_id, currency, day), row in self._rows.items():
+            rollup = AccountDailyRollup.objects.filter(
+                account_id=account_id, currency=currency, day=day
+            )
+            increments = {field: F(field) + row[field] for field in SUMMED_FIELDS}
+
+            if rollup.update(**increments, closing_balance=row["closing_balance"]):
+                continue
+
+            try:
+                with transaction.atomic():
+                    AccountDailyRollup.objects.create(
+                        account_id=account_id, currency=currency, day=day, **row
+                    )
+            except IntegrityError:
+                # created by a concurrent transaction in the meantime
+                rollup.update(**increments, closing_balance=row["closing_balance"])
+
+
+def record_transaction(trx, receiver=None, receiver_previous_balance=None):
+    """
+    Add one saved transaction to the daily rollups of its accounts.
+    Must run in the database transaction that saved it.
+    """
+    changes = RollupChanges()
+    changes.add_transaction(trx, receiver, receiver_previous_balance)
+    changes.save()
+
+
+def fold_rollup_deltas(cutoff, batch_size=1000):
+    """
+    Add the rollup deltas created before cutoff to the daily rollups, in id
+    order, and delete them. Returns the number of folded deltas.
+    Credits insert their deltas without locking the account, so a delta may
+    commit after a later one of the same account: like the postings of the
+    checkpoints, the deltas younger than the longest database transaction
+    are left for the next run.
+    """
+    folded = 0
+    while True:
+        with transaction.atomic():
+            deltas = list(
+                AccountDailyRollupDelta.objects.select_for_update()
+                .filter(created_at__lte=cutoff)
+                .order_by("id")[:batch_size]
+            )
+            if not deltas:
+                return folded
+
+            changes = RollupChanges()
+            for delta in deltas:
+                changes.merge(delta)
+            changes.apply()
+
+            AccountDailyRollupDelta.objects.filter(
+                pk__in=[delta.pk for delta in deltas]
+            ).delete()
+
+        folded += len(deltas)
+
+
+def pending_rollups(account):
+    """
+    {day: unsaved rollup} of the rollup deltas of account not folded yet.
+    """
+    changes = RollupChanges()
+    for delta in AccountDailyRollupDelta.objects.filter(
+        account=account, currency=account.currency
+    ).order_by("id"):
+        changes.merge(delta)
+
+    return {rollup.day: rollup for rollup in changes.build()}
+
+
+def with_pending(rollups, pending):
+    """
+    Stored rollups (of distinct days) with the pending rollups of their days
+    added, and the pending rollups of other days, ordered by day.
+    """
+    by_day = {rollup.day: rollup for rollup in rollups}
+    for day, rollup in pending.items():
+        stored = by_day.get(day)
+        if stored is None:
+            by_day[day] = rollup
+            continue
+
+        for field in SUMMED_FIELDS:
+            setattr(stored, field, getattr(stored, field) + getattr(rollup, field))
+        stored.closing_balance = rollup.closing_balance
+
+    return [by_day[day] for day in sorted(by_day)]
+
+
+def account_statement(account, start, end):
+    """
+    Totals of account between the days start and end (inclusive), read from
+    its daily rollups: the cost grows with the days, not the transactions.
+    """
+    rollups = AccountDailyRollup.objects.filter(
+        account=account, currency=account.currency
+    )
+    # deltas are only written in ledger mode
+    pending = pending_rollups(account) if ledger_mode() else {}
+
+    def pending_where(condition):
+        return {day: rollup for day, rollup in pending.items() if condition(day)}
+
+    days = with_pending(
+        rollups.filter(day__range=(start, end)).order_by("day"),
+        pending_where(lambda day: start <= day <= end),
+    )
+
+    if days:
+        opening_balance = days[0].opening_balance
+        closing_balance = days[-1].closing_balance
+    else:
+        # no activity in the period: the balance left by the last day before
+        # it, or the one found by the first day after it
+        before = with_pending(
+            rollups.filter(day__lt=start).order_by("-day")[:1],
+            pending_where(lambda day: day < start),
+        )
+        if before:
+            opening_balance = before[-1].closing_balance
+        else:
+            after = with_pending(
+                rollups.filter(day__gt=end).order_by("day")[:1],
+                pending_where(lambda day: day > end),
+            )
+            if after:
+                opening_balance = after[0].opening_balance
+            elif ledger_mode():
+                opening_balance = balances([account.pk])[account.pk]
+            else:
+                opening_balance = account.balance
+        closing_balance = opening_balance
+
+    totals = {
+        field: sum(getattr(day, field) for day in days) for field in SUMMED_FIELDS
+    }
+
+    return {
+        "account": account,
+        "currency": account.currency,
+        "from": start,
+        "to": end,
+        "opening_balance": opening_balance,
+        "closing_balance": closing_balance,
+        **totals,
+        "days": days,
+    }
@@ -0,0 +1,248 @@
+"""
+Synthetic data at production scale for load tests, see `manage.py seed_load`
+and `manage.py load_test`.
+
+Histories are generated with the same balance logic as the API
+(apply_transaction, convert_amount) and written with bulk queries, together
+with their daily rollups and ledger postings, so the seeded accounts are
+consistent: balances, previous_balance/new_balance chains, statements and
+ledger balances all agree.
+"""
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from quotation_system.accounts.models import Account
+from quotation_system.currencies.models import Currency, CurrencyRate
+
+from .ledger import postings_for
+from .models import AccountDailyRollup, Posting, Transaction
+from .rollups import RollupChanges
+from .services import apply_transaction, quantize_balance
+
+# approximate value in USD of the currencies that can be seeded
+CURRENCY_VALUES = {
+    "USD": ("US Dollar", Decimal("1")),
+    "EUR": ("Euro", Decimal("1.08")),
+    "GBP": ("Pound Sterling", Decimal("1.27")),
+    "CHF": ("Swiss Franc", Decimal("1.12")),
+    "CAD": ("Canadian Dollar", Decimal("0.74")),
+    "AUD": ("Australian Dollar", Decimal("0.66")),
+}
+
+# share of each transaction type in the generated histories
+TYPE_WEIGHTS = {
+    Transaction.TRANSACTION_TYPES[0][0]: 5,
+    Transaction.TRANSACTION_TYPES[1][0]: 3,
+    Transaction.TRANSACTION_TYPES[2][0]: 2,
+}
+
+
+def username(prefix, index):
+    return f"{prefix}{index:06d}"
+
+
+def seed_currencies(codes, rng):
+    """
+    Create the currencies and a rate for every pair of them, each value
+    moved by up to 5% from CURRENCY_VALUES.
+    """
+    values = {}
+    for code in codes:
+        name, value = CURRENCY_VALUES[code]
+        Currency.objects.update_or_create(code=code, defaults={"name": name})
+        values[code] = value * Decimal(str(rng.uniform(0.95, 1.05)))
+
+    currencies = Currency.objects.in_bulk(codes, field_name="code")
+    for base in codes:
+        for target in codes:
+            if base == target:
+                continue
+
+            CurrencyRate.objects.update_or_create(
+                base_currency=currencies[base],
+                target_currency=currencies[target],
+                defaults={"rate": round(values[base] / values[target], 6)},
+            )
+
+
+def seed_users(count, prefix, password):
+    """
+    Create the missing users prefix000000 ... (count of them), all with
+    password. Returns the created users.
+    """
+    names = [username(prefix, index) for index in range(count)]
+    existing = set(
+        User.objects.filter(username__in=names).values_list("username", flat=True)
+    )
+
+    # hashing is slow on purpose, every user gets the same hash
+    password = make_password(password)
+
+    return User.objects.bulk_create(
+        [
+            User(username=name, password=password)
+            for name in names
+            if name not in existing
+        ]
+    )
+
+
+def seed_accounts(users, per_user, codes, rng):
+    return Account.objects.bulk_create(
+        Account(user=user, currency=rng.choice(codes))
+        for user in users
+        for _ in range(per_user)
+    )
+
+
+def seed_history(accounts, per_account, days, rng):
+    """
+    Generate the transactions of the accounts of one user over the last days,
+    transfers go between the accounts of the user. Balances are updated in
+    memory. Returns (transactions, rollup changes, receivers), receivers has
+    the (receiver, previous balance, new balance) of every transfer and ()
+    for the other transactions.
+    """
+    now = timezone.now()
+    count = per_account * len(accounts)
+    created_at = sorted(
+        now - timedelta(seconds=rng.uniform(60, days * 86400)) for _ in range(count)
+    )
+
+    types = list(TYPE_WEIGHTS)
+    weights = list(TYPE_WEIGHTS.values())
+
+    transactions = []
+    changes = RollupChanges()
+    receivers = []
+    for value in created_at:
+        account = rng.choice(accounts)
+        transaction_type = rng.choices(types, weights)[0]
+
+        receiver = None
+        if transaction_type == Transaction.TRANSACTION_TYPES[2][0]:
+            others = [other for other in accounts if other is not account]
+            if others:
+                receiver = rng.choice(others)
+            else:
+                transaction_type = Transaction.TRANSACTION_TYPES[0][0]
+
+        # nothing to take from an empty account
+        if not account.balance:
+            transaction_type = Transaction.TRANSACTION_TYPES[0][0]
+            receiver = None
+
+        if transaction_type == Transaction.TRANSACTION_TYPES[0][0]:
+            amount = Decimal(rng.randint(1000, 50000)) / 100
+        else:
+            amount = max(
+                Decimal("0.01"),
+                quantize_balance(account.balance * Decimal(str(rng.uniform(0, 0.5)))),
+            )
+
+        data = {"amount": amount, "currency": account.currency}
+        receiver_previous_balance = receiver.balance if receiver else None
+        apply_transaction(transaction_type, data, account, receiver)
+
+        # keep the in-memory balances as the database stores them
+        account.balance = quantize_balance(account.balance)
+        data["new_balance"] = account.balance
+        if receiver is not None:
+            receiver.balance = quantize_balance(receiver.balance)
+
+        trx = Transaction(
+            user_id=account.user_id,
+            account=account,
+            related_account=receiver,
+            transaction_type=transaction_type,
+            description="load test",
+            created_at=value,
+            **data,
+        )
+        transactions.append(trx)
+        changes.add_transaction(trx, receiver, receiver_previous_balance)
+        receivers.append(
+            (receiver, receiver_previous_balance, receiver.balance) if receiver else ()
+        )
+
+    return transactions, changes, receivers
+
+
+def save_history(accounts, transactions, changes, receivers):
+    """
+    Write generated histories, changes is a list of RollupChanges.
+    """
+    # bulk_create() stamps created_at with the current time (auto_now_add),
+    # the generated times are written back once the rows have their ids
+    created_at = [trx.created_at for trx in transactions]
+
+    with transaction.atomic():
+        Transaction.objects.bulk_create(transactions)
+        for trx, value in zip(transactions, created_at):
+            trx.created_at = value
+        Transaction.objects.bulk_update(transactions, ["created_at"], batch_size=1000)
+        Posting.objects.bulk_create(
+            posting
+            for trx, receiver in zip(transactions, receivers)
+            for posting in postings_for(trx, *receiver)
+        )
+        Account.objects.bulk_update(accounts, ["balance"])
+        AccountDailyRollup.objects.bulk_create(
+            rollup for user_changes in changes for rollup in user_changes.build()
+        )
+
+
+def seed(
+    users,
+    accounts_per_user,
+    transactions_per_account,
+    codes,
+    days,
+    prefix,
+    password,
+    batch_size,
+    rng=None,
+):
+    """
+    Seed the users that do not exist yet, with their accounts and histories.
+    Returns the number of (users, accounts, transactions) created.
+    """
+    rng = rng or random.Random()
+
+    seed_currencies(codes, rng)
+    created_users = seed_users(users, prefix, password)
+    accounts = seed_accounts(created_users, accounts_per_user, codes, rng)
+
+    by_user = {}
+    for account in accounts:
+        by_user.setdefault(account.user_id, []).append(account)
+
+    transaction_count = 0
+    # histories are written batch_size transactions at a time
+    pending = ([], [], [], [])
+    for user_accounts in by_user.values():
+        transactions, changes, receivers = seed_history(
+            user_accounts, transactions_per_account, days, rng
+        )
+        transaction_count += len(transactions)
+
+        pending[0].extend(user_accounts)
+        pending[1].extend(transactions)
+        pending[2].append(changes)
+        pending[3].extend(receivers)
+
+        if len(pending[1]) >= batch_size:
+            save_history(*pending)
+            pending = ([], [], [], [])
+
+    if pending[0]:
+        save_history(*pending)
+
+    return len(created_users), len(accounts), transaction_count
@@ -1,9 +1,21 @@
+from django.conf import settings
 from rest_framework import serializers
 
+from quotation_system.fieldplans import FieldPlan
+from quotation_system.timing import timed
+
 from .models import Transaction
 
+# version of the representation of a transaction, part of the ETag of the
+# detail responses: change it when TransactionSerializer output changes
+TRANSACTION_REPRESENTATION_VERSION = 1
+
 
 class TransactionSerializer(serializers.ModelSerializer):
+    def is_valid(self, *args, **kwargs):
+        with timed("validate"):
+            return super().is_valid(*args, **kwargs)
+
     class Meta:
         model = Transaction
         fields = "__all__"
@@ -25,3 +37,72 @@ class TransactionSerializer(serializers.ModelSerializer):
                     {"currency": "Required for deposit and withdrawal"}
                 )
             return attrs
+
+
+# list responses, built from values() rows (see fieldplans.py)
+transaction_plan = FieldPlan(TransactionSerializer)
+
+
+class TransactionBatchItemSerializer(TransactionSerializer):
+    """
+    Validates one item of a batch request.
+    Accounts are taken as plain ids so validating N items does not run N
+    account queries, ownership is checked later when the accounts get locked.
+    """
+
+    account = serializers.IntegerField()
+    related_account = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if attrs["transaction_type"] != Transaction.TRANSACTION_TYPES[2][
+            0
+        ] and not attrs.get("currency"):
+            raise serializers.ValidationError(
+                {"currency": "Required for deposit and withdrawal"}
+            )
+        return attrs
+
+
+class TransactionBatchSerializer(serializers.Serializer):
+    ATOMIC = "atomic"
+    BEST_EFFORT = "best_effort"
+
+    mode = serializers.ChoiceField(
+        choices=[ATOMIC, BEST_EFFORT], default=ATOMIC, required=False
+    )
+    transactions = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.TRANSACTIONS_BATCH_MAX_SIZE,
+    )
+
+
+class DateRangeSerializer(serializers.Serializer):
+    """
+    Inclusive ?from=&to= dates of a query.
+    """
+
+    dates_required = False
+
+    def get_fields(self):
+        # "from" is a python keyword, so the fields are not class attributes
+        return {
+            "from": serializers.DateField(required=self.dates_required),
+            "to": serializers.DateField(required=self.dates_required),
+        }
+
+    def validate(self, attrs):
+        if "from" in attrs and "to" in attrs and attrs["from"] > attrs["to"]:
+            raise serializers.ValidationError({"to": "Must not be before from"})
+        return attrs
+
+
+class TransactionExportSerializer(DateRangeSerializer):
+    """
+    Query parameters of the transaction export: ?from=&to=&account=
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["account"] = serializers.IntegerField(required=False)
+        return fields
@@ -0,0 +1,195 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import connection
+from django.utils import timezone
+from rest_framework import serializers
+
+from quotation_system.accounts.models import Account
+from quotation_system.metrics import insufficient_balance, waiting_for_lock
+
+from ..currencies.utils import convert_amount
+from .models import Transaction
+
+# balances are stored with 2 decimal places (see Account.balance)
+BALANCE_QUANTUM = Decimal("0.01")
+
+
+def quantize_balance(value):
+    """
+    Round a balance the way the database stores it.
+    """
+    # ^ str() keeps floats returned by SQLite from leaking binary noise
+    return Decimal(str(value)).quantize(BALANCE_QUANTUM, rounding=ROUND_HALF_UP)
+
+
+def lock_accounts(user, account_ids):
+    """
+    Lock every account in account_ids (owned by user) with a single query.
+    Rows are locked in primary key order so concurrent callers never deadlock.
+    Returns a dict of {account_id: account}.
+    """
+    account_ids = sorted({pk for pk in account_ids if pk is not None})
+
+    accounts = Account.objects.select_for_update().filter(
+        user_id=user.pk, pk__in=account_ids
+    )
+
+    with waiting_for_lock():
+        return {account.pk: account for account in accounts.order_by("pk")}
+
+
+def apply_transaction(transaction_type, data, account, receiver_account=None):
+    """
+    Apply a deposit/withdrawal/transfer to already locked accounts (in memory).
+    Sets previous_balance and new_balance (and currency for transfers) in data.
+    Every check runs before any balance is changed, so a failed transaction
+    leaves the accounts untouched.
+    """
+
+    trx_amount = data["amount"]
+
+    # --- DEPOSIT ----
+    if transaction_type == Transaction.TRANSACTION_TYPES[0][0]:
+
+        # convert amount
+        converted_amount = convert_amount(
+            trx_amount, data["currency"], account.currency
+        )
+
+        # update transaction previous balance
+        data["previous_balance"] = account.balance
+
+        # update account balance
+        account.balance += converted_amount
+
+        # update transaction new balance
+        data["new_balance"] = account.balance
+
+    # --- WITHDRAWAL ----
+    elif transaction_type == Transaction.TRANSACTION_TYPES[1][0]:
+
+        # convert amount
+        converted_amount = convert_amount(
+            trx_amount, data["currency"], account.currency
+        )
+
+        # check if account has enough balance
+        if account.balance < converted_amount:
+            insufficient_balance.labels(transaction_type).inc()
+            raise serializers.ValidationError("Insufficient balance")
+
+        # update transaction previous balance
+        data["previous_balance"] = account.balance
+
+        # update account balance
+        account.balance -= converted_amount
+
+        # update transaction new balance
+        data["new_balance"] = account.balance
+
+    # --- TRANSFER ----
+    elif transaction_type == Transaction.TRANSACTION_TYPES[2][0]:
+
+        # check if sender account has enough balance
+        if account.balance < trx_amount:
+            insufficient_balance.labels(transaction_type).inc()
+            raise serializers.ValidationError("Insufficient balance")
+
+        # convert amount to receiver currency
+        receiver_converted_amount = convert_amount(
+            trx_amount, account.currency, receiver_account.currency
+        )
+
+        # update transaction previous balance
+        data["previous_balance"] = account.balance
+
+        # update sender and receiver balances
+        account.balance -= trx_amount
+        receiver_account.balance += receiver_converted_amount
+
+        # update transaction new balance
+        data["new_balance"] = account.balance
+
+        # set currency as the sender currency
+        data["currency"] = account.currency
+
+    else:
+        raise serializers.ValidationError("Invalid transaction type")
+
+
+def conditional_balance_update(user, account_id, delta):
+    """
+    Add delta to the account balance with a single
+    UPDATE ... SET balance = balance + delta WHERE ... RETURNING balance.
+    A debit only matches while the balance covers it, so the row lock lasts
+    for one statement instead of a whole read-modify-write.
+    Returns the new balance, or None when no row was updated.
+    Needs UPDATE ... RETURNING (PostgreSQL, SQLite >= 3.35).
+    """
+    qn = connection.ops.quote_name
+    balance_field = Account._meta.get_field("balance")
+    updated_at_field = Account._meta.get_field("updated_at")
+
+    sql = (
+        f"UPDATE {qn(Account._meta.db_table)} "
+        f"SET {qn(balance_field.column)} = {qn(balance_field.column)} + %s, "
+        f"{qn(updated_at_field.column)} = %s "
+        f"WHERE {qn('id')} = %s AND {qn('user_id')} = %s "
+        f"AND {qn(balance_field.column)} + %s >= 0 "
+        f"RETURNING {qn(balance_field.column)}"
+    )
+    delta = connection.ops.adapt_decimalfield_value(delta)
+    params = [
+        delta,
+        updated_at_field.get_db_prep_value(timezone.now(), connection),
+        account_id,
+        user.pk,
+        delta,
+    ]
+
+    with waiting_for_lock(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    return None if row is None else quantize_balance(row[0])
+
+
+def apply_conditional_transaction(user, account, transaction_type, data):
+    """
+    Apply a deposit/withdrawal without locking the account first.
+    account is the (unlocked) instance loaded by serializer validation, only
+    its immutable fields are used. The amount is converted before touching the
+    account row, the balance is changed with conditional_balance_update() and
+    previous_balance/new_balance are derived from the returned value.
+    """
+
+    # same error as the locked path for accounts of other users
+    if account.user_id != user.pk:
+        raise Account.DoesNotExist("Account matching query does not exist.")
+
+    # convert amount
+    converted_amount = quantize_balance(
+        convert_amount(data["amount"], data["currency"], account.currency)
+    )
+
+    # --- DEPOSIT ----
+    if transaction_type == Transaction.TRANSACTION_TYPES[0][0]:
+        delta = converted_amount
+
+    # --- WITHDRAWAL ----
+    elif transaction_type == Transaction.TRANSACTION_TYPES[1][0]:
+        delta = -converted_amount
+
+    else:
+        raise serializers.ValidationError("Invalid transaction type")
+
+    new_balance = conditional_balance_update(user, account.pk, delta)
+
+    # no row updated: the balance does not cover the withdrawal
+    if new_balance is None:
+        insufficient_balance.labels(transaction_type).inc()
+        raise serializers.ValidationError("Insufficient balance")
+
+    # update transaction previous and new balance
+    data["previous_balance"] = new_balance - delta
+    data["new_balance"] = new_balance
@@ -0,0 +1,267 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from quotation_system.accounts.models import Account
+from quotation_system.transactions.archive import read_block
+from quotation_system.transactions.models import (
+    AccountDailyRollup,
+    ArchiveBlock,
+    Transaction,
+)
+
+
+@pytest.mark.integration
+class TestArchiveTransactions(APITestCase):
+    """
+    Test the cold storage of old transactions and the API fallback to it.
+    """
+
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.archive_dir = archive_dir.name
+
+        settings = override_settings(TRANSACTIONS_ARCHIVE_DIR=self.archive_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(user=self.user, currency="USD")
+
+        # 5 old transactions (200 to 100 days ago) and 2 recent ones, the
+        # balances of the account chain from one to the next
+        now = timezone.now()
+        created_at = [now - timedelta(days) for days in (200, 175, 150, 125, 100)]
+        created_at += [now - timedelta(days=1), now]
+        for index, value in enumerate(created_at):
+            trx = Transaction.objects.create(
+                user=self.user,
+                account=self.account,
+                transaction_type="deposit",
+                amount="10.25",
+                currency="USD",
+                previous_balance=Decimal("10.25") * index,
+                new_balance=Decimal("10.25") * (index + 1),
+            )
+            Transaction.objects.filter(pk=trx.pk).update(created_at=value)
+
+        self.expected = list(
+            Transaction.objects.order_by("-created_at", "-id").values(
+                "id", "previous_balance", "new_balance", "created_at"
+            )
+        )
+        self.headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.client.force_authenticate(user=self.user)
+
+    def archive(self, **options):
+        out = StringIO()
+        call_command(
+            "archive_transactions", "--older-than-days=90", stdout=out, **options
+        )
+        return out.getvalue()
+
+    def test_archive_moves_old_transactions(self):
+        """
+        Test that old transactions leave the table for gzip blocks on disk.
+        """
+        # act
+        output = self.archive(block_size=2)
+
+        # assert
+        self.assertIn("Archived 5 transactions", output)
+        self.assertEqual(Transaction.objects.count(), 2)
+
+        blocks = list(ArchiveBlock.objects.order_by("first_created_at"))
+        self.assertEqual([block.transaction_count for block in blocks], [2, 2, 1])
+        self.assertEqual(len({block.segment for block in blocks}), 1)
+
+        # every block is a gzip member of the segment
+        with gzip.open(os.path.join(self.archive_dir, blocks[0].segment)) as file:
+            self.assertEqual(len(file.read().splitlines()), 5)
+
+    def test_archive_keeps_the_balance_chain(self):
+        """
+        Test that archived balances are stored as they were and the chain
+        continues from the last block to the first row left in the table.
+        """
+        # act
+        self.archive(block_size=2)
+
+        # assert
+        archived = [
+            trx
+            for block in ArchiveBlock.objects.order_by("first_created_at")
+            for trx in read_block(block)
+        ]
+        for previous, trx in zip(archived, archived[1:]):
+            self.assertEqual(trx.previous_balance, previous.new_balance)
+        self.assertEqual(archived[0].previous_balance, Decimal("0"))
+
+        last_block = ArchiveBlock.objects.order_by("-last_created_at").first()
+        first_row = Transaction.objects.order_by("created_at", "id").first()
+        self.assertEqual(last_block.closing_balance, archived[-1].new_balance)
+        self.assertEqual(first_row.previous_balance, last_block.closing_balance)
+
+    def test_archive_nothing_to_archive(self):
+        """
+        Test that a run without old transactions leaves no segment behind.
+        """
+        # act
+        output = self.archive(account=[self.account.pk + 100])
+
+        # assert
+        self.assertIn("Nothing to archive", output)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+    def test_detail_reads_archived_transaction(self):
+        """
+        Test that an archived transaction is still served by the detail view.
+        """
+        # arrange
+        self.archive(block_size=2)
+        oldest = self.expected[-1]
+
+        # act
+        response = self.client.get(
+            reverse("transaction-detail", kwargs={"pk": oldest["id"]})
+        )
+        missing = self.client.get(
+            reverse("transaction-detail", kwargs={"pk": self.expected[0]["id"] + 100})
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], oldest["id"])
+        self.assertEqual(response.data["account"], self.account.pk)
+        self.assertEqual(response.data["previous_balance"], "0.00")
+        self.assertEqual(response.data["new_balance"], "10.25")
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_does_not_read_other_users_archive(self):
+        """
+        Test that archived transactions of other users stay hidden.
+        """
+        # arrange
+        self.archive()
+        other = User.objects.create_user(username="other", password="password")
+        self.client.force_authenticate(user=other)
+
+        # act
+        response = self.client.get(
+            reverse("transaction-detail", kwargs={"pk": self.expected[-1]["id"]})
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_pages_span_table_and_archive(self):
+        """
+        Test that the list walks from the table into the archive and back
+        with the same cursors.
+        """
+        # arrange
+        self.archive(block_size=2)
+        url = reverse("transaction-list-create")
+
+        # act
+        pages = [self.client.get(url, {"page_size": 3})]
+        while pages[-1].data["next"]:
+            pages.append(self.client.get(pages[-1].data["next"]))
+        back = self.client.get(pages[-1].data["previous"])
+
+        # assert
+        results = [trx for page in pages for trx in page.data["results"]]
+        self.assertEqual(
+            [trx["id"] for trx in results], [trx["id"] for trx in self.expected]
+        )
+        self.assertEqual(
+            [trx["new_balance"] for trx in results],
+            [str(trx["new_balance"]) for trx in self.expected],
+        )
+        self.assertEqual(back.data["results"], pages[-2].data["results"])
+
+    def test_export_streams_archived_transactions_first(self):
+        """
+        Test that the export includes the archived transactions of the
+        period, before the rows of the table.
+        """
+        # arrange
+        self.archive(block_size=2)
+        since = timezone.localdate(self.expected[-2]["created_at"])
+        url = reverse("transaction-export")
+
+        # act
+        response = self.client.get(url, {"format": "ndjson"})
+        filtered = self.client.get(url, {"format": "ndjson", "from": since})
+
+        # assert
+        def ids(response):
+            content = b"".join(response.streaming_content).decode()
+            return [json.loads(line)["id"] for line in content.splitlines()]
+
+        expected = [trx["id"] for trx in reversed(self.expected)]
+        self.assertEqual(ids(response), expected)
+        self.assertEqual(ids(filtered), expected[1:])
+
+    def test_backfill_reads_archived_transactions(self):
+        """
+        Test that rebuilding the rollups keeps the days of archived
+        transactions.
+        """
+        # arrange
+        self.archive(block_size=2)
+
+        # act
+        call_command("backfill_daily_rollups", stdout=StringIO())
+
+        # assert
+        rollups = list(
+            AccountDailyRollup.objects.order_by("day").values_list(
+                "transaction_count", "closing_balance"
+            )
+        )
+        self.assertEqual(len(rollups), 7)
+        self.assertEqual(rollups[0], (1, Decimal("10.25")))
+        self.assertEqual(rollups[-1], (1, Decimal("71.75")))
+
+    async def test_async_views_read_archive(self):
+        """
+        Test that the async list and detail views fall back to the archive.
+        """
+        # arrange
+        await sync_to_async(self.archive)()
+        ids = [trx["id"] for trx in self.expected]
+
+        # act
+        detail = await self.async_client.get(
+            reverse("async-transaction-detail", kwargs={"pk": ids[-1]}),
+            headers=self.headers,
+        )
+        page = await self.async_client.get(
+            reverse("async-transaction-list-create"),
+            {"page_size": 10},
+            headers=self.headers,
+        )
+
+        # assert
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail.json()["id"], ids[-1])
+        self.assertEqual([trx["id"] for trx in page.json()["results"]], ids)
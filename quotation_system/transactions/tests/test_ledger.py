@@ -0,0 +1,326 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.currencies.models import Currency, CurrencyRate
+from quotation_system.transactions import ledger
+from quotation_system.transactions.checks import check_account_balances
+from quotation_system.transactions.ledger import balances
+from quotation_system.transactions.models import (
+    AccountDailyRollup,
+    AccountDailyRollupDelta,
+    BalanceCheckpoint,
+    Posting,
+)
+
+
+class LedgerTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(
+            user=self.user, currency="USD", balance=100
+        )
+        self.receiver = Account.objects.create(user=self.user, currency="CLP")
+        # the ledger of an account created with a balance starts from it
+        BalanceCheckpoint.objects.create(
+            account=self.account, posting_id=0, balance=100
+        )
+        CurrencyRate.objects.create(
+            base_currency=Currency.objects.create(code="CLP", name="Chilean peso"),
+            target_currency=Currency.objects.create(code="USD", name="US dollar"),
+            rate=1000,
+        )
+
+        self.url = reverse("transaction-list-create")
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, transaction_type, amount, **extra):
+        data = {
+            "transaction_type": transaction_type,
+            "account": self.account.id,
+            "amount": amount,
+            "currency": "USD",
+            **extra,
+        }
+        return self.client.post(self.url, data, format="json")
+
+    def postings(self):
+        return list(
+            Posting.objects.order_by("id").values_list("account_id", "side", "amount")
+        )
+
+
+@pytest.mark.integration
+class TestPostings(LedgerTestCase):
+    """
+    Test the postings written with the balance column (locked mode).
+    """
+
+    def test_postings_of_each_transaction_type(self):
+        """
+        Test that deposits and withdrawals post once and transfers post a
+        debit and a converted credit.
+        """
+        # act
+        self.post("deposit", "10.00")
+        self.post("withdrawal", "30.00")
+        self.post("transfer", "5.00", related_account=self.receiver.id)
+
+        # assert
+        self.assertEqual(
+            self.postings(),
+            [
+                (self.account.id, Posting.CREDIT, Decimal("10.00")),
+                (self.account.id, Posting.DEBIT, Decimal("30.00")),
+                (self.account.id, Posting.DEBIT, Decimal("5.00")),
+                (self.receiver.id, Posting.CREDIT, Decimal("5000.00")),
+            ],
+        )
+
+        # the ledger and the balance column agree
+        self.account.refresh_from_db()
+        self.receiver.refresh_from_db()
+        self.assertEqual(
+            balances([self.account.id, self.receiver.id]),
+            {
+                self.account.id: self.account.balance,
+                self.receiver.id: self.receiver.balance,
+            },
+        )
+
+    def test_batch_postings(self):
+        """
+        Test that a batch posts every created transaction.
+        """
+        # arrange
+        data = {
+            "transactions": [
+                {
+                    "transaction_type": "deposit",
+                    "account": self.account.id,
+                    "amount": "50.00",
+                    "currency": "USD",
+                },
+                {
+                    "transaction_type": "transfer",
+                    "account": self.account.id,
+                    "related_account": self.receiver.id,
+                    "amount": "20.00",
+                },
+            ]
+        }
+
+        # act
+        response = self.client.post(reverse("transaction-batch"), data, format="json")
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            self.postings(),
+            [
+                (self.account.id, Posting.CREDIT, Decimal("50.00")),
+                (self.account.id, Posting.DEBIT, Decimal("20.00")),
+                (self.receiver.id, Posting.CREDIT, Decimal("20000.00")),
+            ],
+        )
+
+    def test_checkpoint_balances(self):
+        """
+        Test that checkpoints keep the balances and replace the ones they
+        supersede, and that young postings stay in the tail.
+        """
+        # arrange
+        self.post("deposit", "10.00")
+        self.post("transfer", "5.00", related_account=self.receiver.id)
+        Posting.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        self.post("withdrawal", "1.00")
+        before = balances([self.account.id, self.receiver.id])
+
+        # act
+        out = StringIO()
+        call_command("checkpoint_balances", stdout=out)
+
+        # assert
+        self.assertIn("Added 2 balance checkpoints", out.getvalue())
+        self.assertEqual(balances([self.account.id, self.receiver.id]), before)
+        self.assertEqual(
+            dict(BalanceCheckpoint.objects.values_list("account_id", "balance")),
+            {self.account.id: Decimal("105.00"), self.receiver.id: Decimal("5000.00")},
+        )
+
+
+@pytest.mark.integration
+@override_settings(TRANSACTIONS_BALANCE_UPDATE_MODE="ledger")
+class TestLedgerMode(LedgerTestCase):
+    """
+    Test the balances kept by the postings only (ledger mode).
+    """
+
+    def test_deposit_only_inserts(self):
+        """
+        Test that a deposit locks nothing and updates no row.
+        """
+        # act
+        # account validation, checkpoint, tail, INSERT transaction, INSERT
+        # posting, INSERT rollup delta (+ savepoint queries of the test
+        # transaction)
+        with self.assertNumQueries(8) as queries:
+            response = self.post("deposit", "25.50")
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["previous_balance"], "100.00")
+        self.assertEqual(response.data["new_balance"], "125.50")
+        for query in queries.captured_queries:
+            self.assertFalse(query["sql"].startswith("UPDATE"), query["sql"])
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 100)
+        self.assertEqual(
+            balances([self.account.id])[self.account.id], Decimal("125.50")
+        )
+
+    def test_rollup_deltas_are_folded(self):
+        """
+        Test that the statement includes the rollup deltas and is the same
+        once checkpoint_balances folded them into the daily rollups.
+        """
+        # arrange
+        self.post("deposit", "10.00")
+        self.post("withdrawal", "30.00")
+        self.post("transfer", "5.00", related_account=self.receiver.id)
+        AccountDailyRollupDelta.objects.update(
+            created_at=timezone.now() - timedelta(minutes=5)
+        )
+        # younger than the checkpoint delay, left for the next run
+        self.post("deposit", "1.00")
+        today = timezone.localdate().isoformat()
+        url = reverse("account-statement", kwargs={"pk": self.account.id})
+        pending = self.client.get(url, {"from": today, "to": today})
+
+        # act
+        out = StringIO()
+        call_command("checkpoint_balances", stdout=out)
+        folded = self.client.get(url, {"from": today, "to": today})
+
+        # assert
+        self.assertIn("Folded 4 rollup deltas", out.getvalue())
+        self.assertEqual(AccountDailyRollupDelta.objects.count(), 1)
+        self.assertEqual(pending.data, folded.data)
+        self.assertEqual(folded.data["opening_balance"], "100.00")
+        self.assertEqual(folded.data["closing_balance"], "76.00")
+        self.assertEqual(folded.data["transaction_count"], 4)
+        self.assertEqual(
+            AccountDailyRollup.objects.get(account=self.receiver).closing_balance,
+            Decimal("5000.00"),
+        )
+
+    def test_only_debits_lock(self):
+        """
+        Test that only the debited account of a transaction is locked.
+        """
+        # act
+        with mock.patch.object(
+            ledger, "lock_accounts", wraps=ledger.lock_accounts
+        ) as lock_accounts:
+            self.post("deposit", "1.00")
+            self.post("transfer", "5.00", related_account=self.receiver.id)
+            self.post("withdrawal", "1.00")
+
+        # assert
+        self.assertEqual(
+            lock_accounts.call_args_list,
+            [
+                mock.call(mock.ANY, [self.account.id]),
+                mock.call(mock.ANY, [self.account.id]),
+            ],
+        )
+
+    def test_leaving_ledger_mode(self):
+        """
+        Test that the stale balance column fails the check until
+        rebuild_account_balances writes the ledger balances to it.
+        """
+        # arrange
+        self.post("deposit", "25.50")
+
+        # act
+        with override_settings(TRANSACTIONS_BALANCE_UPDATE_MODE="locked"):
+            stale = check_account_balances(None, databases=["default"])
+            call_command("rebuild_account_balances", stdout=StringIO())
+            rebuilt = check_account_balances(None, databases=["default"])
+
+        # assert
+        self.assertEqual([error.id for error in stale], ["transactions.E001"])
+        self.assertEqual(rebuilt, [])
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("125.50"))
+
+    def test_withdrawal_with_not_enough_balance(self):
+        """
+        Test that a debit over the ledger balance is rejected and posts nothing.
+        """
+        # arrange
+        self.post("withdrawal", "60.00")
+
+        # act
+        response = self.post("withdrawal", "40.01")
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], "Insufficient balance")
+        self.assertEqual(len(self.postings()), 1)
+
+    def test_transfer_credits_the_receiver(self):
+        """
+        Test that a transfer debits the sender and credits the converted
+        amount to the receiver.
+        """
+        # act
+        response = self.post("transfer", "5.00", related_account=self.receiver.id)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["new_balance"], "95.00")
+        self.assertEqual(
+            balances([self.account.id, self.receiver.id]),
+            {self.account.id: Decimal("95.00"), self.receiver.id: Decimal("5000.00")},
+        )
+
+    def test_account_list_balances(self):
+        """
+        Test that the account list shows the ledger balances and changes its
+        ETag with the postings.
+        """
+        # arrange
+        url = reverse("account-list")
+        first = self.client.get(url, {"fields": "account_number,balance"})
+
+        # act
+        self.post("deposit", "1.00")
+        changed = self.client.get(
+            url,
+            {"fields": "account_number,balance"},
+            HTTP_IF_NONE_MATCH=first["ETag"],
+        )
+
+        # assert
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["balance"] for item in changed.data["results"]],
+            ["101.00", "0.00"],
+        )
+        self.assertNotIn("id", changed.data["results"][0])
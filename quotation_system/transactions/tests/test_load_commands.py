@@ -0,0 +1,132 @@
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db.models import Max
+from django.test import TransactionTestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.currencies.models import CurrencyRate
+from quotation_system.transactions.models import AccountDailyRollup, Transaction
+
+
+def seed_load(*args):
+    out = StringIO()
+    call_command(
+        "seed_load",
+        "--users=3",
+        "--accounts-per-user=2",
+        "--transactions-per-account=10",
+        "--currencies",
+        "USD",
+        "EUR",
+        "--seed=1",
+        *args,
+        stdout=out,
+    )
+    return out.getvalue()
+
+
+@pytest.mark.integration
+class TestSeedLoad(TransactionTestCase):
+    """
+    Test the load test data generator.
+    """
+
+    def test_seed_load_creates_consistent_histories(self):
+        """
+        Test that seeded balances, transaction chains and rollups agree.
+        """
+        # act
+        output = seed_load("--batch-size=7")
+
+        # assert
+        self.assertIn("Seeded 3 users, 6 accounts and 60 transactions", output)
+        self.assertEqual(CurrencyRate.objects.count(), 2)
+        self.assertEqual(
+            Transaction.objects.filter(account__user__username="load000000").count(),
+            20,
+        )
+
+        for account in Account.objects.all():
+            last_day = (
+                AccountDailyRollup.objects.filter(account=account)
+                .order_by("-day")
+                .first()
+            )
+            self.assertEqual(last_day.closing_balance, account.balance)
+            self.assertGreaterEqual(account.balance, 0)
+
+        # created_at is spread over the past, not the time of the seeding
+        days = Transaction.objects.dates("created_at", "day")
+        self.assertGreater(len(days), 1)
+
+    def test_seed_load_skips_existing_users(self):
+        """
+        Test that running the seeding again only adds the missing users.
+        """
+        # arrange
+        seed_load()
+
+        # act
+        output = seed_load("--users=4")
+
+        # assert
+        self.assertIn("Seeded 1 users, 2 accounts and 20 transactions", output)
+        self.assertEqual(User.objects.count(), 4)
+
+
+@pytest.mark.integration
+class TestLoadTest(TransactionTestCase):
+    """
+    Test the traffic driver against the in-process test client.
+    """
+
+    def setUp(self):
+        seed_load("--users=2", "--transactions-per-account=2")
+
+    def test_load_test_reports_per_endpoint(self):
+        """
+        Test that the JSON report has throughput and percentiles per endpoint.
+        """
+        # arrange
+        last_id = Transaction.objects.aggregate(Max("id"))["id__max"]
+        out = StringIO()
+
+        # act
+        call_command(
+            "load_test",
+            "--requests=8",
+            "--concurrency=1",
+            "--mix=list=1,create=1",
+            "--seed=3",
+            stdout=out,
+        )
+
+        # assert
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["target"], "in-process")
+        self.assertEqual(report["requests"], 8)
+        self.assertEqual(report["errors"], 0)
+
+        endpoints = report["endpoints"]
+        self.assertEqual(endpoints["login"]["requests"], 1)
+        self.assertEqual(
+            sum(endpoint["requests"] for endpoint in endpoints.values()), 8
+        )
+        for endpoint in endpoints.values():
+            self.assertLessEqual(endpoint["p50_ms"], endpoint["p99_ms"])
+            self.assertGreater(endpoint["throughput_rps"], 0)
+
+        # no pool on SQLite, connections are still counted
+        self.assertEqual(report["database"]["pools"], {})
+        self.assertGreaterEqual(report["database"]["connections_opened"], 0)
+
+        created = Transaction.objects.filter(id__gt=last_id).count()
+        self.assertEqual(created, endpoints.get("create", {}).get("requests", 0))
+
+    def test_load_test_rejects_invalid_mix(self):
+        with self.assertRaises(CommandError):
+            call_command("load_test", "--mix=browse=1", stdout=StringIO())
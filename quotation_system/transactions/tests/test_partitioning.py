@@ -0,0 +1,153 @@
+from datetime import date, datetime, timezone
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection, models, transaction
+from django.db.migrations.state import ProjectState
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.migration_operations import AddIndexConcurrently
+from quotation_system.transactions import partitioning
+from quotation_system.transactions.models import Transaction
+from quotation_system.users.tokens import AccessToken
+
+
+def at(year, month, day):
+    return mock.patch(
+        "django.utils.timezone.now",
+        return_value=datetime(year, month, day, tzinfo=timezone.utc),
+    )
+
+
+def partitions():
+    return [name for name, _ in partitioning.list_partitions(connection)]
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="partitioning needs PostgreSQL"
+)
+class TestTransactionPartitions(APITransactionTestCase):
+    """
+    Test `manage.py transaction_partitions` against the migrated table.
+    DETACH PARTITION ... CONCURRENTLY cannot run in the transaction of a
+    TestCase, and the original table is restored after each test.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(user=self.user, currency="USD")
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def tearDown(self):
+        months = [date(2024, month, 1) for month in range(2, 8)]
+        with connection.cursor() as cursor:
+            # the partitioned table drops its attached partitions
+            for name in [
+                partitioning.TABLE,
+                partitioning.LEGACY_TABLE,
+                *map(partitioning.partition_name, months),
+            ]:
+                cursor.execute(f"DROP TABLE IF EXISTS {name}")
+        with connection.schema_editor() as editor:
+            editor.create_model(Transaction)
+
+    def create(self):
+        return Transaction.objects.create(
+            account=self.account,
+            user=self.user,
+            transaction_type="deposit",
+            amount=1,
+            currency="USD",
+            previous_balance=0,
+            new_balance=1,
+        ).pk
+
+    def run_command(self, *options):
+        call_command("transaction_partitions", *options, stdout=StringIO())
+
+    def detail(self, pk):
+        return self.client.get(
+            reverse("transaction-detail", kwargs={"pk": pk})
+        ).status_code
+
+    def test_convert_attach_and_detach(self):
+        """
+        Test that the rows stay readable through the conversion and that the
+        detached months are no longer read.
+        """
+        # arrange
+        with at(2023, 6, 1):
+            old = self.create()
+
+        # act
+        with at(2024, 1, 15):
+            self.run_command("--convert", "--ahead", "2")
+        converted = partitions()
+        with at(2024, 3, 10):
+            recent = self.create()
+        before = [self.detail(old), self.detail(recent)]
+        with at(2024, 6, 15):
+            self.run_command("--ahead", "1", "--retain-months", "3")
+
+        # assert
+        self.assertEqual(
+            converted,
+            [
+                partitioning.LEGACY_TABLE,
+                "transactions_transaction_p2024_02",
+                "transactions_transaction_p2024_03",
+            ],
+        )
+        self.assertEqual(before, [status.HTTP_200_OK, status.HTTP_200_OK])
+        self.assertEqual(
+            partitions(),
+            [f"transactions_transaction_p2024_{month:02}" for month in range(3, 8)],
+        )
+        self.assertEqual(self.detail(old), status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.detail(recent), status.HTTP_200_OK)
+
+    def test_add_index_concurrently(self):
+        """
+        Test that AddIndexConcurrently builds the index of every partition.
+        """
+        # arrange
+        with at(2024, 1, 15):
+            self.run_command("--convert", "--ahead", "1")
+        operation = AddIndexConcurrently(
+            "transaction", models.Index(fields=["currency"], name="trx_currency_idx")
+        )
+        from_state = ProjectState.from_apps(apps)
+        to_state = from_state.clone()
+        operation.state_forwards("transactions", to_state)
+
+        # act
+        with connection.schema_editor(atomic=False) as editor:
+            operation.database_forwards("transactions", editor, from_state, to_state)
+
+        # assert
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indisvalid FROM pg_index "
+                "WHERE indexrelid = to_regclass('trx_currency_idx')"
+            )
+            self.assertEqual(cursor.fetchone(), (True,))
+
+    def test_refuses_to_run_in_a_transaction(self):
+        """
+        Test that the command does not run where CONCURRENTLY would fail.
+        """
+        # act / assert
+        with transaction.atomic(), self.assertRaises(CommandError):
+            self.run_command("--convert")
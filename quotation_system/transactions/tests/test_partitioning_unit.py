@@ -0,0 +1,84 @@
+from datetime import date, datetime, timezone
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from quotation_system.transactions import partitioning
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "month, months, expected",
+    [
+        (date(2024, 1, 1), 1, date(2024, 2, 1)),
+        (date(2024, 12, 1), 1, date(2025, 1, 1)),
+        (date(2024, 1, 1), -1, date(2023, 12, 1)),
+        (date(2024, 3, 1), -15, date(2022, 12, 1)),
+    ],
+)
+def test_add_months(month, months, expected):
+    assert partitioning.add_months(month, months) == expected
+
+
+@pytest.mark.unit
+def test_create_partition_sql_covers_one_month():
+    # act
+    statement = partitioning.create_partition_sql(date(2024, 12, 1))
+
+    # assert
+    assert partitioning.partition_name(date(2024, 12, 1)) in statement
+    assert "transactions_transaction_p2024_12 PARTITION OF" in statement
+    assert (
+        "FROM ('2024-12-01T00:00:00+00:00') TO ('2025-01-01T00:00:00+00:00')"
+        in statement
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        (
+            "FOR VALUES FROM ('2024-12-01 00:00:00+00') TO ('2025-01-01 00:00:00+00')",
+            datetime(2025, 1, 1, tzinfo=timezone.utc),
+        ),
+        (
+            "FOR VALUES FROM (MINVALUE) TO ('2024-12-01 00:00:00+00')",
+            datetime(2024, 12, 1, tzinfo=timezone.utc),
+        ),
+        ("FOR VALUES FROM ('2024-12-01 00:00:00+00') TO (MAXVALUE)", None),
+        ("DEFAULT", None),
+    ],
+)
+def test_parse_upper_bound(expression, expected):
+    assert partitioning.parse_upper_bound(expression) == expected
+
+
+@pytest.mark.unit
+def test_conversion_sql_attaches_the_legacy_table_last():
+    # act
+    statements = partitioning.conversion_sql(
+        ["transactions_transaction_pkey"], date(2024, 12, 1)
+    )
+
+    # assert
+    assert statements[0].startswith("LOCK TABLE transactions_transaction")
+    assert (
+        "ALTER INDEX transactions_transaction_pkey "
+        "RENAME TO transactions_transaction_pkey_legacy"
+    ) in statements
+    assert any("PRIMARY KEY (id, created_at)" in sql for sql in statements)
+    assert any("REFERENCES accounts_account (id)" in sql for sql in statements)
+    assert statements[-1] == (
+        "ALTER TABLE transactions_transaction ATTACH PARTITION "
+        "transactions_transaction_legacy "
+        "FOR VALUES FROM (MINVALUE) TO ('2024-12-01T00:00:00+00:00')"
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_transaction_partitions_needs_postgresql():
+    with pytest.raises(CommandError):
+        call_command("transaction_partitions", stdout=StringIO())
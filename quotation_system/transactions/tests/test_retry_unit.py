@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock
+
+import pytest
+from django.db import OperationalError
+
+from quotation_system.transactions.retry import retry_stats, run_with_retry
+
+
+def database_error(sqlstate):
+    """Builds a django database error wrapping a driver error with a SQLSTATE."""
+    cause = Exception("driver error")
+    cause.sqlstate = sqlstate
+
+    error = OperationalError("error")
+    error.__cause__ = cause
+    return error
+
+
+@pytest.fixture(autouse=True)
+def no_outer_transaction(mocker):
+    mocker.patch("quotation_system.transactions.retry.time.sleep")
+    mocker.patch(
+        "quotation_system.transactions.retry.connection",
+        MagicMock(in_atomic_block=False),
+    )
+    retry_stats.reset()
+
+
+@pytest.mark.unit
+def test_run_with_retry_retries_deadlocks():
+    # arrange
+    func = MagicMock(side_effect=[database_error("40P01"), "done"])
+
+    # act
+    result = run_with_retry(func)
+
+    # assert
+    assert result == "done"
+    assert func.call_count == 2
+    assert retry_stats.snapshot() == {("retries", "deadlock"): 1}
+
+
+@pytest.mark.unit
+def test_run_with_retry_gives_up_after_max_attempts(settings):
+    # arrange
+    settings.TRANSACTIONS_RETRY_MAX_ATTEMPTS = 3
+    func = MagicMock(side_effect=database_error("40001"))
+
+    # act
+    with pytest.raises(OperationalError):
+        run_with_retry(func)
+
+    # assert
+    assert func.call_count == 3
+    assert retry_stats.snapshot() == {
+        ("retries", "serialization_failure"): 2,
+        ("exhausted", "serialization_failure"): 1,
+    }
+
+
+@pytest.mark.unit
+def test_run_with_retry_does_not_retry_other_errors():
+    # arrange
+    func = MagicMock(side_effect=database_error("23505"))
+
+    # act
+    with pytest.raises(OperationalError):
+        run_with_retry(func)
+
+    # assert
+    assert func.call_count == 1
+    assert retry_stats.snapshot() == {}
+
+
+@pytest.mark.unit
+def test_run_with_retry_does_not_retry_inside_outer_transaction(mocker):
+    # arrange
+    mocker.patch(
+        "quotation_system.transactions.retry.connection",
+        MagicMock(in_atomic_block=True),
+    )
+    func = MagicMock(side_effect=database_error("40P01"))
+
+    # act
+    with pytest.raises(OperationalError):
+        run_with_retry(func)
+
+    # assert
+    assert func.call_count == 1
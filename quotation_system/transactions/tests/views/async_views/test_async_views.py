@@ -0,0 +1,176 @@
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from quotation_system.accounts.models import Account
+from quotation_system.transactions.models import Transaction
+
+
+@pytest.mark.integration
+class TestAsyncTransactionViews(APITestCase):
+    """
+    Test the async transaction views against the sync ones.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(
+            user=self.user, currency="USD", balance=100
+        )
+        self.receiver = Account.objects.create(user=self.user, currency="USD")
+        self.trx = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            transaction_type="deposit",
+            amount=100,
+            currency="USD",
+            previous_balance=0,
+            new_balance=100,
+        )
+
+        self.headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.client.force_authenticate(user=self.user)
+
+    async def test_list_matches_sync_view(self):
+        """
+        Test that the async list returns the payload of the sync list.
+        """
+        # act
+        response = await self.async_client.get(
+            reverse("async-transaction-list-create"), headers=self.headers
+        )
+        expected = await sync_to_async(self.client.get)(
+            reverse("transaction-list-create")
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), expected.json())
+
+    async def test_detail(self):
+        """
+        Test that a transaction of the user is returned.
+        """
+        # act
+        response = await self.async_client.get(
+            reverse("async-transaction-detail", kwargs={"pk": self.trx.pk}),
+            headers=self.headers,
+        )
+        missing = await self.async_client.get(
+            reverse("async-transaction-detail", kwargs={"pk": self.trx.pk + 100}),
+            headers=self.headers,
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["id"], self.trx.pk)
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_create_transfer(self):
+        """
+        Test that a transfer is written atomically through the async view.
+        """
+        # arrange
+        data = {
+            "transaction_type": "transfer",
+            "account": self.account.id,
+            "related_account": self.receiver.id,
+            "amount": "40.00",
+        }
+
+        # act
+        response = await self.async_client.post(
+            reverse("async-transaction-list-create"),
+            data,
+            content_type="application/json",
+            headers=self.headers,
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["new_balance"], "60.00")
+
+        await self.account.arefresh_from_db()
+        await self.receiver.arefresh_from_db()
+        self.assertEqual(self.account.balance, 60)
+        self.assertEqual(self.receiver.balance, 40)
+
+    async def test_create_with_not_enough_balance(self):
+        """
+        Test that validation errors get the JSON body of the sync view.
+        """
+        # arrange
+        data = {
+            "transaction_type": "withdrawal",
+            "account": self.account.id,
+            "amount": "500.00",
+            "currency": "USD",
+        }
+
+        # act
+        response = await self.async_client.post(
+            reverse("async-transaction-list-create"),
+            data,
+            content_type="application/json",
+            headers=self.headers,
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), ["Insufficient balance"])
+        self.assertEqual(await Transaction.objects.acount(), 1)
+
+    async def test_create_is_idempotent(self):
+        """
+        Test that a request sent again with its Idempotency-Key is replayed.
+        """
+        # arrange
+        data = {
+            "transaction_type": "deposit",
+            "account": self.account.id,
+            "amount": "10.00",
+            "currency": "USD",
+        }
+        headers = {**self.headers, "idempotency-key": "key-1"}
+
+        # act
+        first = await self.async_client.post(
+            reverse("async-transaction-list-create"),
+            data,
+            content_type="application/json",
+            headers=headers,
+        )
+        second = await self.async_client.post(
+            reverse("async-transaction-list-create"),
+            data,
+            content_type="application/json",
+            headers=headers,
+        )
+
+        # assert
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(await Transaction.objects.acount(), 2)
+
+    async def test_unauthenticated(self):
+        """
+        Test that requests without a valid token are rejected.
+        """
+        # act
+        missing = await self.async_client.get(reverse("async-transaction-list-create"))
+        invalid = await self.async_client.get(
+            reverse("async-transaction-list-create"),
+            headers={"authorization": "Bearer not-a-token"},
+        )
+
+        # assert
+        self.assertEqual(missing.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", missing)
+        self.assertEqual(invalid.status_code, status.HTTP_401_UNAUTHORIZED)
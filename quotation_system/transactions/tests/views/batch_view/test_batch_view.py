@@ -0,0 +1,177 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.transactions.models import Transaction
+
+
+@pytest.mark.integration
+class TestTransactionBatchView(APITestCase):
+    """
+    Test the transaction batch view.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(
+            user=self.user, currency="USD", balance=100
+        )
+        self.other_account = Account.objects.create(
+            user=self.user, currency="USD", balance=0
+        )
+        self.url = reverse("transaction-batch")
+        self.client.force_authenticate(user=self.user)
+
+    def test_batch_creates_all_transactions(self):
+        """
+        Test that every item is applied in order and written.
+        """
+        # arrange
+        data = {
+            "transactions": [
+                {
+                    "transaction_type": "deposit",
+                    "account": self.account.id,
+                    "amount": "50.00",
+                    "currency": "USD",
+                },
+                {
+                    "transaction_type": "withdrawal",
+                    "account": self.account.id,
+                    "amount": "30.00",
+                    "currency": "USD",
+                },
+                {
+                    "transaction_type": "transfer",
+                    "account": self.account.id,
+                    "related_account": self.other_account.id,
+                    "amount": "20.00",
+                },
+            ]
+        }
+
+        # act
+        response = self.client.post(self.url, data, format="json")
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data["results"]
+        self.assertEqual([r["status"] for r in results], ["created"] * 3)
+
+        # balances are chained between the items
+        self.assertEqual(results[0]["transaction"]["previous_balance"], "100.00")
+        self.assertEqual(results[0]["transaction"]["new_balance"], "150.00")
+        self.assertEqual(results[1]["transaction"]["new_balance"], "120.00")
+        self.assertEqual(results[2]["transaction"]["new_balance"], "100.00")
+
+        self.account.refresh_from_db()
+        self.other_account.refresh_from_db()
+        self.assertEqual(self.account.balance, 100)
+        self.assertEqual(self.other_account.balance, 20)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 3)
+
+    def test_atomic_batch_writes_nothing_when_an_item_fails(self):
+        """
+        Test that in atomic mode a failing item rolls back the whole batch.
+        """
+        # arrange
+        data = {
+            "transactions": [
+                {
+                    "transaction_type": "deposit",
+                    "account": self.account.id,
+                    "amount": "50.00",
+                    "currency": "USD",
+                },
+                {
+                    "transaction_type": "withdrawal",
+                    "account": self.other_account.id,
+                    "amount": "10.00",
+                    "currency": "USD",
+                },
+            ]
+        }
+
+        # act
+        response = self.client.post(self.url, data, format="json")
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        results = response.data["results"]
+        self.assertEqual(results[0]["status"], "skipped")
+        self.assertEqual(results[1]["status"], "failed")
+        self.assertEqual(
+            results[1]["errors"]["non_field_errors"][0], "Insufficient balance"
+        )
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 100)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_best_effort_batch_writes_valid_items(self):
+        """
+        Test that in best effort mode valid items are written and failures reported.
+        """
+        # arrange
+        other_user = User.objects.create_user(username="other", password="other")
+        foreign_account = Account.objects.create(user=other_user, currency="USD")
+
+        data = {
+            "mode": "best_effort",
+            "transactions": [
+                {
+                    "transaction_type": "deposit",
+                    "account": self.account.id,
+                    "amount": "50.00",
+                    "currency": "USD",
+                },
+                {
+                    "transaction_type": "deposit",
+                    "account": foreign_account.id,
+                    "amount": "10.00",
+                    "currency": "USD",
+                },
+                {"transaction_type": "deposit", "account": self.account.id},
+            ],
+        }
+
+        # act
+        response = self.client.post(self.url, data, format="json")
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data["results"]
+        self.assertEqual(
+            [r["status"] for r in results], ["created", "failed", "failed"]
+        )
+        self.assertIn("account", results[1]["errors"])
+        self.assertIn("amount", results[2]["errors"])
+
+        self.account.refresh_from_db()
+        foreign_account.refresh_from_db()
+        self.assertEqual(self.account.balance, 150)
+        self.assertEqual(foreign_account.balance, 0)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_batch_with_empty_list(self):
+        """
+        Test that an empty batch is rejected.
+        """
+        response = self.client.post(self.url, {"transactions": []}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_with_missing_authentication(self):
+        """
+        Test that the batch endpoint requires authentication.
+        """
+        self.client.force_authenticate(user=None)
+
+        response = self.client.post(self.url, {"transactions": []}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -43,3 +43,13 @@ def mock_atomic(mocker):
     return mocker.patch(
         "quotation_system.transactions.views.transaction.atomic", return_value=atomic_cm
     )
+
+
+@pytest.fixture
+def mock_rollups(mocker):
+    return mocker.patch("quotation_system.transactions.views.record_transaction")
+
+
+@pytest.fixture
+def mock_postings(mocker):
+    return mocker.patch("quotation_system.transactions.views.record_postings")
@@ -0,0 +1,158 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.transactions.models import Transaction
+
+
+@pytest.mark.integration
+class TestTransactionExportView(APITestCase):
+    """
+    Test the streaming export of transactions.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(user=self.user, currency="USD")
+        self.other_account = Account.objects.create(user=self.user, currency="USD")
+
+        self.trx = [
+            self.create_transaction(self.account, datetime(2024, 1, 1, 10)),
+            self.create_transaction(self.other_account, datetime(2024, 1, 2, 23, 59)),
+            self.create_transaction(self.account, datetime(2024, 1, 3, 0, 0)),
+        ]
+
+        # transactions of other users are never exported
+        other_user = User.objects.create_user(username="other", password="password")
+        self.create_transaction(
+            Account.objects.create(user=other_user, currency="USD"),
+            datetime(2024, 1, 2),
+        )
+
+        self.url = reverse("transaction-export")
+        self.client.force_authenticate(user=self.user)
+
+    def create_transaction(self, account, created_at):
+        trx = Transaction.objects.create(
+            user=account.user,
+            account=account,
+            transaction_type="deposit",
+            amount=10,
+            currency="USD",
+            previous_balance=0,
+            new_balance=10,
+            description='says "hi", twice',
+        )
+        Transaction.objects.filter(pk=trx.pk).update(
+            created_at=created_at.replace(tzinfo=timezone.utc)
+        )
+        return trx
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_csv(self):
+        """
+        Test that every transaction of the user is streamed as CSV in time order.
+        """
+        # act
+        response = self.client.get(self.url)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="transactions.csv"', response["Content-Disposition"])
+
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual([int(row["id"]) for row in rows], [t.id for t in self.trx])
+        self.assertEqual(rows[0]["created_at"], "2024-01-01T10:00:00Z")
+        self.assertEqual(rows[0]["amount"], "10.00")
+        self.assertEqual(rows[0]["related_account"], "")
+        self.assertEqual(rows[0]["description"], 'says "hi", twice')
+
+    def test_export_ndjson(self):
+        """
+        Test that ?format=ndjson streams one JSON object per line.
+        """
+        # act
+        response = self.client.get(self.url, {"format": "ndjson"})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+
+        lines = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([line["id"] for line in lines], [t.id for t in self.trx])
+        self.assertEqual(lines[0]["account"], self.account.id)
+        self.assertIsNone(lines[0]["related_account"])
+        self.assertEqual(lines[0]["new_balance"], "10.00")
+
+    def test_export_filters(self):
+        """
+        Test the inclusive date range and account filters.
+        """
+        # act
+        by_date = self.client.get(
+            self.url, {"format": "ndjson", "from": "2024-01-02", "to": "2024-01-02"}
+        )
+        by_account = self.client.get(
+            self.url, {"format": "ndjson", "account": self.account.id}
+        )
+
+        # assert
+        ids = [json.loads(line)["id"] for line in self.read(by_date).splitlines()]
+        self.assertEqual(ids, [self.trx[1].id])
+
+        ids = [json.loads(line)["id"] for line in self.read(by_account).splitlines()]
+        self.assertEqual(ids, [self.trx[0].id, self.trx[2].id])
+
+    def test_export_reads_in_chunks(self):
+        """
+        Test that rows are fetched lazily while the response is consumed.
+        """
+        # act
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        # assert
+        # the archive blocks index, then the table rows
+        with self.assertNumQueries(2):
+            self.read(response)
+
+    def test_invalid_range(self):
+        """
+        Test that an inverted date range is rejected with a JSON error.
+        """
+        # act
+        response = self.client.get(self.url, {"from": "2024-01-03", "to": "2024-01-01"})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("to", response.json())
+
+    def test_unauthenticated(self):
+        """
+        Test that the export requires authentication.
+        """
+        # arrange
+        self.client.force_authenticate(user=None)
+
+        # act
+        response = self.client.get(self.url)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -26,4 +26,4 @@ def test_get_queryset_returns_transactions_filtered_by_user(
 
     # assert
     mock_filter.assert_called_once()
-    mock_filter.assert_called_once_with(user=user)
+    mock_filter.assert_called_once_with(user_id=user.pk)
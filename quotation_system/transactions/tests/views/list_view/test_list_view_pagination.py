@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.transactions.models import Transaction
+
+
+@pytest.mark.integration
+class TestTransactionListPagination(APITestCase):
+    """
+    Test the keyset pagination of the transaction list.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        account = Account.objects.create(user=self.user, currency="USD")
+
+        # two transactions share created_at, the id breaks the tie
+        now = timezone.now()
+        created_at = [now, now, now - timedelta(1), now - timedelta(2), now]
+        for index, value in enumerate(created_at):
+            trx = Transaction.objects.create(
+                user=self.user,
+                account=account,
+                transaction_type="deposit",
+                amount=1,
+                currency="USD",
+                previous_balance=index,
+                new_balance=index + 1,
+            )
+            Transaction.objects.filter(pk=trx.pk).update(created_at=value)
+
+        self.expected_ids = list(
+            Transaction.objects.order_by("-created_at", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        self.url = reverse("transaction-list-create")
+        self.client.force_authenticate(user=self.user)
+
+    def ids(self, response):
+        return [trx["id"] for trx in response.data["results"]]
+
+    def test_walk_pages_forward_and_backward(self):
+        """
+        Test that next/previous cursors walk the whole history without gaps.
+        """
+        # act
+        first = self.client.get(self.url, {"page_size": 2})
+        second = self.client.get(first.data["next"])
+        third = self.client.get(second.data["next"])
+        back = self.client.get(third.data["previous"])
+
+        # assert
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIsNone(first.data["previous"])
+        self.assertIsNone(third.data["next"])
+
+        self.assertEqual(
+            self.ids(first) + self.ids(second) + self.ids(third), self.expected_ids
+        )
+        self.assertEqual(self.ids(back), self.ids(second))
+
+    def test_pages_do_not_count_or_offset(self):
+        """
+        Test that a deep page is read with a keyset filter and a LIMIT only,
+        plus the ETag and the lookup of the archive blocks it overlaps.
+        """
+        # arrange
+        first = self.client.get(self.url, {"page_size": 2})
+
+        # act
+        with self.assertNumQueries(3) as queries:
+            self.client.get(first.data["next"])
+
+        # assert
+        sql = queries.captured_queries[1]["sql"]
+        self.assertNotIn("COUNT", sql)
+        self.assertNotIn("OFFSET", sql)
+        self.assertIn("LIMIT 3", sql)
+        self.assertIn("archiveblock", queries.captured_queries[2]["sql"])
+
+    def test_invalid_cursor(self):
+        """
+        Test that a tampered cursor is rejected.
+        """
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,108 @@
+import pytest
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.currencies.models import Currency, CurrencyRate
+
+
+@pytest.mark.integration
+@override_settings(TRANSACTIONS_BALANCE_UPDATE_MODE="conditional")
+class TestPerformCreateConditionalUpdate(APITestCase):
+    """
+    Test deposits and withdrawals applied with a conditional UPDATE.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(
+            user=self.user, currency="USD", balance=100
+        )
+        self.url = reverse("transaction-list-create")
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, transaction_type, amount, currency="USD"):
+        data = {
+            "transaction_type": transaction_type,
+            "account": self.account.id,
+            "amount": amount,
+            "currency": currency,
+        }
+        return self.client.post(self.url, data, format="json")
+
+    def test_deposit_updates_balance(self):
+        """
+        Test that a deposit fills the balances from the UPDATE result.
+        """
+        response = self.post("deposit", "25.50")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["previous_balance"], "100.00")
+        self.assertEqual(response.data["new_balance"], "125.50")
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 125.5)
+
+    def test_withdrawal_updates_balance(self):
+        """
+        Test that a withdrawal fills the balances from the UPDATE result.
+        """
+        response = self.post("withdrawal", "40.00")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["previous_balance"], "100.00")
+        self.assertEqual(response.data["new_balance"], "60.00")
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 60)
+
+    def test_withdrawal_with_not_enough_balance(self):
+        """
+        Test that a withdrawal matching no row is rejected and writes nothing.
+        """
+        response = self.post("withdrawal", "100.01")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], "Insufficient balance")
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 100)
+        self.assertFalse(self.account.transactions.exists())
+
+    def test_withdrawal_with_different_currency(self):
+        """
+        Test that the converted amount is applied to the account.
+        """
+        # arrange
+        clp = Currency.objects.create(code="CLP", name="Chilean peso")
+        usd = Currency.objects.create(code="USD", name="US dollar")
+        CurrencyRate.objects.create(base_currency=clp, target_currency=usd, rate=1000)
+
+        # act
+        response = self.post("withdrawal", "5000", currency="CLP")
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["new_balance"], "95.00")
+
+    def test_deposit_does_not_lock_the_account(self):
+        """
+        Test that no select_for_update() query is issued.
+        """
+        # the first transaction of the day also inserts the daily rollup
+        self.post("deposit", "1.00")
+
+        # account validation, update balance, insert transaction, insert
+        # posting, update daily rollup (+ savepoint queries of the test
+        # transaction)
+        with self.assertNumQueries(7) as queries:
+            self.post("deposit", "1.00")
+
+        self.assertFalse(
+            any("FOR UPDATE" in query["sql"] for query in queries.captured_queries)
+        )
@@ -5,12 +5,19 @@ import pytest
 from .....accounts.models import Account
 from ....models import Transaction
 from ....serializers import TransactionSerializer
-from ..configtest import api_factory, mock_atomic, user, view
+from ..configtest import (
+    api_factory,
+    mock_atomic,
+    mock_postings,
+    mock_rollups,
+    user,
+    view,
+)
 
 
 @pytest.mark.unit
 def test_perform_create_deposit_sets_user_and_update_account_balance(
-    api_factory, user, view, mocker, mock_atomic
+    api_factory, user, view, mocker, mock_atomic, mock_rollups, mock_postings
 ):
 
     # arrange
@@ -68,7 +75,7 @@ def test_perform_create_deposit_sets_user_and_update_account_balance(
 
 @pytest.mark.unit
 def test_perform_create_deposit_with_different_currency(
-    api_factory, user, view, mocker, mock_atomic
+    api_factory, user, view, mocker, mock_atomic, mock_rollups, mock_postings
 ):
 
     # arrange
@@ -37,7 +37,7 @@ def test_perform_create_with_invalid_transaction_type(
         view.perform_create(serializer)
 
     mock_select_for_update.return_value.get.assert_called_once_with(
-        user=user, pk=data["account"]
+        user_id=user.pk, pk=data["account"]
     )
     serializer.save.assert_not_called()
     mock_atomic.assert_called_once()
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from quotation_system.accounts.models import Account
+from quotation_system.transactions.models import IdempotencyKey, Transaction
+
+
+@pytest.mark.integration
+class TestPerformCreateIdempotency(APITestCase):
+    """
+    Test transaction creation with an Idempotency-Key header.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account = Account.objects.create(
+            user=self.user, currency="USD", balance=100
+        )
+        self.url = reverse("transaction-list-create")
+        self.client.force_authenticate(user=self.user)
+
+        self.data = {
+            "transaction_type": "withdrawal",
+            "account": self.account.id,
+            "amount": "10.00",
+            "currency": "USD",
+        }
+
+    def post(self, data, key="key-1"):
+        return self.client.post(self.url, data, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay_returns_the_first_response(self):
+        """
+        Test that a retried request does not create a second transaction.
+        """
+        # act
+        first = self.post(self.data)
+
+        # a replay takes no lock and writes nothing
+        with self.assertNumQueries(1):
+            second = self.post(self.data)
+
+        # assert
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 90)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_keys_are_scoped_to_the_user(self):
+        """
+        Test that the same key sent by another user is a new request.
+        """
+        # arrange
+        other_user = User.objects.create_user(username="other", password="other")
+        other_account = Account.objects.create(
+            user=other_user, currency="USD", balance=100
+        )
+        self.post(self.data)
+
+        # act
+        self.client.force_authenticate(user=other_user)
+        response = self.post({**self.data, "account": other_account.id})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_key_reused_with_another_request(self):
+        """
+        Test that a key cannot be reused with a different payload.
+        """
+        # act
+        self.post(self.data)
+        response = self.post({**self.data, "amount": "20.00"})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        """
+        Test that a failed request can be retried with the same key.
+        """
+        # act
+        failed = self.post({**self.data, "amount": "1000.00"})
+        Account.objects.filter(pk=self.account.pk).update(balance=2000)
+        retried = self.post({**self.data, "amount": "1000.00"})
+
+        # assert
+        self.assertEqual(failed.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retried.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_expired_key_runs_again(self):
+        """
+        Test that a key older than the TTL is processed as a new request.
+        """
+        # arrange
+        self.post(self.data)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        # act
+        response = self.post(self.data)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_purge_command_deletes_expired_keys(self):
+        """
+        Test that the purge command only deletes expired keys.
+        """
+        # arrange
+        self.post(self.data, key="old")
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.post(self.data, key="new")
+
+        # act
+        call_command("purge_idempotency_keys", batch_size=1, stdout=StringIO())
+
+        # assert
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"]
+        )
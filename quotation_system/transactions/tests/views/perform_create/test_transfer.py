@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, call, create_autospec
+from unittest.mock import MagicMock, create_autospec
 
 import pytest
 from rest_framework import serializers
@@ -6,12 +6,19 @@ from rest_framework import serializers
 from .....accounts.models import Account
 from ....models import Transaction
 from ....serializers import TransactionSerializer
-from ..configtest import api_factory, mock_atomic, user, view
+from ..configtest import (
+    api_factory,
+    mock_atomic,
+    mock_postings,
+    mock_rollups,
+    user,
+    view,
+)
 
 
 @pytest.mark.unit
 def test_perform_create_transfer_sets_user_and_update_account_balance(
-    api_factory, user, view, mocker, mock_atomic
+    api_factory, user, view, mocker, mock_atomic, mock_rollups, mock_postings
 ):
 
     # arrange
@@ -37,18 +44,18 @@ def test_perform_create_transfer_sets_user_and_update_account_balance(
 
     # define mock account
     sender_account = MagicMock(
-        spec=Account, balance=initial_sender_balance, id=1, currency="USD"
+        spec=Account, balance=initial_sender_balance, id=1, pk=1, currency="USD"
     )
     receiver_account = MagicMock(
-        spec=Account, balance=initial_receiver_balance, id=2, currency="USD"
+        spec=Account, balance=initial_receiver_balance, id=2, pk=2, currency="USD"
     )
 
-    # mock get account
+    # mock lock of both accounts
     mock_select_for_update = mocker.patch(
         "quotation_system.transactions.views.Account.objects.select_for_update",
     )
-    mock_get = mock_select_for_update.return_value.get
-    mock_get.side_effect = [sender_account, receiver_account]
+    mock_filter = mock_select_for_update.return_value.filter
+    mock_filter.return_value.order_by.return_value = [sender_account, receiver_account]
 
     # create serializer object
     serializer = create_autospec(TransactionSerializer, instance=True)
@@ -59,12 +66,11 @@ def test_perform_create_transfer_sets_user_and_update_account_balance(
     # act
     view.perform_create(serializer)
 
-    # Assert - ensure Account.objects.get called twice with correct params
-    expected_calls = [
-        call(user=user, pk=sender_account.id),
-        call(user=user, pk=receiver_account.id),
-    ]
-    mock_get.assert_has_calls(expected_calls)
+    # Assert - ensure both accounts are locked with one query in primary key order
+    mock_filter.assert_called_once_with(
+        user_id=user.pk, pk__in=[sender_account.id, receiver_account.id]
+    )
+    mock_filter.return_value.order_by.assert_called_once_with("pk")
 
     # assert serializer was called one time
     assert serializer.save.call_count == 1
@@ -88,7 +94,7 @@ def test_perform_create_transfer_sets_user_and_update_account_balance(
 
 @pytest.mark.unit
 def test_perform_create_transfer_with_different_currencies(
-    api_factory, user, view, mocker, mock_atomic
+    api_factory, user, view, mocker, mock_atomic, mock_rollups, mock_postings
 ):
 
     # arrange
@@ -123,18 +129,26 @@ def test_perform_create_transfer_with_different_currencies(
 
     # define mock account
     sender_account = MagicMock(
-        spec=Account, balance=initial_sender_balance, id=1, currency=sender_currency
+        spec=Account,
+        balance=initial_sender_balance,
+        id=1,
+        pk=1,
+        currency=sender_currency,
     )
     receiver_account = MagicMock(
-        spec=Account, balance=initial_receiver_balance, id=2, currency=receiver_currency
+        spec=Account,
+        balance=initial_receiver_balance,
+        id=2,
+        pk=2,
+        currency=receiver_currency,
     )
 
-    # mock get account
+    # mock lock of both accounts
     mock_select_for_update = mocker.patch(
         "quotation_system.transactions.views.Account.objects.select_for_update",
     )
-    mock_get = mock_select_for_update.return_value.get
-    mock_get.side_effect = [sender_account, receiver_account]
+    mock_filter = mock_select_for_update.return_value.filter
+    mock_filter.return_value.order_by.return_value = [sender_account, receiver_account]
 
     # create serializer object
     serializer = create_autospec(TransactionSerializer, instance=True)
@@ -152,12 +166,11 @@ def test_perform_create_transfer_with_different_currencies(
     # act
     view.perform_create(serializer)
 
-    # Assert - ensure Account.objects.get called twice with correct params
-    expected_calls = [
-        call(user=user, pk=sender_account.id),
-        call(user=user, pk=receiver_account.id),
-    ]
-    mock_get.assert_has_calls(expected_calls)
+    # Assert - ensure both accounts are locked with one query in primary key order
+    mock_filter.assert_called_once_with(
+        user_id=user.pk, pk__in=[sender_account.id, receiver_account.id]
+    )
+    mock_filter.return_value.order_by.assert_called_once_with("pk")
 
     # assert serializer was called one time
     assert serializer.save.call_count == 1
@@ -207,15 +220,17 @@ def test_perform_create_transfer_without_enough_balance(
     view.request.user = user
 
     # define mock account
-    sender_account = MagicMock(spec=Account, balance=initial_sender_balance, id=1)
-    receiver_account = MagicMock(spec=Account, balance=initial_receiver_balance, id=2)
+    sender_account = MagicMock(spec=Account, balance=initial_sender_balance, id=1, pk=1)
+    receiver_account = MagicMock(
+        spec=Account, balance=initial_receiver_balance, id=2, pk=2
+    )
 
-    # mock get account
-    # this shoudl be called only once
+    # mock lock of both accounts
     mock_select_for_update = mocker.patch(
         "quotation_system.transactions.views.Account.objects.select_for_update",
     )
-    mock_select_for_update.return_value.get.return_value = sender_account
+    mock_filter = mock_select_for_update.return_value.filter
+    mock_filter.return_value.order_by.return_value = [sender_account, receiver_account]
 
     # create serializer object
     serializer = create_autospec(TransactionSerializer, instance=True)
@@ -6,12 +6,19 @@ from rest_framework import serializers
 from .....accounts.models import Account
 from ....models import Transaction
 from ....serializers import TransactionSerializer
-from ..configtest import api_factory, mock_atomic, user, view
+from ..configtest import (
+    api_factory,
+    mock_atomic,
+    mock_postings,
+    mock_rollups,
+    user,
+    view,
+)
 
 
 @pytest.mark.unit
 def test_perform_create_withdrawal_sets_user_and_update_account_balance(
-    api_factory, user, view, mocker, mock_atomic
+    api_factory, user, view, mocker, mock_atomic, mock_rollups, mock_postings
 ):
 
     # arrange
@@ -115,7 +122,7 @@ def test_perform_create_withdrawal_with_not_enough_balance(
 
 @pytest.mark.unit
 def test_perform_create_withdrawal_with_different_currencies(
-    api_factory, user, view, mocker, mock_atomic
+    api_factory, user, view, mocker, mock_atomic, mock_rollups, mock_postings
 ):
     # arrange
 
@@ -1,8 +1,15 @@
 from django.urls import path
 
-from .views import TransactionDetailView, TransactionListView
+from .views import (
+    TransactionBatchView,
+    TransactionDetailView,
+    TransactionExportView,
+    TransactionListView,
+)
 
 urlpatterns = [
     path("", TransactionListView.as_view(), name="transaction-list-create"),
+    path("batch/", TransactionBatchView.as_view(), name="transaction-batch"),
+    path("export/", TransactionExportView.as_view(), name="transaction-export"),
     path("<int:pk>/", TransactionDetailView.as_view(), name="transaction-detail"),
 ]
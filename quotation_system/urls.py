@@ -18,12 +18,22 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from quotation_system.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    # prometheus metrics
+    path("metrics", metrics_view, name="metrics"),
     # user app
     path("api/users/", include("quotation_system.users.urls")),
     # account app
     path("api/accounts/", include("quotation_system.accounts.urls")),
     # transaction app
     path("api/transactions/", include("quotation_system.transactions.urls")),
+    # async (ASGI) versions of the account and transaction endpoints
+    path("api/async/accounts/", include("quotation_system.accounts.async_urls")),
+    path(
+        "api/async/transactions/",
+        include("quotation_system.transactions.async_urls"),
+    ),
 ]
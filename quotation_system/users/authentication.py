@@ -0,0 +1,186 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from quotation_system.caching import MISSING, TTLCache
+from quotation_system.timing import timed
+
+from .tokens import USERNAME_CLAIM
+
+# {user id: User} read by ClaimsJWTAuthentication when JWT_USER_CACHE_TTL is set
+user_cache = TTLCache(
+    maxsize=settings.JWT_USER_CACHE_SIZE, ttl=settings.JWT_USER_CACHE_TTL
+)
+
+
+class ClaimsUser(TokenUser):
+    """
+    The user of a request built from the claims of its access token, without
+    reading the User row. Views filter by user_id=request.user.pk, and
+    model_user() gives a User instance to the relations that need one.
+    """
+
+    @cached_property
+    def id(self):
+        return get_user_model()._meta.pk.to_python(
+            self.token[api_settings.USER_ID_CLAIM]
+        )
+
+
+def model_user(user):
+    """
+    User instance of the request user, built from the claims (no query) for
+    a ClaimsUser.
+    """
+    if not isinstance(user, ClaimsUser):
+        return user
+
+    instance = get_user_model()(pk=user.pk, username=user.username)
+    instance._state.adding = False
+    instance._state.db = DEFAULT_DB_ALIAS
+    return instance
+
+
+def forget_user(sender, instance, **kwargs):
+    """
+    post_save / post_delete of User: drop the cached user, so a deactivated
+    (or deleted) user loses access at once in this process.
+    """
+    user_cache.delete(str(instance.pk))
+
+
+def check_revoked(user, validated_token):
+    if api_settings.CHECK_REVOKE_TOKEN:
+        if validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication timed as the "auth" phase of the request (see timing.py).
+    """
+
+    def authenticate(self, request):
+        with timed("auth"):
+            return super().authenticate(request)
+
+
+class ClaimsJWTAuthentication(TimedJWTAuthentication):
+    """
+    JWTAuthentication without the User query of every request.
+
+    Tokens issued at login carry the username (users/tokens.py), and the
+    request user is a ClaimsUser built from the claims: a deactivated user
+    keeps access until the token expires (ACCESS_TOKEN_LIFETIME).
+
+    With JWT_USER_CACHE_TTL set, User rows are read instead and kept that
+    many seconds in an LRU (JWT_USER_CACHE_SIZE), dropped when the user is
+    saved or deleted. Updates bypassing the signals, or made by other
+    processes, are seen once the entry expires.
+
+    Tokens without the claims (issued before them) read the user.
+    """
+
+    def get_user(self, validated_token):
+        user = self.known_user(validated_token)
+        if user is None:
+            user = self.remember(validated_token, super().get_user(validated_token))
+        return user
+
+    def known_user(self, validated_token):
+        """
+        The user of validated_token if it can be had without a query, from
+        the claims or the cache, else None.
+        """
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if settings.JWT_USER_CACHE_TTL:
+            user = user_cache.get(str(validated_token[api_settings.USER_ID_CLAIM]))
+            if user is MISSING:
+                return None
+            check_revoked(user, validated_token)
+            return user
+
+        if USERNAME_CLAIM in validated_token:
+            return ClaimsUser(validated_token)
+
+        return None
+
+    def remember(self, validated_token, user):
+        if settings.JWT_USER_CACHE_TTL:
+            user_cache.set(str(validated_token[api_settings.USER_ID_CLAIM]), user)
+        return user
+
+
+class AsyncJWTAuthentication(ClaimsJWTAuthentication):
+    """
+    JWTAuthentication usable from async views: the token is checked in the
+    event loop and the user is read with the async ORM.
+    """
+
+    async def authenticate_async(self, request):
+        """
+        Returns (user, validated_token), or None if the request has no token.
+        """
+        with timed("auth"):
+            header = self.get_header(request)
+            if header is None:
+                return None
+
+            raw_token = self.get_raw_token(header)
+            if raw_token is None:
+                return None
+
+            validated_token = self.get_validated_token(raw_token)
+
+            return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """
+        Async get_user().
+        """
+        user = self.known_user(validated_token)
+        if user is None:
+            user = self.remember(
+                validated_token, await self.aread_user(validated_token)
+            )
+        return user
+
+    async def aread_user(self, validated_token):
+        """
+        Async JWTAuthentication.get_user(), with the same checks.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        try:
+            user = await self.user_model.objects.aget(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            ) from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        check_revoked(user, validated_token)
+
+        return user
@@ -0,0 +1,11 @@
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from .tokens import RefreshToken
+
+
+class LoginSerializer(TokenObtainPairSerializer):
+    """
+    TokenObtainPairSerializer issuing tokens with the user claims.
+    """
+
+    token_class = RefreshToken
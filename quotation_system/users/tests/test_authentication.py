@@ -0,0 +1,122 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt import tokens
+
+from quotation_system.accounts.models import Account
+from quotation_system.users.authentication import user_cache
+from quotation_system.users.tokens import AccessToken
+
+
+@pytest.mark.integration
+class TestClaimsJWTAuthentication(APITestCase):
+    """
+    Test that requests are authenticated without reading the user.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        Account.objects.create(user=self.user, currency="USD")
+        self.url = reverse("account-list")
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_login_tokens_carry_the_username(self):
+        """
+        Test that the access tokens of login and refresh have the username claim.
+        """
+        # act
+        login = self.client.post(
+            reverse("login"),
+            {"username": "testuser", "password": "testpassword"},
+            format="json",
+        )
+        refresh = self.client.post(
+            reverse("refresh"), {"refresh": login.data["refresh"]}, format="json"
+        )
+
+        # assert
+        self.assertEqual(
+            tokens.AccessToken(login.data["access"])["username"], "testuser"
+        )
+        self.assertEqual(
+            tokens.AccessToken(refresh.data["access"])["username"], "testuser"
+        )
+
+    def test_claims_token_runs_no_user_query(self):
+        """
+        Test that a token with the user claims only queries the accounts
+        (their ETag and the page).
+        """
+        # arrange
+        self.authenticate(AccessToken.for_user(self.user))
+
+        # act
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["user"], "testuser")
+
+    def test_token_without_claims_reads_the_user(self):
+        """
+        Test that tokens issued without the user claims still work.
+        """
+        # arrange
+        self.authenticate(tokens.AccessToken.for_user(self.user))
+
+        # act
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(JWT_USER_CACHE_TTL=60)
+    def test_user_cache(self):
+        """
+        Test that cached users are read once and dropped when deactivated.
+        """
+        # arrange
+        self.addCleanup(user_cache.clear)
+        self.authenticate(AccessToken.for_user(self.user))
+
+        # act
+        with mock.patch.object(user_cache, "ttl", 60):
+            with self.assertNumQueries(3):
+                self.client.get(self.url)
+            with self.assertNumQueries(2):
+                cached = self.client.get(self.url)
+
+            self.user.is_active = False
+            self.user.save()
+            deactivated = self.client.get(self.url)
+
+        # assert
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(deactivated.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_async_claims_token(self):
+        """
+        Test that async views build the user from the claims too.
+        """
+        # arrange
+        headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+        # act
+        response = await self.async_client.get(
+            reverse("async-account-list"), headers=headers
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"][0]["user"], "testuser")
@@ -0,0 +1,25 @@
+from rest_framework_simplejwt import tokens
+
+# claim with the username of the user, read by ClaimsUser
+USERNAME_CLAIM = "username"
+
+
+class UserClaimsMixin:
+    """
+    Tokens carrying the claims ClaimsJWTAuthentication builds the user from.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[USERNAME_CLAIM] = user.get_username()
+        return token
+
+
+class AccessToken(UserClaimsMixin, tokens.AccessToken):
+    pass
+
+
+class RefreshToken(UserClaimsMixin, tokens.RefreshToken):
+    # the claims are copied into the access tokens of refresh requests too
+    access_token_class = AccessToken
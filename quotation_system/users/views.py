@@ -1,5 +1,7 @@
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from .serializers import LoginSerializer
+
 
 # TODO: add typing?
 class LoginView(TokenObtainPairView):
@@ -8,7 +10,7 @@ class LoginView(TokenObtainPairView):
     Returns access and refresh tokens.
     """
 
-    pass
+    serializer_class = LoginSerializer
 
 
 class RefreshTokenView(TokenRefreshView):